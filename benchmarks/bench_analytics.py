@@ -0,0 +1,71 @@
+"""
+Benchmark: maintenance cost rollups, live GROUP BY versus summary tables.
+
+Also reports what the summary triggers add to a single add_maintenance_log.
+
+Usage:
+    python -m benchmarks.bench_analytics [--cars 100000] [--logs-per-car 10]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import src.analytics as analytics
+import src.database as db
+from src.records import MaintenanceLog
+from benchmarks.synthetic_fleet import populate
+
+# Single-row inserts timed per mode
+INSERTS = 500
+
+
+def _ms(func):
+    start = time.perf_counter()
+    func()
+    return (time.perf_counter() - start) * 1000
+
+
+def _insert_ms(car_ids):
+    start = time.perf_counter()
+    for i in range(INSERTS):
+        log = MaintenanceLog(service="oil change", cost=45.0, milage=i, date="2024-06-01")
+        db.add_maintenance_log(car_ids[i % len(car_ids)], log)
+    return (time.perf_counter() - start) * 1000 / INSERTS
+
+
+def run(cars, logs_per_car):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        car_ids = populate(cars=cars, logs_per_car=logs_per_car)
+        print(f"fleet: {cars:,} cars, {cars * logs_per_car:,} maintenance logs")
+
+        results["enable_summaries_ms"] = _ms(analytics.enable_summaries)
+        print(f"enable_summaries (backfill) {results['enable_summaries_ms']:10.1f} ms")
+        print(f"{'rollup':<12} {'GROUP BY ms':>12} {'summary ms':>12}")
+        for group in analytics.GROUPS:
+            live = _ms(lambda: analytics.cost_rollup(group, use_summaries=False))
+            summary = _ms(lambda: analytics.cost_rollup(group, use_summaries=True))
+            results[group] = {"group_by_ms": live, "summary_ms": summary}
+            print(f"{group:<12} {live:12.1f} {summary:12.1f}")
+
+        results["insert_with_summaries_ms"] = _insert_ms(car_ids)
+        analytics.disable_summaries()
+        results["insert_without_summaries_ms"] = _insert_ms(car_ids)
+        print(
+            f"add_maintenance_log: {results['insert_without_summaries_ms']:.3f} ms without summaries,"
+            f" {results['insert_with_summaries_ms']:.3f} ms with"
+        )
+        db.close_db_connection()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cars", type=int, default=100000)
+    parser.add_argument("--logs-per-car", type=int, default=10)
+    args = parser.parse_args()
+    run(args.cars, args.logs_per_car)
@@ -0,0 +1,71 @@
+"""
+Benchmark: VIN/plate lookups through CarIndex versus scanning the car list.
+
+Usage:
+    python -m benchmarks.bench_car_index [--cars 100000]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+import src.database as db
+from src.car_index import CarIndex
+from benchmarks.synthetic_fleet import populate
+
+LOOKUPS = 200
+
+
+def _scan(cars, term):
+    """The lookup search_for_car used to do."""
+    for car in cars:
+        if car.vin == term or car.license_plate == term:
+            return car
+    return None
+
+
+def _per_lookup_ms(func, terms):
+    start = time.perf_counter()
+    for term in terms:
+        func(term)
+    return (time.perf_counter() - start) * 1000 / len(terms)
+
+
+def run(cars):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        populate(cars=cars, logs_per_car=0)
+        fleet = db.load_all_cars(lazy=True)
+
+        start = time.perf_counter()
+        index = CarIndex(fleet)
+        results["build_ms"] = (time.perf_counter() - start) * 1000
+        reloaded = db.load_all_cars(lazy=True)
+        reloaded[0].license_plate = "EDITED"
+        start = time.perf_counter()
+        index.rebuild(reloaded)
+        results["rebuild_after_reload_ms"] = (time.perf_counter() - start) * 1000
+
+        rng = random.Random(42)
+        terms = [rng.choice(reloaded).license_plate for _ in range(LOOKUPS)]
+        prefixes = [term[:6] for term in terms]
+        results["scan_ms"] = _per_lookup_ms(lambda term: _scan(reloaded, term), terms)
+        results["find_ms"] = _per_lookup_ms(index.find, terms)
+        results["prefix_ms"] = _per_lookup_ms(index.search_prefix, prefixes)
+        db.close_db_connection()
+
+    print(f"{cars:,} cars")
+    for name, value in results.items():
+        print(f"{name:<26} {value:10.4f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cars", type=int, default=100000)
+    args = parser.parse_args()
+    run(args.cars)
@@ -0,0 +1,95 @@
+"""
+Microbenchmark: per-call connections versus the pooled thread-local connection.
+
+The "per-call" variant reproduces the old behaviour of database.py, where every
+function opened a connection, set its PRAGMAs, committed and closed it again.
+
+Usage:
+    python -m benchmarks.bench_connections [--ops 2000]
+"""
+
+import argparse
+import os
+import sqlite3
+import tempfile
+import time
+
+import src.database as db
+from src.car import Car
+
+
+def _per_call_connection():
+    conn = sqlite3.connect(db.DB_FILE)
+    conn.row_factory = sqlite3.Row
+    conn.execute("PRAGMA foreign_keys = ON")
+    return conn
+
+
+def per_call_check_vin(vin):
+    conn = _per_call_connection()
+    result = conn.execute("SELECT id FROM cars WHERE vin = ?", (vin,)).fetchone()
+    conn.close()
+    return result is not None
+
+
+def per_call_add_maintenance_log(car_id, log):
+    conn = _per_call_connection()
+    cursor = conn.execute(
+        "INSERT INTO maintenance_logs (car_id, service, cost, milage, date) VALUES (?, ?, ?, ?, ?)",
+        (car_id, log["service"], log["cost"], log["milage"], log["date"]),
+    )
+    log["id"] = cursor.lastrowid
+    conn.commit()
+    conn.close()
+
+
+def _ops_per_second(func, ops):
+    start = time.perf_counter()
+    for i in range(ops):
+        func(i)
+    return ops / (time.perf_counter() - start)
+
+
+def run(ops):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        car = Car("Bench", "Car", 2020, 1000, "BENCHVIN", "BENCHPLATE")
+        db.add_car(car)
+        log = {"service": "oil change", "cost": 50.0, "milage": 1000, "date": "2024-01-01"}
+
+        results = {
+            "check_vin_exists (per-call)": _ops_per_second(
+                lambda i: per_call_check_vin(f"VIN{i}"), ops
+            ),
+            "check_vin_exists (pooled)": _ops_per_second(
+                lambda i: db.check_vin_exists(f"VIN{i}"), ops
+            ),
+            "add_maintenance_log (per-call)": _ops_per_second(
+                lambda i: per_call_add_maintenance_log(car.id, dict(log)), ops
+            ),
+            "add_maintenance_log (pooled)": _ops_per_second(
+                lambda i: db.add_maintenance_log(car.id, dict(log)), ops
+            ),
+        }
+
+        def batched(i):
+            with db.transaction():
+                for _ in range(10):
+                    db.add_maintenance_log(car.id, dict(log))
+
+        results["add_maintenance_log x10 (one transaction)"] = (
+            _ops_per_second(batched, max(ops // 10, 1)) * 10
+        )
+        db.close_db_connection()
+
+    for name, rate in results.items():
+        print(f"{name:<45} {rate:>12,.0f} ops/sec")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--ops", type=int, default=2000)
+    args = parser.parse_args()
+    run(args.ops)
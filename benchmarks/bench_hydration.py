@@ -0,0 +1,75 @@
+"""
+Benchmark: hydrating cars by stitching three queries versus one JSON-aggregating query.
+
+For each fleet size, load_all_cars() is timed in both HYDRATION_MODEs, and so
+is load_car_by_id() for a sample of cars with the car cache disabled.
+
+Usage:
+    python -m benchmarks.bench_hydration [--sizes 1,100,100000] [--logs-per-car 10]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import src.database as db
+from benchmarks.synthetic_fleet import populate
+
+# Cars looked up one by one per measurement of load_car_by_id
+LOOKUPS = 200
+
+
+def _best_of(repeat, func):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _measure(car_ids, repeat):
+    lookups = car_ids[:LOOKUPS]
+    all_seconds = _best_of(repeat, db.load_all_cars)
+    by_id_seconds = _best_of(repeat, lambda: [db.load_car_by_id(car_id) for car_id in lookups])
+    return all_seconds, by_id_seconds / len(lookups)
+
+
+def run(sizes, logs_per_car, repeat=3):
+    results = {}
+    saved_mode, saved_cache_size = db.HYDRATION_MODE, db.CAR_CACHE_SIZE
+    db.CAR_CACHE_SIZE = 0  # Every load_car_by_id must reach the database
+    try:
+        for cars in sizes:
+            with tempfile.TemporaryDirectory() as tmp:
+                db.DB_FILE = os.path.join(tmp, "bench.db")
+                db.init_db()
+                car_ids = populate(cars=cars, logs_per_car=logs_per_car)
+                results[cars] = {}
+                print(f"fleet: {cars:,} cars, {cars * logs_per_car:,} maintenance logs")
+                for mode in db.HYDRATION_MODES:
+                    db.HYDRATION_MODE = mode
+                    all_seconds, by_id_seconds = _measure(car_ids, repeat)
+                    results[cars][mode] = {
+                        "load_all_cars_seconds": all_seconds,
+                        "load_car_by_id_seconds": by_id_seconds,
+                    }
+                    print(
+                        f"  {mode:<7} load_all_cars {all_seconds * 1000:10.2f} ms"
+                        f"   load_car_by_id {by_id_seconds * 1e6:8.1f} us"
+                    )
+                db.close_db_connection()
+    finally:
+        db.HYDRATION_MODE, db.CAR_CACHE_SIZE = saved_mode, saved_cache_size
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--sizes", default="1,100,100000", help="comma-separated fleet sizes")
+    parser.add_argument("--logs-per-car", type=int, default=10)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run([int(size) for size in args.sizes.split(",")], args.logs_per_car, args.repeat)
@@ -0,0 +1,52 @@
+"""
+Benchmark: listing the fleet with eagerly versus lazily loaded logs.
+
+Both variants load every car and format it the way ui_helpers.list_cars does;
+only the eager one also materializes every maintenance and diagnostic log.
+
+Usage:
+    python -m benchmarks.bench_lazy_loading [--cars 20000] [--logs-per-car 20]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+import src.database as db
+from benchmarks.synthetic_fleet import populate
+
+
+def _measure(lazy):
+    tracemalloc.start()
+    start = time.perf_counter()
+    cars = db.load_all_cars(lazy=lazy)
+    listing = [str(car) for car in cars]
+    seconds = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return len(listing), seconds, peak
+
+
+def run(cars, logs_per_car):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        populate(cars=cars, logs_per_car=logs_per_car)
+
+        results = {}
+        for label, lazy in (("eager", False), ("lazy", True)):
+            count, seconds, peak = _measure(lazy)
+            results[label] = {"seconds": seconds, "peak_bytes": peak}
+            print(f"{label:<6} {count:,} cars listed in {seconds:7.3f} s, peak {peak / 2**20:8.1f} MiB")
+        db.close_db_connection()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cars", type=int, default=20000)
+    parser.add_argument("--logs-per-car", type=int, default=20)
+    args = parser.parse_args()
+    run(args.cars, args.logs_per_car)
@@ -0,0 +1,54 @@
+"""
+Benchmark: memory per loaded log entry, plain dicts versus slotted records.
+
+Both variants hydrate the same maintenance_logs rows; the dict variant is how
+logs were stored before src.records existed.
+
+Usage:
+    python -m benchmarks.bench_record_memory [--cars 5000] [--logs-per-car 20]
+"""
+
+import argparse
+import os
+import tempfile
+import tracemalloc
+
+import src.database as db
+from src.records import MaintenanceLog
+from benchmarks.synthetic_fleet import populate
+
+
+def _bytes_per_log(rows, hydrate):
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    logs = [hydrate(row) for row in rows]
+    after, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return (after - before) / len(logs)
+
+
+def run(cars, logs_per_car):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        populate(cars=cars, logs_per_car=logs_per_car)
+        rows = db.get_db_connection().execute("SELECT * FROM maintenance_logs").fetchall()
+        db.close_db_connection()
+
+    results = {
+        "dict": _bytes_per_log(rows, dict),
+        "record": _bytes_per_log(rows, MaintenanceLog.from_row),
+    }
+    print(f"{len(rows):,} maintenance logs")
+    for label, per_log in results.items():
+        print(f"{label:<7} {per_log:7.1f} bytes per log")
+    print(f"saving  {1 - results['record'] / results['dict']:7.1%}")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cars", type=int, default=5000)
+    parser.add_argument("--logs-per-car", type=int, default=20)
+    args = parser.parse_args()
+    run(args.cars, args.logs_per_car)
@@ -0,0 +1,67 @@
+"""
+Benchmark: ranked full-text search over a large fleet's logs.
+
+Compares the FTS5 search with the alternative it replaces, loading every car
+and scanning its logs in Python.
+
+Usage:
+    python -m benchmarks.bench_search [--cars 50000]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import src.database as db
+import src.search as search
+from benchmarks.synthetic_fleet import populate, populate_diagnostics
+
+QUERIES = ("P0420", "misfire", "brake", "replaced thermostat", "oil")
+REPEAT = 20
+
+
+def _scan_fleet(query):
+    """Finds matching logs the old way, by loading the whole fleet."""
+    words = query.lower().split()
+    matches = []
+    for car in db.load_all_cars():
+        for log in car.diagnostic_logs:
+            text = " ".join(str(log[field] or "") for field in ("description", "code", "resolution")).lower()
+            if all(word in text for word in words):
+                matches.append(log)
+        for log in car.maintenance_logs:
+            if all(word in log["service"].lower() for word in words):
+                matches.append(log)
+    return matches
+
+
+def run(cars):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        car_ids = populate(cars=cars, logs_per_car=10)
+        populate_diagnostics(car_ids, logs_per_car=2)
+        print(f"fleet: {cars:,} cars, {cars * 10:,} maintenance and {cars * 2:,} diagnostic logs")
+
+        print(f"{'query':<22} {'FTS5 ms':>9} {'fleet scan ms':>14}")
+        for query in QUERIES:
+            start = time.perf_counter()
+            for _ in range(REPEAT):
+                search.search(query)
+            fts_ms = (time.perf_counter() - start) * 1000 / REPEAT
+            start = time.perf_counter()
+            _scan_fleet(query)
+            scan_ms = (time.perf_counter() - start) * 1000
+            results[query] = {"fts_ms": fts_ms, "scan_ms": scan_ms}
+            print(f"{query:<22} {fts_ms:>9.2f} {scan_ms:>14.1f}")
+        db.close_db_connection()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cars", type=int, default=50000)
+    args = parser.parse_args()
+    run(args.cars)
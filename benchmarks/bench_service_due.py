@@ -0,0 +1,54 @@
+"""
+Benchmark: fleet-wide service reminders, per-car log scans versus the service index.
+
+The per-car path is what view_service_reminders used to do: load every car with
+all of its logs and call get_upcoming_services() on each one.
+
+Usage:
+    python -m benchmarks.bench_service_due [--cars 50000] [--logs-per-car 10]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import src.database as db
+from src.service_due import get_fleet_due_services
+from benchmarks.synthetic_fleet import populate
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return result, time.perf_counter() - start
+
+
+def per_car_due_services():
+    return {car.id: car.get_upcoming_services() for car in db.load_all_cars()}
+
+
+def run(cars, logs_per_car):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        populate(cars=cars, logs_per_car=logs_per_car)
+
+        per_car, per_car_seconds = _timed(per_car_due_services)
+        indexed, indexed_seconds = _timed(get_fleet_due_services)
+        db.close_db_connection()
+
+    assert per_car == indexed, "service index disagrees with Car.get_upcoming_services"
+    print(f"fleet: {cars:,} cars, {cars * logs_per_car:,} maintenance logs")
+    print(f"per-car log scan   {per_car_seconds:8.3f} s")
+    print(f"vectorized index   {indexed_seconds:8.3f} s")
+    print(f"speedup            {per_car_seconds / indexed_seconds:8.1f}x")
+    return {"per_car_seconds": per_car_seconds, "indexed_seconds": indexed_seconds}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cars", type=int, default=50000)
+    parser.add_argument("--logs-per-car", type=int, default=10)
+    args = parser.parse_args()
+    run(args.cars, args.logs_per_car)
@@ -0,0 +1,111 @@
+"""
+Benchmark: CLI and web app startup time against a populated database.
+
+Each measurement runs in a fresh interpreter, pointed at a synthetic fleet
+through CAR_TRACKER_DB:
+
+- "import cli" / "import web app": importing src.cli.main or src.web.app.
+- "cli first prompt": from starting run_cli.py until the main menu asks
+  for a choice.
+- "cli first fleet action": from starting run_cli.py until option 7 (service
+  reminders, which needs every car) has been answered.
+
+The best of --repeat runs is reported. `python -X importtime -c "import
+src.cli.main"` shows where the import time goes.
+
+Usage:
+    python -m benchmarks.bench_startup [--cars 20000] [--logs-per-car 5] [--repeat 3]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+import src.database as db
+from benchmarks.synthetic_fleet import populate
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+MENU_PROMPT = b"Enter your choice: "
+CONTINUE_PROMPT = b"Press Enter to continue..."
+
+
+def _import_time(module, env):
+    code = f"import time; start = time.perf_counter(); import {module}; print(time.perf_counter() - start)"
+    output = subprocess.run(
+        [sys.executable, "-c", code], env=env, cwd=BASE_DIR, check=True, capture_output=True
+    ).stdout
+    return float(output.split()[-1])
+
+
+def _read_until(process, marker, output):
+    """Reads the CLI's output until marker appears after what was read so far."""
+    start = len(output)
+    while marker not in output[start:]:
+        chunk = os.read(process.stdout.fileno(), 65536)
+        if not chunk:
+            raise RuntimeError(f"The CLI exited before printing {marker!r}")
+        output += chunk
+    return output
+
+
+def _cli_times(env):
+    """Returns (seconds to the first menu prompt, seconds until option 7 has been answered)."""
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "run_cli.py"], env=env, cwd=BASE_DIR,
+        stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+    )
+    try:
+        output = _read_until(process, MENU_PROMPT, b"")
+        first_prompt = time.perf_counter() - start
+        process.stdin.write(b"7\n")
+        process.stdin.flush()
+        _read_until(process, CONTINUE_PROMPT, output)
+        first_action = time.perf_counter() - start
+        process.stdin.write(b"\n14\n")
+        process.stdin.close()
+        process.wait(timeout=60)
+    finally:
+        if process.poll() is None:
+            process.kill()
+    return first_prompt, first_action
+
+
+def run(cars, logs_per_car, repeat):
+    with tempfile.TemporaryDirectory() as tmp:
+        db_file = os.path.join(tmp, "bench.db")
+        saved_db_file, db.DB_FILE = db.DB_FILE, db_file
+        try:
+            db.init_db()
+            populate(cars=cars, logs_per_car=logs_per_car)
+            db.close_db_connection()
+        finally:
+            db.DB_FILE = saved_db_file
+
+        env = dict(os.environ, CAR_TRACKER_DB=db_file, TERM="dumb")
+        samples = {"import cli": [], "import web app": [], "cli first prompt": [], "cli first fleet action": []}
+        for _ in range(repeat):
+            samples["import cli"].append(_import_time("src.cli.main", env))
+            samples["import web app"].append(_import_time("src.web.app", env))
+            first_prompt, first_action = _cli_times(env)
+            samples["cli first prompt"].append(first_prompt)
+            samples["cli first fleet action"].append(first_action)
+
+    results = {name: min(times) * 1000 for name, times in samples.items()}
+    print(f"{cars:,} cars, {logs_per_car} logs per car")
+    for name, ms in results.items():
+        print(f"{name:<24} {ms:>10.1f} ms")
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cars", type=int, default=20000)
+    parser.add_argument("--logs-per-car", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    run(args.cars, args.logs_per_car, args.repeat)
@@ -0,0 +1,84 @@
+"""
+Benchmark: one user action as separate writes versus one UnitOfWork commit.
+
+The action is the web app's "add service record": a maintenance log insert
+plus saving the mileage the service raised. "separate" commits each write on
+its own, as the route used to; "unit of work" commits both together. Each
+variant runs under the rollback journal (DELETE) and WAL, with the default
+synchronous=NORMAL and with FULL. Under DELETE every commit syncs the
+database file and the journal; under WAL with NORMAL a commit only appends
+to the WAL and syncing waits for checkpoints, so fewer commits matter most
+for the rollback journal and for synchronous=FULL.
+
+Usage:
+    python -m benchmarks.bench_unit_of_work [--actions 300]
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import src.database as db
+from src.car import Car
+
+MODES = [(journal, sync) for journal in ("DELETE", "WAL") for sync in ("NORMAL", "FULL")]
+
+
+def separate(car, mileage):
+    log = car.log_maintenance("oil change", 45.0, milage=mileage)
+    db.add_maintenance_log(car.id, log)
+    db.update_car_details(car)
+
+
+def unit_of_work(car, mileage):
+    log = car.log_maintenance("oil change", 45.0, milage=mileage)
+    with db.UnitOfWork() as work:
+        work.add_maintenance_log(car.id, log)
+        work.update_car(car)
+
+
+def _measure(action, actions):
+    car = Car("Bench", "Car", 2020, 1000, f"VIN{action.__name__}", f"PLATE{action.__name__}")
+    db.add_car(car)
+    statements = []
+    db.get_db_connection().set_trace_callback(statements.append)
+    start = time.perf_counter()
+    for i in range(actions):
+        action(car, 1001 + i)
+    elapsed = time.perf_counter() - start
+    db.get_db_connection().set_trace_callback(None)
+    return {
+        "ms_per_action": elapsed / actions * 1000,
+        "commits_per_action": statements.count("COMMIT") / actions,
+    }
+
+
+def run(actions):
+    saved = db.DB_FILE, db.JOURNAL_MODE, db.SYNCHRONOUS
+    results = {}
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            for journal, sync in MODES:
+                db.JOURNAL_MODE, db.SYNCHRONOUS = journal, sync
+                db.DB_FILE = os.path.join(tmp, f"{journal}-{sync}.db")
+                db.init_db()
+                for action in (separate, unit_of_work):
+                    results[f"{journal}/{sync} {action.__name__}"] = _measure(action, actions)
+                db.close_db_connection()
+    finally:
+        db.DB_FILE, db.JOURNAL_MODE, db.SYNCHRONOUS = saved
+
+    for name, result in results.items():
+        print(
+            f"{name:<28} {result['ms_per_action']:>8.3f} ms/action"
+            f" {result['commits_per_action']:>5.1f} commits/action"
+        )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--actions", type=int, default=300)
+    args = parser.parse_args()
+    run(args.actions)
@@ -0,0 +1,91 @@
+"""
+Benchmark: requests per second as the number of gunicorn workers grows.
+
+Each worker count gets a fresh gunicorn master (gunicorn.conf.py, preloaded
+app) serving a synthetic fleet, loaded by the load_test client.
+Scaling is only visible with as many CPU cores as workers.
+
+Usage:
+    python -m benchmarks.bench_workers [--workers 1,2,4] [--concurrency 32]
+"""
+
+import argparse
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import src.database as db
+from benchmarks.load_test import _default_paths, _fetch, measure
+from benchmarks.synthetic_fleet import populate
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_gunicorn(db_file, workers):
+    port = _free_port()
+    env = dict(
+        os.environ,
+        CAR_TRACKER_DB=db_file,
+        CAR_TRACKER_BIND=f"127.0.0.1:{port}",
+        CAR_TRACKER_WORKERS=str(workers),
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "--access-logfile", "/dev/null", "src.web.wsgi:application"],
+        cwd=BASE_DIR,
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.monotonic() + 30
+    while _fetch(url + "/car/1") is None:
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise RuntimeError("gunicorn did not start")
+        time.sleep(0.2)
+    return process, url
+
+
+def run(worker_counts, concurrency, requests, cars):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        paths = _default_paths(populate(cars=cars, logs_per_car=10))
+        db.close_db_connection()
+
+        print(f"{os.cpu_count()} CPUs, {concurrency} concurrent clients")
+        print(f"{'workers':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9}")
+        for workers in worker_counts:
+            process, url = _start_gunicorn(db.DB_FILE, workers)
+            try:
+                measure(url, paths, concurrency, concurrency * 4)  # Warm up every worker
+                result = measure(url, paths, concurrency, requests)
+            finally:
+                process.terminate()
+                process.wait()
+            results[workers] = result
+            print(
+                f"{workers:>8} {result['requests_per_second']:>9.1f}"
+                f" {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f}"
+            )
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--workers", default="1,2,4", help="comma-separated worker counts")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=1000)
+    parser.add_argument("--cars", type=int, default=1000)
+    args = parser.parse_args()
+    run([int(count) for count in args.workers.split(",")], args.concurrency, args.requests, args.cars)
@@ -0,0 +1,120 @@
+"""
+Load test: p50/p99 latency of the web app at increasing concurrency.
+
+By default a threaded Werkzeug server is started in-process on a temporary
+database with a synthetic fleet. Pass --url to load an already running
+server instead, e.g. the ASGI app under uvicorn or a multi-worker launch.
+
+Usage:
+    python -m benchmarks.load_test [--concurrency 1,4,16,64] [--requests 400]
+    python -m benchmarks.load_test --url http://127.0.0.1:8000 --cars 1000
+"""
+
+import argparse
+import logging
+import os
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+import src.database as db
+from benchmarks.synthetic_fleet import populate
+
+
+def _percentile(sorted_values, fraction):
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def _fetch(url):
+    """Returns the latency of one GET in seconds, or None if it failed."""
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(url, timeout=60) as response:
+            response.read()
+    except (urllib.error.URLError, OSError):
+        return None
+    return time.perf_counter() - start
+
+
+def measure(base_url, paths, concurrency, requests):
+    """Issues requests GETs over the given paths from concurrency client threads."""
+    urls = [base_url + paths[i % len(paths)] for i in range(requests)]
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        latencies = list(pool.map(_fetch, urls))
+    elapsed = time.perf_counter() - start
+
+    succeeded = sorted(latency for latency in latencies if latency is not None)
+    if not succeeded:
+        return {"concurrency": concurrency, "errors": len(latencies)}
+    return {
+        "concurrency": concurrency,
+        "requests_per_second": len(succeeded) / elapsed,
+        "p50_ms": _percentile(succeeded, 0.50) * 1000,
+        "p99_ms": _percentile(succeeded, 0.99) * 1000,
+        "errors": len(latencies) - len(succeeded),
+    }
+
+
+def _default_paths(car_ids):
+    paths = ["/"]
+    paths += [f"/car/{car_id}" for car_id in car_ids[:: max(1, len(car_ids) // 20)]]
+    return paths
+
+
+def _start_local_server():
+    """Serves the app from a background thread. Returns (base URL, server)."""
+    from werkzeug.serving import make_server
+    from src.web.app import app
+
+    logging.getLogger("werkzeug").setLevel(logging.ERROR)  # No per-request log lines
+    server = make_server("127.0.0.1", 0, app, threaded=True)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_port}", server
+
+
+def run(levels, requests, cars, url=None):
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        server = None
+        if url is None:
+            db.DB_FILE = os.path.join(tmp, "bench.db")
+            db.init_db()
+            car_ids = populate(cars=cars, logs_per_car=10)
+            url, server = _start_local_server()
+        else:
+            car_ids = list(range(1, cars + 1))
+        paths = _default_paths(car_ids)
+
+        try:
+            _fetch(url + paths[0])  # Warm up
+            print(f"{'clients':>8} {'req/s':>9} {'p50 ms':>9} {'p99 ms':>9} {'errors':>7}")
+            for concurrency in levels:
+                result = measure(url, paths, concurrency, requests)
+                results.append(result)
+                if "p50_ms" in result:
+                    print(
+                        f"{concurrency:>8} {result['requests_per_second']:>9.1f}"
+                        f" {result['p50_ms']:>9.1f} {result['p99_ms']:>9.1f} {result['errors']:>7}"
+                    )
+                else:
+                    print(f"{concurrency:>8} {'-':>9} {'-':>9} {'-':>9} {result['errors']:>7}")
+        finally:
+            if server is not None:
+                server.shutdown()
+                db.close_db_connection()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--concurrency", default="1,4,16,64", help="comma-separated client counts")
+    parser.add_argument("--requests", type=int, default=400, help="requests per concurrency level")
+    parser.add_argument("--cars", type=int, default=1000, help="fleet size (ids 1..N when using --url)")
+    parser.add_argument("--url", help="base URL of a running server (default: start one in-process)")
+    args = parser.parse_args()
+    run([int(level) for level in args.concurrency.split(",")], args.requests, args.cars, args.url)
@@ -0,0 +1,197 @@
+"""
+Benchmark suite: times the hot paths on a synthetic fleet and emits JSON.
+
+Each case runs --repeat times against a fresh temporary database and
+reports its min and median wall time. Pass a previous run's JSON as
+--baseline to flag cases whose median got slower by more than --tolerance;
+the exit status is then 1, so the suite can gate a release.
+
+Usage:
+    python -m benchmarks.run_all [--cars 2000] [--output results.json]
+    python -m benchmarks.run_all --baseline results.json --tolerance 0.25
+    python -m benchmarks.run_all --service-mix "oil change=6,tire rotation=3,timing belt=1"
+"""
+
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+
+import src.database as db
+from src.history_manager import HistoryManager
+from src.search_filter import _apply_filters
+from benchmarks.synthetic_fleet import populate
+
+# Car ids loaded per load_car_by_id sample, each from a cold cache
+LOOKUPS = 100
+
+FILTERS = {"make": "Toyota", "has_open_issues": True, "needs_service_type": "oil change"}
+
+
+def _time_case(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {"min_ms": min(samples), "median_ms": statistics.median(samples), "repeat": repeat}
+
+
+def _cases(car_ids, client):
+    """Returns name -> zero-argument callable for every benchmarked path."""
+    from src.web import app as web_app
+
+    rng = random.Random(0)
+    lookup_ids = [rng.choice(car_ids) for _ in range(LOOKUPS)]
+    cars = db.load_all_cars()
+    snapshot = [car.to_dict() for car in cars]
+    history = HistoryManager()
+
+    def load_car_by_id():
+        for car_id in lookup_ids:
+            db.clear_car_cache()
+            db.load_car_by_id(car_id)
+
+    def upcoming_services():
+        for car in cars:
+            car.get_upcoming_services(current_mileage=car.milage)
+
+    def history_record_and_undo():
+        car = db.load_car_by_id(lookup_ids[0])
+        history.begin_action()
+        try:
+            car.milage += 1
+            db.update_car_details(car)
+        finally:
+            history.end_action()
+        history.undo()
+
+    def web_index():
+        # Cold: the car list is read and rendered again, not served from the fragment cache
+        web_app._car_list_cache.clear()
+        web_index_cached()
+
+    def web_index_cached():
+        response = client.get("/")
+        assert response.status_code == 200
+
+    return {
+        "load_all_cars": db.load_all_cars,
+        "load_all_cars_lazy": lambda: db.load_all_cars(lazy=True),
+        "load_car_by_id": load_car_by_id,
+        "apply_filters": lambda: _apply_filters(cars, FILTERS),
+        "get_upcoming_services": upcoming_services,
+        "history_record_and_undo": history_record_and_undo,
+        "reset_database": lambda: db.reset_database(snapshot),
+        "web_index": web_index,
+        "web_index_cached": web_index_cached,
+    }
+
+
+def run(cars, logs_per_car, open_issue_ratio, repeat, seed=42, service_mix=None):
+    with tempfile.TemporaryDirectory() as tmp:
+        db.DB_FILE = os.path.join(tmp, "bench.db")
+        db.init_db()
+        car_ids = populate(
+            cars=cars, logs_per_car=logs_per_car, seed=seed, open_issue_ratio=open_issue_ratio, service_mix=service_mix
+        )
+
+        from src.web import app as web_app
+
+        results = {}
+        try:
+            with web_app.app.test_client() as client:
+                for name, func in _cases(car_ids, client).items():
+                    results[name] = _time_case(func, repeat)
+                    print(f"{name:<26} {results[name]['median_ms']:10.2f} ms", file=sys.stderr)
+        finally:
+            # Pool threads hold their own connections to the benchmark database
+            web_app.start_executors(wait=True)
+            db.close_db_connection()
+
+    return {
+        "meta": {
+            "date": datetime.datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+            "cars": cars,
+            "logs_per_car": logs_per_car,
+            "open_issue_ratio": open_issue_ratio,
+            "seed": seed,
+            "service_mix": service_mix,
+        },
+        "results": results,
+    }
+
+
+def compare(report, baseline, tolerance):
+    """Returns the names of cases whose median is more than tolerance slower than in baseline."""
+    regressions = []
+    for name, result in report["results"].items():
+        before = baseline["results"].get(name)
+        if before and result["median_ms"] > before["median_ms"] * (1 + tolerance):
+            regressions.append(name)
+            print(
+                f"REGRESSION {name}: {before['median_ms']:.2f} ms -> {result['median_ms']:.2f} ms",
+                file=sys.stderr,
+            )
+    return regressions
+
+
+def _service_mix(value):
+    """argparse type for "service=weight,..." service mixes."""
+    mix = {}
+    for part in value.split(","):
+        service, _, weight = part.rpartition("=")
+        try:
+            weight = float(weight)
+        except ValueError:
+            weight = None
+        if not service.strip() or weight is None or weight <= 0:
+            raise argparse.ArgumentTypeError(f"'{part}' is not a service=positive weight pair")
+        mix[service.strip().lower()] = weight
+    return mix
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--cars", type=int, default=2000)
+    parser.add_argument("--logs-per-car", type=int, default=10)
+    parser.add_argument("--open-issue-ratio", type=float, default=0.2)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument(
+        "--service-mix", type=_service_mix,
+        help='relative weights of the logged services, e.g. "oil change=6,timing belt=1" (default: all equal)',
+    )
+    parser.add_argument("--output", help="write the JSON report here instead of stdout")
+    parser.add_argument("--baseline", help="JSON report of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="allowed slowdown, 0.25 = 25%%")
+    args = parser.parse_args(argv)
+
+    report = run(args.cars, args.logs_per_car, args.open_issue_ratio, args.repeat, args.seed, args.service_mix)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        if compare(report, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,120 @@
+"""
+Deterministic synthetic fleet generator for the benchmarks.
+
+Rows are written with executemany straight into the schema created by
+db.init_db(), so the triggers and indexes behave as in production.
+"""
+
+import datetime
+import random
+
+import src.database as db
+from src.car import SERVICE_INTERVALS
+
+MAKES = {
+    "Toyota": ["Camry", "Corolla", "RAV4"],
+    "Ford": ["Focus", "F-150", "Mustang"],
+    "Honda": ["Civic", "CR-V", "Accord"],
+    "Nissan": ["Altima", "Titan"],
+}
+
+# (trouble code, description, resolution) for synthetic diagnostic logs
+ISSUES = [
+    ("P0420", "Catalyst system efficiency below threshold", "Replaced catalytic converter"),
+    ("P0300", "Random engine misfire detected", "Replaced spark plugs and coil pack"),
+    ("P0171", "System too lean on bank 1", "Cleaned mass airflow sensor"),
+    ("P0128", "Coolant thermostat below regulating temperature", "Replaced thermostat"),
+    ("P0442", "Small evaporative emission leak", "Replaced gas cap"),
+    (None, "Grinding noise from front brakes when stopping", "Replaced brake pads and rotors"),
+    (None, "Steering wheel vibrates at highway speed", "Balanced front wheels"),
+    (None, "Battery warning light on dashboard", "Replaced alternator"),
+]
+
+
+def populate(cars=1000, logs_per_car=10, seed=42, batch_size=10000, open_issue_ratio=0.0, service_mix=None):
+    """
+    Fills the current database with a reproducible fleet and its maintenance logs.
+    open_issue_ratio is the share of cars given one open diagnostic issue.
+    service_mix maps service types to relative weights; by default every type
+    in SERVICE_INTERVALS is equally likely.
+    """
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    services = list(service_mix or SERVICE_INTERVALS)
+    weights = [service_mix[service] for service in services] if service_mix else None
+    makes = sorted(MAKES)
+
+    conn = db.get_db_connection()
+    with db.transaction():
+        car_rows = []
+        for i in range(cars):
+            make = rng.choice(makes)
+            car_rows.append(
+                (
+                    make,
+                    rng.choice(MAKES[make]),
+                    rng.randint(2000, today.year),
+                    rng.randint(0, 250000),
+                    f"SYNVIN{i:08d}",
+                    f"SYN-{i:07d}",
+                )
+            )
+        conn.executemany(
+            "INSERT INTO cars (make, model, year, milage, vin, license_plate) VALUES (?, ?, ?, ?, ?, ?)",
+            car_rows,
+        )
+        car_ids = [row[0] for row in conn.execute("SELECT id FROM cars ORDER BY id")]
+
+        log_rows = []
+        for car_id, car_row in zip(car_ids, car_rows):
+            car_milage = car_row[3]
+            for _ in range(logs_per_car):
+                log_rows.append(
+                    (
+                        car_id,
+                        rng.choices(services, weights)[0] if weights else rng.choice(services),
+                        round(rng.uniform(20, 900), 2),
+                        rng.randint(0, car_milage),
+                        (today - datetime.timedelta(days=rng.randint(0, 3000))).isoformat(),
+                    )
+                )
+            if len(log_rows) >= batch_size:
+                _insert_maintenance_logs(conn, log_rows)
+                log_rows = []
+        _insert_maintenance_logs(conn, log_rows)
+
+        # A separate stream, so the ratio does not change the rest of the fleet
+        issue_rng = random.Random(seed + 1)
+        issue_rows = []
+        for car_id in car_ids:
+            if issue_rng.random() < open_issue_ratio:
+                code, description, _ = issue_rng.choice(ISSUES)
+                logged = today - datetime.timedelta(days=issue_rng.randint(0, 365))
+                issue_rows.append((car_id, description, code, logged.isoformat(), "open", None, None))
+        if issue_rows:
+            db.add_logs_bulk("diagnostic_logs", issue_rows)
+    return car_ids
+
+
+def populate_diagnostics(car_ids, logs_per_car=2, seed=42):
+    """Adds reproducible diagnostic logs, half of them resolved, to the given cars."""
+    rng = random.Random(seed)
+    today = datetime.date.today()
+    rows = []
+    for car_id in car_ids:
+        for _ in range(logs_per_car):
+            code, description, resolution = rng.choice(ISSUES)
+            logged = today - datetime.timedelta(days=rng.randint(0, 3000))
+            if rng.random() < 0.5:
+                rows.append((car_id, description, code, logged.isoformat(), "open", None, None))
+            else:
+                resolved = logged + datetime.timedelta(days=rng.randint(0, 30))
+                rows.append((car_id, description, code, logged.isoformat(), "resolved", resolution, resolved.isoformat()))
+    db.add_logs_bulk("diagnostic_logs", rows)
+
+
+def _insert_maintenance_logs(conn, rows):
+    conn.executemany(
+        "INSERT INTO maintenance_logs (car_id, service, cost, milage, date) VALUES (?, ?, ?, ?, ?)",
+        rows,
+    )
@@ -0,0 +1,35 @@
+"""
+gunicorn settings for serving the web app in production.
+
+    gunicorn src.web.wsgi:application
+
+The app is imported once in the master process (preload_app), which also runs
+db.init_db() and any migrations. Every worker is forked from it and opens its
+own database connections. Send HUP to the master to gracefully replace the
+workers; to load new code, send USR2 to start a new master, then TERM the old one.
+"""
+
+import multiprocessing
+import os
+
+import src.database as db
+
+bind = os.environ.get("CAR_TRACKER_BIND", "127.0.0.1:8000")
+workers = int(os.environ.get("CAR_TRACKER_WORKERS", multiprocessing.cpu_count() * 2 + 1))
+wsgi_app = "src.web.wsgi:application"
+preload_app = True
+# Workers that finish their requests within this many seconds are not killed on reload
+graceful_timeout = 30
+accesslog = "-"
+
+
+def pre_fork(server, worker):
+    # A SQLite connection must not be shared with a forked child
+    db.close_db_connection()
+
+
+def post_fork(server, worker):
+    from src.web.app import start_executors
+
+    # Threads do not survive fork, so each worker starts its own pools
+    start_executors()
@@ -1,4 +1,6 @@
+import src.database as db
 from src.web.app import app
 
 if __name__ == "__main__":
+    db.init_db()
     app.run(debug=True, port=8000)
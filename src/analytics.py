@@ -0,0 +1,206 @@
+"""
+Maintenance cost rollups per car, make/model, service type and month.
+
+The rollups are GROUP BY queries over the covering indexes added in migration 4.
+Optionally, summary tables kept current by triggers on maintenance_logs hold
+the per-car, per-service and per-month totals, so reading a rollup no longer
+depends on the number of logs. Service types are grouped case-insensitively.
+
+Usage:
+    python -m src.analytics service
+    python -m src.analytics month --json
+    python -m src.analytics enable-summaries
+"""
+
+import argparse
+import json
+import sys
+
+import src.database as db
+
+GROUPS = ("car", "make_model", "service", "month")
+
+# Summary table -> SQL expression of its key over a maintenance_logs row
+_SUMMARY_TABLES = {
+    "maintenance_cost_by_car": ("car_id", "{row}.car_id"),
+    "maintenance_cost_by_service": ("service", "lower({row}.service)"),
+    "maintenance_cost_by_month": ("month", "substr({row}.date, 1, 7)"),
+}
+
+_PER_CAR = (
+    "SELECT car_id, COUNT(*) AS service_count, SUM(cost) AS total_cost"
+    " FROM maintenance_logs GROUP BY car_id"
+)
+
+# Rollup -> (key columns, query over maintenance_logs, query over the summary tables)
+_ROLLUPS = {
+    "car": (
+        ("car_id",),
+        f"{_PER_CAR} ORDER BY car_id",
+        "SELECT car_id, service_count, total_cost FROM maintenance_cost_by_car ORDER BY car_id",
+    ),
+    "make_model": (
+        ("make", "model"),
+        "SELECT cars.make, cars.model, SUM(per_car.service_count), SUM(per_car.total_cost)"
+        f" FROM ({_PER_CAR}) AS per_car JOIN cars ON cars.id = per_car.car_id"
+        " GROUP BY cars.make, cars.model ORDER BY cars.make, cars.model",
+        "SELECT cars.make, cars.model, SUM(per_car.service_count), SUM(per_car.total_cost)"
+        " FROM maintenance_cost_by_car AS per_car JOIN cars ON cars.id = per_car.car_id"
+        " GROUP BY cars.make, cars.model ORDER BY cars.make, cars.model",
+    ),
+    # Grouping first by the indexed column keeps the scan in index order without
+    # a temporary b-tree; the few partial groups are then merged
+    "service": (
+        ("service",),
+        "SELECT lower(service), SUM(service_count), SUM(total_cost) FROM ("
+        " SELECT service, COUNT(*) AS service_count, SUM(cost) AS total_cost"
+        " FROM maintenance_logs GROUP BY service)"
+        " GROUP BY lower(service) ORDER BY lower(service)",
+        "SELECT service, service_count, total_cost FROM maintenance_cost_by_service ORDER BY service",
+    ),
+    "month": (
+        ("month",),
+        "SELECT substr(date, 1, 7), SUM(service_count), SUM(total_cost) FROM ("
+        " SELECT date, COUNT(*) AS service_count, SUM(cost) AS total_cost"
+        " FROM maintenance_logs GROUP BY date)"
+        " GROUP BY substr(date, 1, 7) ORDER BY substr(date, 1, 7)",
+        "SELECT month, service_count, total_cost FROM maintenance_cost_by_month ORDER BY month",
+    ),
+}
+
+
+def summaries_enabled():
+    """True if the materialized summary tables exist in the current database."""
+    conn = db.get_db_connection()
+    row = conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'maintenance_cost_by_car'"
+    ).fetchone()
+    return row is not None
+
+
+def enable_summaries():
+    """
+    Creates the summary tables and the triggers that update them on every
+    insert, update and delete of a maintenance log, then fills them from the
+    existing logs. Does nothing if they are already enabled.
+    """
+    with db.transaction() as conn:
+        if summaries_enabled():
+            return
+        for table, (key, expression) in _SUMMARY_TABLES.items():
+            new_key, old_key = expression.format(row="NEW"), expression.format(row="OLD")
+            add = f"""
+                INSERT INTO {table} ({key}, service_count, total_cost) VALUES ({new_key}, 1, NEW.cost)
+                ON CONFLICT ({key}) DO UPDATE SET
+                    service_count = service_count + 1, total_cost = total_cost + excluded.total_cost;
+            """
+            remove = f"""
+                UPDATE {table} SET service_count = service_count - 1, total_cost = total_cost - OLD.cost
+                WHERE {key} = {old_key};
+                DELETE FROM {table} WHERE {key} = {old_key} AND service_count = 0;
+            """
+            conn.execute(
+                f"""
+            CREATE TABLE {table} (
+                {key} {'INTEGER' if key == 'car_id' else 'TEXT'} PRIMARY KEY,
+                service_count INTEGER NOT NULL,
+                total_cost REAL NOT NULL
+            )
+            """
+            )
+            conn.execute(f"CREATE TRIGGER trg_{table}_insert AFTER INSERT ON maintenance_logs BEGIN {add} END")
+            conn.execute(f"CREATE TRIGGER trg_{table}_delete AFTER DELETE ON maintenance_logs BEGIN {remove} END")
+            conn.execute(
+                f"CREATE TRIGGER trg_{table}_update AFTER UPDATE OF car_id, service, cost, date"
+                f" ON maintenance_logs BEGIN {remove} {add} END"
+            )
+            conn.execute(
+                f"INSERT INTO {table} ({key}, service_count, total_cost)"
+                f" SELECT {expression.format(row='maintenance_logs')}, COUNT(*), SUM(cost)"
+                f" FROM maintenance_logs GROUP BY 1"
+            )
+
+
+def disable_summaries():
+    """Drops the summary tables and their triggers."""
+    with db.transaction() as conn:
+        for table in _SUMMARY_TABLES:
+            for event in ("insert", "delete", "update"):
+                conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_{event}")
+            conn.execute(f"DROP TABLE IF EXISTS {table}")
+
+
+def cost_rollup(group, use_summaries=None):
+    """
+    Returns the maintenance cost rollup for one of GROUPS as a list of dicts
+    with the group's key columns, service_count, total_cost and average_cost.
+    The summary tables are read when enabled, unless use_summaries is False.
+    """
+    if group not in _ROLLUPS:
+        raise ValueError(f"Unknown rollup '{group}', expected one of {', '.join(GROUPS)}.")
+    if use_summaries is None:
+        use_summaries = summaries_enabled()
+    keys, live_sql, summary_sql = _ROLLUPS[group]
+
+    cursor = db.get_db_connection().cursor()
+    cursor.row_factory = None
+    rollup = []
+    for row in cursor.execute(summary_sql if use_summaries else live_sql):
+        *key_values, service_count, total_cost = row
+        entry = dict(zip(keys, key_values))
+        entry["service_count"] = service_count
+        entry["total_cost"] = round(total_cost, 2)
+        entry["average_cost"] = round(total_cost / service_count, 2)
+        rollup.append(entry)
+    return rollup
+
+
+def cost_by_car(use_summaries=None):
+    return cost_rollup("car", use_summaries)
+
+
+def cost_by_make_model(use_summaries=None):
+    return cost_rollup("make_model", use_summaries)
+
+
+def cost_by_service(use_summaries=None):
+    return cost_rollup("service", use_summaries)
+
+
+def cost_by_month(use_summaries=None):
+    return cost_rollup("month", use_summaries)
+
+
+def _print_table(rollup, keys):
+    headers = [*keys, "service_count", "total_cost", "average_cost"]
+    print("  ".join(f"{header:>14}" for header in headers))
+    for entry in rollup:
+        print("  ".join(f"{entry[header]!s:>14}" for header in headers))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("action", choices=[*GROUPS, "enable-summaries", "disable-summaries"])
+    parser.add_argument("--json", action="store_true", help="print the rollup as JSON")
+    parser.add_argument("--db", help="database file (default: the app database)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.DB_FILE = args.db
+    db.init_db()
+
+    if args.action == "enable-summaries":
+        enable_summaries()
+        print("Summary tables enabled.")
+    elif args.action == "disable-summaries":
+        disable_summaries()
+        print("Summary tables disabled.")
+    elif args.json:
+        print(json.dumps(cost_rollup(args.action), indent=2))
+    else:
+        _print_table(cost_rollup(args.action), _ROLLUPS[args.action][0])
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,265 @@
+"""
+Streaming bulk import of historical maintenance and diagnostic records.
+
+Rows are read one at a time from CSV or JSON Lines, validated, and written with
+executemany in chunks, one transaction per chunk, so files of any size can be
+loaded with flat memory. Each row names its car by "vin" or "license_plate";
+when both are given the VIN is tried first, then the plate.
+Invalid rows are reported with their line number and skipped.
+
+Usage:
+    python -m src.bulk_import maintenance service_history.csv
+    python -m src.bulk_import diagnostic issues.jsonl --chunk-size 20000
+"""
+
+import argparse
+import csv
+import datetime
+import json
+import os
+import sqlite3
+import sys
+
+import src.database as db
+
+# Number of valid rows written per executemany call and transaction
+CHUNK_SIZE = 5000
+
+# Errors kept in a report; anything beyond this is only counted
+MAX_REPORTED_ERRORS = 1000
+
+# Record kind -> log table it is imported into
+_TABLES = {"maintenance": "maintenance_logs", "diagnostic": "diagnostic_logs"}
+
+
+class ImportReport:
+    """Outcome of an import: row counts and the errors of skipped rows."""
+
+    def __init__(self):
+        self.imported = 0
+        self.skipped = 0
+        self.errors = []  # (line number, message), up to MAX_REPORTED_ERRORS
+        self.cars_updated = 0  # Cars whose mileage was raised by the import
+
+    def add_error(self, line, message):
+        self.skipped += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line, message))
+
+    def __str__(self):
+        return (
+            f"Imported {self.imported} rows, skipped {self.skipped}, "
+            f"raised the mileage of {self.cars_updated} cars."
+        )
+
+
+def read_rows(stream, fmt):
+    """
+    Yields (line number, row dict) pairs from a CSV or JSON Lines text stream.
+    A JSON line that cannot be parsed is yielded as (line number, None).
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for row in reader:
+            yield reader.line_num, row
+    elif fmt == "jsonl":
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except ValueError:
+                row = None
+            yield line_number, row if isinstance(row, dict) else None
+    else:
+        raise ValueError(f"Unsupported format '{fmt}', expected 'csv' or 'jsonl'.")
+
+
+def _load_car_map():
+    """Maps every VIN and license plate to its car id, and car ids to mileage."""
+    by_vin, by_plate, milages = {}, {}, {}
+    for car_id, vin, plate, milage in db.load_car_identifiers():
+        by_vin[vin.upper()] = car_id
+        by_plate[plate.upper()] = car_id
+        milages[car_id] = milage
+    return by_vin, by_plate, milages
+
+
+def _text(row, name, required=True):
+    value = row.get(name)
+    if value is None or str(value).strip() == "":
+        if required:
+            raise ValueError(f"missing '{name}'")
+        return None
+    return str(value).strip()
+
+
+def _date(row, name, required=True):
+    value = _text(row, name, required)
+    if value is None:
+        return None
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise ValueError(f"'{name}' must be a YYYY-MM-DD date, got '{value}'") from None
+
+
+def _number(row, name, convert):
+    value = _text(row, name)
+    try:
+        number = convert(value)
+    except ValueError:
+        raise ValueError(f"'{name}' must be a number, got '{value}'") from None
+    if number < 0:
+        raise ValueError(f"'{name}' cannot be negative")
+    return number
+
+
+def _maintenance_params(car_id, row):
+    return (
+        car_id,
+        _text(row, "service"),
+        _number(row, "cost", float),
+        _number(row, "milage", int),
+        _date(row, "date"),
+    )
+
+
+def _diagnostic_params(car_id, row):
+    status = (_text(row, "status", required=False) or "open").lower()
+    if status not in ("open", "resolved"):
+        raise ValueError(f"'status' must be 'open' or 'resolved', got '{status}'")
+    return (
+        car_id,
+        _text(row, "description"),
+        _text(row, "code", required=False),
+        _date(row, "date_logged"),
+        status,
+        _text(row, "resolution", required=False),
+        _date(row, "resolved_date", required=False),
+    )
+
+
+_ROW_PARAMS = {"maintenance": _maintenance_params, "diagnostic": _diagnostic_params}
+
+
+def _write_chunk(kind, chunk, report):
+    """
+    Inserts one chunk of (line number, params) pairs in a single transaction.
+    Returns the params of the rows that were inserted.
+    """
+    table = _TABLES[kind]
+    rows = [params for _, params in chunk]
+    try:
+        report.imported += db.add_logs_bulk(table, rows)
+        return rows
+    except sqlite3.IntegrityError:
+        # Retry row by row so only the offending rows are skipped
+        failed = set()
+
+        def on_error(index, error):
+            failed.add(index)
+            report.add_error(chunk[index][0], str(error))
+
+        report.imported += db.add_logs_bulk(table, rows, on_error=on_error)
+        return [params for index, params in enumerate(rows) if index not in failed]
+
+
+def import_records(kind, rows, chunk_size=CHUNK_SIZE):
+    """
+    Imports maintenance or diagnostic records from an iterable of
+    (line number, row dict) pairs, such as read_rows() yields.
+    Returns an ImportReport. Invalid rows are skipped and reported.
+    """
+    if kind not in _TABLES:
+        raise ValueError(f"Unknown record kind '{kind}', expected 'maintenance' or 'diagnostic'.")
+    row_params = _ROW_PARAMS[kind]
+    by_vin, by_plate, milages = _load_car_map()
+    # Highest inserted service mileage per car, applied once after all chunks
+    high_water = {}
+    report = ImportReport()
+    chunk = []
+
+    def write(chunk):
+        for params in _write_chunk(kind, chunk, report):
+            car_id = params[0]
+            if kind == "maintenance" and params[3] > high_water.get(car_id, milages[car_id]):
+                high_water[car_id] = params[3]
+
+    for line, row in rows:
+        if row is None:
+            report.add_error(line, "not a valid JSON object")
+            continue
+        vin = _text(row, "vin", required=False)
+        plate = _text(row, "license_plate", required=False)
+        car_id = by_vin.get(vin.upper()) if vin else None
+        if car_id is None and plate:
+            # A stale or mistyped VIN does not hide a plate that names the car
+            car_id = by_plate.get(plate.upper())
+        if car_id is None:
+            if vin or plate:
+                names = [f"{name} '{value}'" for name, value in (("VIN", vin), ("license plate", plate)) if value]
+                report.add_error(line, f"no car with {' or '.join(names)}")
+            else:
+                report.add_error(line, "missing 'vin' or 'license_plate'")
+            continue
+        try:
+            params = row_params(car_id, row)
+        except ValueError as e:
+            report.add_error(line, str(e))
+            continue
+
+        chunk.append((line, params))
+        if len(chunk) >= chunk_size:
+            write(chunk)
+            chunk = []
+
+    if chunk:
+        write(chunk)
+
+    if high_water:
+        db.raise_car_mileages(high_water)
+        report.cars_updated = len(high_water)
+    return report
+
+
+def import_file(kind, path, fmt=None, chunk_size=CHUNK_SIZE):
+    """
+    Imports a CSV or JSON Lines file; the format is taken from the extension
+    unless fmt is given. Returns an ImportReport.
+    """
+    if fmt is None:
+        extension = os.path.splitext(path)[1].lower()
+        fmt = "csv" if extension == ".csv" else "jsonl"
+    with open(path, newline="", encoding="utf-8") as stream:
+        return import_records(kind, read_rows(stream, fmt), chunk_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("kind", choices=sorted(_TABLES), help="type of records in the file")
+    parser.add_argument("path", help="CSV or JSON Lines file, or '-' for standard input")
+    parser.add_argument("--format", choices=("csv", "jsonl"), help="input format (default: from the extension)")
+    parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE, help="rows per transaction")
+    parser.add_argument("--db", help="database file (default: the app database)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.DB_FILE = args.db
+    db.init_db()
+
+    if args.path == "-":
+        report = import_records(args.kind, read_rows(sys.stdin, args.format or "jsonl"), args.chunk_size)
+    else:
+        report = import_file(args.kind, args.path, args.format, args.chunk_size)
+
+    for line, message in report.errors:
+        print(f"line {line}: {message}", file=sys.stderr)
+    if report.skipped > len(report.errors):
+        print(f"... and {report.skipped - len(report.errors)} more errors", file=sys.stderr)
+    print(report)
+    return 1 if report.skipped else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import datetime
+from src.records import MaintenanceLog, DiagnosticLog
 
 # Define standard service intervals (miles, days). A value of None means no limit.
 SERVICE_INTERVALS = {
@@ -8,6 +9,23 @@ SERVICE_INTERVALS = {
     "timing belt": (100000, 2555) # ~7 years
 }
 class Car:
+    # Slots keep per-car memory small when the whole fleet is loaded at once
+    __slots__ = (
+        "id",
+        "make",
+        "model",
+        "year",
+        "milage",
+        "vin",
+        "license_plate",
+        "image_before",
+        "image_after",
+        "_maintenance_logs",
+        "_diagnostic_logs",
+        "_log_loader",
+        "_open_issue_count",
+    )
+
     def __init__(self, make, model, year, milage, vin, license_plate, id=None, image_before=None, image_after=None):
         self.make = make
         self.id = id
@@ -18,8 +36,60 @@ class Car:
         self.license_plate = license_plate
         self.image_before = image_before
         self.image_after = image_after
-        self.maintenance_logs = []
-        self.diagnostic_logs = []
+        self._maintenance_logs = []
+        self._diagnostic_logs = []
+        # Set by defer_logs(); the logs are then fetched on first access
+        self._log_loader = None
+        self._open_issue_count = None
+
+    @property
+    def maintenance_logs(self):
+        if self._maintenance_logs is None:
+            self._load_logs()
+        return self._maintenance_logs
+
+    @maintenance_logs.setter
+    def maintenance_logs(self, logs):
+        self._maintenance_logs = logs
+
+    @property
+    def diagnostic_logs(self):
+        if self._diagnostic_logs is None:
+            self._load_logs()
+        return self._diagnostic_logs
+
+    @diagnostic_logs.setter
+    def diagnostic_logs(self, logs):
+        self._diagnostic_logs = logs
+
+    @property
+    def logs_loaded(self):
+        """True once both log lists are in memory."""
+        return self._maintenance_logs is not None and self._diagnostic_logs is not None
+
+    @property
+    def open_issue_count(self):
+        """Number of open diagnostic issues, known even before lazy logs are loaded."""
+        if self._diagnostic_logs is None and self._open_issue_count is not None:
+            return self._open_issue_count
+        return sum(1 for log in self.diagnostic_logs if log['status'] == 'open')
+
+    def defer_logs(self, loader, open_issue_count=None):
+        """
+        Switches the car to lazy loading: loader(car_id) must return the
+        (maintenance_logs, diagnostic_logs) lists and is called on first access.
+        """
+        self._maintenance_logs = None
+        self._diagnostic_logs = None
+        self._log_loader = loader
+        self._open_issue_count = open_issue_count
+
+    def _load_logs(self):
+        maintenance_logs, diagnostic_logs = self._log_loader(self.id)
+        if self._maintenance_logs is None:
+            self._maintenance_logs = maintenance_logs
+        if self._diagnostic_logs is None:
+            self._diagnostic_logs = diagnostic_logs
 
     def log_maintenance(self, service_type, cost,milage=None, date=None):
         if date is None:
@@ -28,12 +98,13 @@ class Car:
         # Determine the mileage for this specific log entry
         log_milage = milage if milage is not None else self.milage
 
-        log = {
-            "service": service_type,
-            "cost": cost,
-            "milage": log_milage,
-            "date": date
-        }
+        log = MaintenanceLog(
+            car_id=self.id,
+            service=service_type,
+            cost=cost,
+            milage=log_milage,
+            date=date,
+        )
 
         self.maintenance_logs.append(log)
 
@@ -47,14 +118,13 @@ class Car:
         if date is None:
             date = datetime.date.today().isoformat()
 
-        log = {
-            "description": description,
-            "code": code, # e.g., P0420
-            "date_logged": date,
-            "status": "open", # Can be 'open' or 'resolved'
-            "resolution": None,
-            "resolved_date": None
-        }
+        log = DiagnosticLog(
+            car_id=self.id,
+            description=description,
+            code=code, # e.g., P0420
+            date_logged=date,
+            status="open", # Can be 'open' or 'resolved'
+        )
         self.diagnostic_logs.append(log)
         return log
 
@@ -128,7 +198,7 @@ class Car:
         return due_services
 
     def __str__(self):
-        open_issues = sum(1 for log in self.diagnostic_logs if log['status'] == 'open')
+        open_issues = self.open_issue_count
         issue_str = f", {open_issues} open issues" if open_issues > 0 else ""
         return f"{self.year} {self.make} {self.model} (Plate: {self.license_plate}, VIN: {self.vin}, Mileage: {self.milage}{issue_str})"
 
@@ -144,8 +214,8 @@ class Car:
             "license_plate": self.license_plate,
             "image_before": self.image_before,
             "image_after": self.image_after,
-            "maintenance_logs": self.maintenance_logs,
-            "diagnostic_logs": self.diagnostic_logs,
+            "maintenance_logs": [dict(log) for log in self.maintenance_logs],
+            "diagnostic_logs": [dict(log) for log in self.diagnostic_logs],
         }
 
     @classmethod
@@ -163,6 +233,6 @@ class Car:
             image_after=data.get("image_after")
         )
         # Logs will be populated by the loader function, so we just initialize here.
-        car.maintenance_logs = data.get("maintenance_logs", []) 
-        car.diagnostic_logs = data.get("diagnostic_logs", []) 
+        car.maintenance_logs = [MaintenanceLog.from_dict(log) for log in data.get("maintenance_logs", [])]
+        car.diagnostic_logs = [DiagnosticLog.from_dict(log) for log in data.get("diagnostic_logs", [])]
         return car
@@ -0,0 +1,139 @@
+import bisect
+import re
+
+_SEPARATORS = re.compile(r"[^0-9A-Z]")
+
+# Above this share of changed cars, rebuild sorts from scratch instead of patching
+_REBUILD_RATIO = 0.1
+
+
+def normalize(identifier):
+    """Upper-cases a VIN or plate and drops spaces, dashes and other separators."""
+    identifier = (identifier or "").upper()
+    if identifier.isalnum() and identifier.isascii():
+        return identifier
+    return _SEPARATORS.sub("", identifier)
+
+
+def _identifiers(car):
+    return (car.vin or "").upper(), (car.license_plate or "").upper()
+
+
+class CarIndex:
+    """
+    In-memory lookup of cars by VIN and license plate.
+
+    Exact lookups are dict hits on the upper-cased identifier. Partial searches
+    use a sorted list of (normalized identifier, car id) pairs, so a prefix is
+    found by bisection and matches are read off in order; "abc 12" matches the
+    plate "ABC-123". add, update and remove keep the index in step with single
+    changes, and rebuild points it at a reloaded car list, re-indexing only the
+    cars whose identifiers differ.
+    """
+
+    def __init__(self, cars=()):
+        self._cars = {}
+        self._keys = {}  # car id -> (vin, plate) as indexed
+        self._by_vin = {}
+        self._by_plate = {}
+        self._prefixes = []
+        self.rebuild(cars)
+
+    def __len__(self):
+        return len(self._cars)
+
+    def _entries(self, car_id):
+        vin, plate = self._keys[car_id]
+        return {(normalize(vin), car_id), (normalize(plate), car_id)}
+
+    def _index(self, car_id, keys):
+        self._keys[car_id] = keys
+        self._by_vin[keys[0]] = car_id
+        self._by_plate[keys[1]] = car_id
+
+    def _unindex(self, car_id):
+        vin, plate = self._keys.pop(car_id)
+        if self._by_vin.get(vin) == car_id:
+            del self._by_vin[vin]
+        if self._by_plate.get(plate) == car_id:
+            del self._by_plate[plate]
+
+    def _insert_entries(self, car_id):
+        for entry in self._entries(car_id):
+            bisect.insort(self._prefixes, entry)
+
+    def _remove_entries(self, car_id):
+        for entry in self._entries(car_id):
+            del self._prefixes[bisect.bisect_left(self._prefixes, entry)]
+
+    def rebuild(self, cars):
+        """Makes the index cover exactly the given cars, e.g. after a reload."""
+        self._cars = {car.id: car for car in cars}
+        keys = {car_id: _identifiers(car) for car_id, car in self._cars.items()}
+        stale = [car_id for car_id, old in self._keys.items() if keys.get(car_id) != old]
+        fresh = [car_id for car_id, new in keys.items() if self._keys.get(car_id) != new]
+
+        if len(stale) + len(fresh) > len(keys) * _REBUILD_RATIO:
+            self._keys, self._by_vin, self._by_plate = {}, {}, {}
+            for car_id, car_keys in keys.items():
+                self._index(car_id, car_keys)
+            self._prefixes = [entry for car_id in keys for entry in self._entries(car_id)]
+            self._prefixes.sort()
+            return
+        for car_id in stale:
+            self._remove_entries(car_id)
+            self._unindex(car_id)
+        for car_id in fresh:
+            self._index(car_id, keys[car_id])
+            self._insert_entries(car_id)
+
+    def add(self, car):
+        """Indexes a newly added car."""
+        self.remove(car)
+        self._cars[car.id] = car
+        self._index(car.id, _identifiers(car))
+        self._insert_entries(car.id)
+
+    def remove(self, car):
+        """Drops a deleted car from the index. Unknown cars are ignored."""
+        if car.id not in self._keys:
+            return
+        self._remove_entries(car.id)
+        self._unindex(car.id)
+        self._cars.pop(car.id, None)
+
+    def update(self, car):
+        """Re-indexes a car whose VIN or license plate may have changed."""
+        self.add(car)
+
+    def find(self, identifier):
+        """Returns the car with this exact VIN or license plate, or None."""
+        identifier = (identifier or "").upper()
+        car_id = self._by_vin.get(identifier, self._by_plate.get(identifier))
+        return self._cars.get(car_id)
+
+    def vin_exists(self, vin, exclude_id=None):
+        car_id = self._by_vin.get((vin or "").upper())
+        return car_id is not None and car_id != exclude_id
+
+    def license_plate_exists(self, plate, exclude_id=None):
+        car_id = self._by_plate.get((plate or "").upper())
+        return car_id is not None and car_id != exclude_id
+
+    def search_prefix(self, prefix, limit=20):
+        """
+        Returns up to limit cars whose normalized VIN or plate starts with the
+        normalized prefix, ordered by the matching identifier.
+        """
+        prefix = normalize(prefix)
+        if not prefix:
+            return []
+        matches = {}
+        i = bisect.bisect_left(self._prefixes, (prefix,))
+        while i < len(self._prefixes) and len(matches) < limit:
+            key, car_id = self._prefixes[i]
+            if not key.startswith(prefix):
+                break
+            matches.setdefault(car_id, self._cars[car_id])
+            i += 1
+        return list(matches.values())
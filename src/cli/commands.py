@@ -0,0 +1,279 @@
+"""
+Non-interactive batch commands for scripts and cron jobs.
+
+Each command runs one operation and prints one JSON document to standard
+output: {"command": ..., "results": [...], "errors": [...]}. Cars are named
+by VIN or license plate, and every command takes any number of them; "-"
+reads them from standard input, one per line. The writes for all targets run
+in one transaction, so if any target is unknown nothing is written. The exit
+status is 1 when there are errors. Commands read only the rows they need and
+never load the whole fleet.
+
+Usage:
+    python -m src.cli.main reminders [--service "oil change"] [CAR ...]
+    python -m src.cli.main add-service VIN1 PLATE2 --service "oil change" --cost 45 --milage 52000
+    python -m src.cli.main log-diagnostic ABC123 --description "Check engine light" --code P0420
+    python -m src.cli.main resolve 12 15 --resolution "Replaced O2 sensor"
+    python -m src.cli.main filter --make toyota --needs-service "tire rotation"
+    python -m src.cli.main export jsonl fleet.jsonl
+"""
+
+import argparse
+import datetime
+import json
+import sys
+
+import src.database as db
+import src.export as export
+from src.car import SERVICE_INTERVALS
+from src.records import DiagnosticLog, MaintenanceLog
+from src.service_due import get_fleet_due_services
+
+# Cars loaded per query by the filter command
+FILTER_PAGE_SIZE = 500
+
+
+def _read_targets(values):
+    """Expands a "-" among the command-line targets into the lines of standard input."""
+    targets = []
+    for value in values:
+        if value == "-":
+            targets.extend(line.strip() for line in sys.stdin if line.strip())
+        else:
+            targets.append(value)
+    return targets
+
+
+def _find_target_cars(values):
+    """
+    Looks up the named cars. Returns (cars, errors): one car row per distinct
+    car, in the order first named, and an error for each unknown name.
+    """
+    targets = _read_targets(values)
+    found = db.find_cars(targets)
+    cars, errors, seen = [], [], set()
+    for target in targets:
+        car = found.get(target.upper())
+        if car is None:
+            errors.append({"target": target, "error": f"no car with VIN or license plate '{target}'"})
+        elif car["id"] not in seen:
+            seen.add(car["id"])
+            cars.append(car)
+    return cars, errors
+
+
+def reminders(args):
+    """Due services of the named cars, or of every car that is due for one."""
+    due_by_car = get_fleet_due_services()
+    if args.service:
+        due_by_car = {car_id: [args.service] for car_id, due in due_by_car.items() if args.service in due}
+    if args.cars:
+        cars, errors = _find_target_cars(args.cars)
+    else:
+        # Only the rows of cars with something due are read
+        cars, errors = db.load_car_rows(car_id for car_id, due in due_by_car.items() if due), []
+    return [{"car": car, "due": due_by_car.get(car["id"], [])} for car in cars], errors
+
+
+def add_service(args):
+    """Adds the same maintenance record to every named car, raising mileages it exceeds."""
+    cars, errors = _find_target_cars(args.cars)
+    if errors:
+        return [], errors
+    results = []
+    mileages = {}
+    with db.transaction():
+        for car in cars:
+            milage = car["milage"] if args.milage is None else args.milage
+            log = MaintenanceLog(car_id=car["id"], service=args.service, cost=args.cost, milage=milage, date=args.date)
+            db.add_maintenance_log(car["id"], log)
+            if milage > car["milage"]:
+                mileages[car["id"]] = milage
+                car["milage"] = milage
+            results.append({"car": car, "log": dict(log)})
+        if mileages:
+            db.raise_car_mileages(mileages)
+    return results, errors
+
+
+def log_diagnostic(args):
+    """Logs the same open diagnostic issue for every named car."""
+    cars, errors = _find_target_cars(args.cars)
+    if errors:
+        return [], errors
+    results = []
+    with db.transaction():
+        for car in cars:
+            log = DiagnosticLog(
+                car_id=car["id"], description=args.description, code=args.code,
+                date_logged=args.date, status="open",
+            )
+            db.add_diagnostic_log(car["id"], log)
+            results.append({"car": car, "log": dict(log)})
+    return results, errors
+
+
+def resolve(args):
+    """Resolves diagnostic logs by id, all with the same resolution."""
+    log_ids, errors = [], []
+    for target in _read_targets(args.log_ids):
+        try:
+            log_ids.append(int(target))
+        except ValueError:
+            errors.append({"target": target, "error": "log ids are whole numbers"})
+    logs = db.load_diagnostic_logs(log_ids)
+    for log_id in log_ids:
+        if log_id not in logs:
+            errors.append({"target": log_id, "error": f"no diagnostic log with id {log_id}"})
+        elif logs[log_id]["status"] != "open":
+            errors.append({"target": log_id, "error": f"diagnostic log {log_id} is already resolved"})
+    if errors:
+        return [], errors
+    results = []
+    with db.transaction():
+        for log in (logs[log_id] for log_id in dict.fromkeys(log_ids)):
+            log["status"] = "resolved"
+            log["resolution"] = args.resolution
+            log["resolved_date"] = args.date
+            db.resolve_diagnostic_log(log)
+            results.append({"log": dict(log)})
+    return results, errors
+
+
+def filter_cars(args):
+    """Cars matching the filters, ordered by make, model and id, read a page at a time."""
+    filters = {
+        name: value
+        for name, value in (
+            ("make", args.make),
+            ("model", args.model),
+            ("min_year", args.min_year),
+            ("max_year", args.max_year),
+            ("max_mileage", args.max_mileage),
+            ("has_open_issues", args.open_issues or None),
+            ("needs_service_type", args.needs_service),
+        )
+        if value is not None
+    }
+    results = []
+    key = None
+    while args.limit is None or len(results) < args.limit:
+        page_size = FILTER_PAGE_SIZE if args.limit is None else min(FILTER_PAGE_SIZE, args.limit - len(results))
+        cars, key, _ = db.load_cars_page(filters, page_size, after=key)
+        results.extend(
+            {
+                "id": car.id, "make": car.make, "model": car.model, "year": car.year, "milage": car.milage,
+                "vin": car.vin, "license_plate": car.license_plate, "open_issue_count": car.open_issue_count,
+            }
+            for car in cars
+        )
+        if key is None:
+            break
+    return results, []
+
+
+def export_data(args):
+    """Exports tables like src.export; with "-" the JSON Lines go to standard output instead of a report."""
+    tables = args.table or db.EXPORT_TABLES
+    if args.format == "csv":
+        return [{"path": path} for path in export.write_csv_dir(args.destination, tables)], []
+    if args.destination == "-":
+        export.write_jsonl(sys.stdout, tables)
+        return None, []
+    with open(args.destination, "w", encoding="utf-8") as stream:
+        export.write_jsonl(stream, tables)
+    return [{"path": args.destination}], []
+
+
+def _date(value):
+    """argparse type for YYYY-MM-DD dates; keeps the ISO text."""
+    try:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a YYYY-MM-DD date")
+
+
+def _positive_int(value):
+    """argparse type for counts that must be at least 1."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a whole number")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="python -m src.cli.main",
+        description=__doc__.strip().splitlines()[0],
+        epilog="Without a command, the interactive menu starts.",
+    )
+    parser.add_argument("--db", help="database file (default: the app database)")
+    commands = parser.add_subparsers(dest="command", required=True, metavar="command")
+    today = datetime.date.today().isoformat()
+    car_help = "VIN or license plate; '-' reads them from standard input"
+
+    command = commands.add_parser("reminders", help="list due services")
+    command.add_argument("cars", nargs="*", metavar="car", help=f"{car_help} (default: every due car)")
+    command.add_argument("--service", choices=sorted(SERVICE_INTERVALS), help="only this service type")
+    command.set_defaults(handler=reminders)
+
+    command = commands.add_parser("add-service", help="add a maintenance record to cars")
+    command.add_argument("cars", nargs="+", metavar="car", help=car_help)
+    command.add_argument("--service", required=True, help="service performed, e.g. 'oil change'")
+    command.add_argument("--cost", type=float, required=True)
+    command.add_argument("--milage", type=int, help="mileage at the service (default: each car's current mileage)")
+    command.add_argument("--date", type=_date, default=today, help="YYYY-MM-DD (default: today)")
+    command.set_defaults(handler=add_service)
+
+    command = commands.add_parser("log-diagnostic", help="log an open diagnostic issue for cars")
+    command.add_argument("cars", nargs="+", metavar="car", help=car_help)
+    command.add_argument("--description", required=True)
+    command.add_argument("--code", help="trouble code, e.g. P0420")
+    command.add_argument("--date", type=_date, default=today, help="YYYY-MM-DD (default: today)")
+    command.set_defaults(handler=log_diagnostic)
+
+    command = commands.add_parser("resolve", help="resolve diagnostic issues")
+    command.add_argument("log_ids", nargs="+", metavar="log_id", help="diagnostic log id; '-' reads them from standard input")
+    command.add_argument("--resolution", required=True)
+    command.add_argument("--date", type=_date, default=today, help="YYYY-MM-DD (default: today)")
+    command.set_defaults(handler=resolve)
+
+    command = commands.add_parser("filter", help="list the cars matching filters")
+    command.add_argument("--make", help="substring of the make, any case")
+    command.add_argument("--model", help="substring of the model, any case")
+    command.add_argument("--min-year", type=int)
+    command.add_argument("--max-year", type=int)
+    command.add_argument("--max-mileage", type=int)
+    command.add_argument("--open-issues", action="store_true", help="only cars with open diagnostic issues")
+    command.add_argument("--needs-service", choices=sorted(SERVICE_INTERVALS), help="only cars due for this service")
+    command.add_argument("--limit", type=_positive_int, help="most cars to list")
+    command.set_defaults(handler=filter_cars)
+
+    command = commands.add_parser("export", help="export tables as JSON Lines or CSV")
+    command.add_argument("format", choices=("jsonl", "csv"))
+    command.add_argument(
+        "destination", help="output file for jsonl ('-' for standard output), or a directory for csv"
+    )
+    command.add_argument("--table", action="append", choices=db.EXPORT_TABLES, help="table to export (default: all)")
+    command.set_defaults(handler=export_data)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.db:
+        db.DB_FILE = args.db
+    db.init_db()
+
+    results, errors = args.handler(args)
+    if results is not None:
+        # One write of the whole document is much faster than json.dump's many small ones
+        sys.stdout.write(json.dumps({"command": args.command, "results": results, "errors": errors}) + "\n")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,5 +1,5 @@
 from src.cli.ui_helpers import select_car, clear_screen
-import database as db
+import src.database as db
 
 
 def log_diagnostic_issue(cars_list):
@@ -23,8 +23,11 @@ def log_diagnostic_issue(cars_list):
 
 
 def manage_car_diagnostics(car):
-    """Displays diagnostic issues for a given car and allows resolving them."""
-    made_change = False
+    """
+    Displays diagnostic issues for a given car and allows resolving them.
+    The issues resolved in one visit are saved together when it ends.
+    """
+    work = db.UnitOfWork()
     while True:
         clear_screen()
         history = car.get_diagnostic_history()
@@ -34,7 +37,7 @@ def manage_car_diagnostics(car):
         print(f"--- Diagnostic History for {car.make} {car.model} ---")
         if not history:
             print("No diagnostic issues found for this car.")
-            return made_change
+            return False
 
         if open_issues:
             print("\n-- Open Issues --")
@@ -70,11 +73,10 @@ def manage_car_diagnostics(car):
             resolved_log = car.resolve_diagnostic(choice_index, resolution)
             if resolved_log:
                 print("Issue marked as resolved.")
-                db.resolve_diagnostic_log(resolved_log)
-                made_change = True
+                work.resolve_diagnostic_log(resolved_log)
         except (ValueError, IndexError):
             print("Invalid input. Please enter a valid issue number.")
-    return made_change
+    return work.commit() > 0
 
 
 def view_and_resolve_diagnostics(cars_list):
@@ -1,5 +1,7 @@
 from src.car import Car
 import datetime
+import sys
+import threading
 
 # Import the new modules
 import src.maintenance as maintenance
@@ -7,12 +9,80 @@ import src.cli.diagnostics as diagnostics
 import src.cli.ui_helpers as ui_helpers
 import src.search_filter as search_filter
 import src.database as db
+from src.car_index import CarIndex
 from src.history_manager import HistoryManager
 
-# Load existing cars from file at startup
-db.init_db()  # Ensure DB and tables exist
-cars = db.load_all_cars()
+# Nothing touches the database at import time. main() checks the schema and
+# starts loading the fleet in the background, so the menu shows at once; the
+# first action that needs the cars waits for the load to finish.
+cars = None  # The loaded fleet; use get_cars()
+car_index = CarIndex()  # VIN/plate lookups without scanning the list
 history = HistoryManager()
+_fleet_load = None  # The background load started by reload_cars(background=True)
+
+# Most partial VIN/plate matches listed by search_for_car
+SEARCH_MATCH_LIMIT = 20
+
+
+class _FleetLoad(threading.Thread):
+    """Loads the fleet on its own connection, which it closes when done."""
+
+    def __init__(self):
+        # A daemon thread, so exiting the menu never waits for a load
+        super().__init__(name="fleet-load", daemon=True)
+        self.cars = None
+        self.error = None
+
+    def run(self):
+        try:
+            self.cars = db.load_all_cars(lazy=True)  # Logs are fetched per car when needed
+            car_index.rebuild(self.cars)
+        except Exception as e:
+            self.error = e
+        finally:
+            db.close_db_connection()
+
+
+def reload_cars(background=False):
+    """
+    Reloads the car list from the DB and rebuilds the lookup index over it.
+    With background=True the load runs on a thread and get_cars() waits for it.
+    """
+    global cars, _fleet_load
+    _wait_for_fleet()
+    if background:
+        _fleet_load = _FleetLoad()
+        _fleet_load.start()
+    else:
+        cars = db.load_all_cars(lazy=True)
+        car_index.rebuild(cars)
+
+
+def _wait_for_fleet():
+    """Finishes a background load, if one is running, and keeps its cars."""
+    global cars, _fleet_load
+    load, _fleet_load = _fleet_load, None
+    if load is None:
+        return
+    load.join()
+    if load.error is not None:
+        raise load.error
+    cars = load.cars
+
+
+def get_cars():
+    """Returns the fleet, loading it or waiting for the background load first."""
+    _wait_for_fleet()
+    if cars is None:
+        reload_cars()
+    return cars
+
+
+def fleet_size():
+    """Number of cars, counted in the database while the fleet is still loading."""
+    if _fleet_load is None and cars is not None:
+        return len(cars)
+    return db.count_cars()
 
 
 def add_car(cars_list):
@@ -28,14 +98,14 @@ def add_car(cars_list):
 
     while True:
         vin = input("Enter the car VIN:").upper()  # Standardize to uppercase
-        if db.check_vin_exists(vin):
+        if car_index.vin_exists(vin):
             print(f"A car with VIN {vin} already exists. Please enter a unique VIN.")
         else:
             break
 
     while True:
         license_plate = input("Enter the license plate: ").upper()
-        if db.check_license_plate_exists(license_plate):
+        if car_index.license_plate_exists(license_plate):
             print(
                 f"A car with license plate {license_plate} already exists. Please enter a unique license plate."
             )
@@ -47,6 +117,7 @@ def add_car(cars_list):
     # add to the list
     cars_list.append(new_car)
     db.add_car(new_car)  # Save to DB and get ID assigned to the object
+    car_index.add(new_car)
     print(f"\nCar '{new_car.make} {new_car.model}' added successfully.")
     return True
 
@@ -57,16 +128,19 @@ def search_for_car(cars_list):
         print("\nNo cars in the system to search.")
         return
 
-    search_term = input("\nEnter VIN or License Plate to search: ").upper()
-    found_car = None
-    for car in cars_list:
-        if car.vin == search_term or car.license_plate == search_term:
-            found_car = car
-            break
-
+    search_term = input("\nEnter VIN or License Plate (or the start of one) to search: ").upper()
+    found_car = car_index.find(search_term)
     if not found_car:
-        print(f"\nNo car found with VIN or License Plate '{search_term}'.")
-        return
+        matches = car_index.search_prefix(search_term, limit=SEARCH_MATCH_LIMIT)
+        if not matches:
+            print(f"\nNo car found with VIN or License Plate '{search_term}'.")
+            return
+        if len(matches) == 1:
+            found_car = matches[0]
+        else:
+            found_car = _choose_match(matches)
+            if not found_car:
+                return
 
     print("\n--- Car Found ---")
     print(found_car)
@@ -92,50 +166,75 @@ def search_for_car(cars_list):
             print("Invalid choice. Please try again.")
 
 
+def _choose_match(matches):
+    """Lets the user pick one of several partial matches. Returns None to cancel."""
+    print(f"\n{len(matches)} cars match (showing at most {SEARCH_MATCH_LIMIT}):")
+    for i, car in enumerate(matches, start=1):
+        print(f"{i}. {car.year} {car.make} {car.model} - VIN {car.vin}, Plate {car.license_plate}")
+    choice = ui_helpers.get_user_input_int(
+        "Select a car (or press Enter to cancel): ", min_val=1, max_val=len(matches), allow_empty=True
+    )
+    return None if choice is None else matches[choice - 1]
+
+
 def edit_car(cars_list):
-    """Selects a car and allows editing its details."""
+    """
+    Selects a car and allows editing its details. The edits are saved
+    together, in one commit, on returning to the main menu.
+    """
     print("\n--- Edit Car Details ---")
     car_to_edit = ui_helpers.select_car(cars_list)
     if not car_to_edit:
         return False
 
-    made_change = False
-    while True:
-        print(f"\nCurrently editing: {car_to_edit}")
-        print("\nWhat would you like to edit?")
-        print("1. Mileage")
-        print("2. License Plate")
-        print("3. Return to main menu")
-
-        choice = input("Enter your choice: ")
-
-        if choice == "1":
-            new_mileage = ui_helpers.get_user_input_int(
-                f"Enter new mileage (current: {car_to_edit.milage}): ",
-                min_val=car_to_edit.milage,
-            )
-            car_to_edit.milage = new_mileage
-            db.update_car_details(car_to_edit)
-            made_change = True
-            print("Mileage updated successfully.")
-        elif choice == "2":
-            while True:
-                new_plate = input("Enter new license plate: ").upper()
-                if db.check_license_plate_exists(new_plate, exclude_id=car_to_edit.id):
-                    print(
-                        f"Error: License plate '{new_plate}' is already in use by another car."
-                    )
-                else:
-                    car_to_edit.license_plate = new_plate
-                    db.update_car_details(car_to_edit)
-                    made_change = True
-                    print("License plate updated successfully.")
-                    break
-        elif choice == "3":
-            break
-        else:
-            print("Invalid choice. Please try again.")
-    return made_change
+    original_milage, original_plate = car_to_edit.milage, car_to_edit.license_plate
+    work = db.UnitOfWork()
+    try:
+        while True:
+            print(f"\nCurrently editing: {car_to_edit}")
+            print("\nWhat would you like to edit?")
+            print("1. Mileage")
+            print("2. License Plate")
+            print("3. Return to main menu")
+
+            choice = input("Enter your choice: ")
+
+            if choice == "1":
+                new_mileage = ui_helpers.get_user_input_int(
+                    f"Enter new mileage (current: {car_to_edit.milage}): ",
+                    min_val=car_to_edit.milage,
+                )
+                car_to_edit.milage = new_mileage
+                work.update_car(car_to_edit)
+            elif choice == "2":
+                while True:
+                    new_plate = input("Enter new license plate: ").upper()
+                    if car_index.license_plate_exists(new_plate, exclude_id=car_to_edit.id):
+                        print(
+                            f"Error: License plate '{new_plate}' is already in use by another car."
+                        )
+                    else:
+                        car_to_edit.license_plate = new_plate
+                        work.update_car(car_to_edit)
+                        break
+            elif choice == "3":
+                break
+            else:
+                print("Invalid choice. Please try again.")
+        saved = work.commit() > 0
+    except BaseException:
+        # Nothing was saved, so the car must not keep the unsaved edits
+        work.discard()
+        car_to_edit.milage, car_to_edit.license_plate = original_milage, original_plate
+        raise
+
+    # Only report and index the edits once they are in the database
+    if car_to_edit.milage != original_milage:
+        print("Mileage updated successfully.")
+    if car_to_edit.license_plate != original_plate:
+        car_index.update(car_to_edit)
+        print("License plate updated successfully.")
+    return saved
 
 
 def delete_car(cars_list):
@@ -154,6 +253,7 @@ def delete_car(cars_list):
     if confirm == "yes":
         cars_list.remove(car_to_delete)
         db.delete_car_by_id(car_to_delete.id)
+        car_index.remove(car_to_delete)
         print("Car has been successfully deleted.")
         return True
     else:
@@ -185,9 +285,17 @@ def display_main_menu():
     print("14. Exit")
 
 
-def main():
-    """Main application loop."""
-    global cars
+def main(argv=None):
+    """
+    Main application loop. With command-line arguments, runs one batch command
+    from src.cli.commands instead and returns its exit status.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+    if argv:
+        # Imported here so the interactive menu does not pay for argparse
+        import src.cli.commands as commands
+
+        return commands.main(argv)
 
     # Define actions that modify the state of the application
     state_modifying_actions = {
@@ -208,37 +316,41 @@ def main():
         "11": search_filter.search_and_filter_cars,
     }
 
+    db.init_db()  # Ensure DB and tables exist
+    reload_cars(background=True)
+
     while True:
         ui_helpers.clear_screen()
-        print(f"--- Car Maintenance Tracker --- ({len(cars)} car(s) loaded)")
+        print(f"--- Car Maintenance Tracker --- ({fleet_size()} car(s))")
         display_main_menu()
         choice = input("Enter your choice: ")
 
         if choice in view_only_actions:
-            view_only_actions[choice](cars)
+            view_only_actions[choice](get_cars())
             ui_helpers.press_enter_to_continue()
         elif choice in state_modifying_actions:
-            history.record_state(cars)
-            changed = state_modifying_actions[choice](cars)
+            cars_list = get_cars()
+            # Record the database changes the action makes so it can be undone
+            history.begin_action()
+            try:
+                changed = state_modifying_actions[choice](cars_list)
+            finally:
+                history.end_action()
 
             if changed:
                 # Reload the car list from the DB to reflect any changes
-                cars = db.load_all_cars()
-            else:
-                history.discard_last_record()
+                reload_cars(background=True)
             ui_helpers.press_enter_to_continue()
         elif choice == "12":  # Undo
-            new_cars_state = history.undo(cars)
-            if new_cars_state is not None:
-                db.reset_database([c.to_dict() for c in new_cars_state])
-                cars = db.load_all_cars()  # Reload from DB to ensure consistency
+            _wait_for_fleet()  # A load still running could miss the undo
+            if history.undo():
+                reload_cars(background=True)  # Reload from DB to ensure consistency
                 print("Undo successful.")
             ui_helpers.press_enter_to_continue()
         elif choice == "13":  # Redo
-            new_cars_state = history.redo(cars)
-            if new_cars_state is not None:
-                db.reset_database([c.to_dict() for c in new_cars_state])
-                cars = db.load_all_cars()  # Reload from DB to ensure consistency
+            _wait_for_fleet()
+            if history.redo():
+                reload_cars(background=True)  # Reload from DB to ensure consistency
                 print("Redo successful.")
             ui_helpers.press_enter_to_continue()
         elif choice == "14":  # Exit
@@ -250,4 +362,4 @@ def main():
 
 
 if __name__ == "__main__":
-    main()
+    sys.exit(main())
@@ -1,6 +1,7 @@
 import datetime
 import os
 import platform
+import sys
 
 def get_user_input_int(prompt, min_val=None, max_val=None, allow_empty=False):
     """Helper function to get a valid integer from the user within an optional range."""
@@ -37,9 +38,14 @@ def select_car(cars_list):
     return cars_list[car_index]
 
 def clear_screen():
-    """Clears the terminal screen."""
-    command = 'cls' if platform.system() == 'Windows' else 'clear'
-    os.system(command)
+    """Clears the terminal screen. Output that is not a terminal is left alone."""
+    if not sys.stdout.isatty():
+        return
+    if platform.system() == 'Windows':
+        os.system('cls')
+    else:
+        # ANSI "cursor home" and "erase display", instead of starting a 'clear' process
+        print("\033[H\033[2J", end="", flush=True)
 
 def press_enter_to_continue():
     """Pauses execution and waits for the user to press Enter."""
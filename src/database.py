@@ -1,6 +1,13 @@
 import sqlite3
 import os
-from src.car import Car
+import json
+import datetime
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from src.car import Car, SERVICE_INTERVALS
+from src.records import MaintenanceLog, DiagnosticLog
 
 DB_FILE = "car_tracker.db"
 # Determine the project root (parent of src)
@@ -10,21 +17,315 @@ DATA_DIR = os.path.join(BASE_DIR, "data")
 if not os.path.exists(DATA_DIR):
     os.makedirs(DATA_DIR)
 
-DB_FILE = os.path.join(DATA_DIR, "car_tracker.db")
+# CAR_TRACKER_DB points every process of a deployment at another database file
+DB_FILE = os.environ.get("CAR_TRACKER_DB", os.path.join(DATA_DIR, "car_tracker.db"))
 
+# Connection tuning, applied once when a thread opens its connection.
+# CACHE_SIZE_KIB is the page cache per connection, MMAP_SIZE is in bytes.
+CACHE_SIZE_KIB = 16384
+MMAP_SIZE = 64 * 1024 * 1024
+# With WAL and synchronous=NORMAL a commit is not synced to disk; only checkpoints are
+JOURNAL_MODE = "WAL"
+SYNCHRONOUS = "NORMAL"
 
-def get_db_connection():
-    """Establishes a connection to the database."""
-    conn = sqlite3.connect(DB_FILE)
+# Class of the connections opened from now on; instrumentation swaps in a
+# sqlite3.Connection subclass (see src/web/metrics.py)
+CONNECTION_FACTORY = sqlite3.Connection
+
+# How car rows and their logs are turned into Car objects:
+# "stitch" reads the three tables separately and joins them in Python,
+# "json" has SQLite nest each car's logs with json_group_array in a single query.
+HYDRATION_MODES = ("stitch", "json")
+HYDRATION_MODE = "stitch"
+
+# Bounds of the load_car_by_id cache: number of cars, and seconds an entry is served.
+# A CAR_CACHE_SIZE of 0 disables the cache.
+CAR_CACHE_SIZE = 256
+CAR_CACHE_TTL = 60
+
+# Each thread keeps one open connection that is reused across calls
+_local = threading.local()
+
+# Callables notified after each write, see add_change_listener()
+_change_listeners = []
+
+# Ranges (start, end] of the change counter written by this process's own
+# commits, oldest first; see _check_external_writes()
+_own_changes = deque(maxlen=256)
+_own_changes_lock = threading.Lock()
+
+
+class _CarCache:
+    """
+    LRU cache of the raw rows behind load_car_by_id, shared by all threads.
+    Entries hold plain tuples so every hit can build a fresh Car.
+    """
+
+    def __init__(self):
+        self._entries = OrderedDict()  # car_id -> (time stored, data)
+        self._lock = threading.Lock()
+        self._db_file = None
+        # Bumped by every invalidation, so a read that raced with a write is not stored
+        self.version = 0
+        self.hits = 0
+        self.misses = 0
+
+    def bind(self, db_file):
+        """Empties the cache if it holds cars of a different database file."""
+        with self._lock:
+            if db_file != self._db_file:
+                self._db_file = db_file
+                self.version += 1
+                self._entries.clear()
+
+    def get(self, car_id):
+        with self._lock:
+            entry = self._entries.get(car_id)
+            if entry is not None:
+                if time.monotonic() - entry[0] < CAR_CACHE_TTL:
+                    self._entries.move_to_end(car_id)
+                    self.hits += 1
+                    return entry[1]
+                del self._entries[car_id]
+            self.misses += 1
+            return None
+
+    def put(self, car_id, data, version):
+        """Stores data read while the cache was at the given version."""
+        with self._lock:
+            if version != self.version or CAR_CACHE_SIZE <= 0:
+                return
+            self._entries[car_id] = (time.monotonic(), data)
+            self._entries.move_to_end(car_id)
+            while len(self._entries) > CAR_CACHE_SIZE:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, car_ids):
+        with self._lock:
+            self.version += 1
+            for car_id in car_ids:
+                self._entries.pop(car_id, None)
+
+    def clear(self):
+        with self._lock:
+            self.version += 1
+            self._entries.clear()
+
+
+_car_cache = _CarCache()
+
+# Stands for every car in a thread's set of cars changed by the open transaction
+_ALL_CARS = object()
+
+
+def car_cache_info():
+    """Returns the hit and miss counters and the current size of the car cache."""
+    return {
+        "hits": _car_cache.hits,
+        "misses": _car_cache.misses,
+        "size": len(_car_cache._entries),
+        "maxsize": CAR_CACHE_SIZE,
+        "ttl": CAR_CACHE_TTL,
+    }
+
+
+def clear_car_cache():
+    """Drops every cached car. The hit and miss counters are kept."""
+    _car_cache.clear()
+
+
+def _invalidate_cars(*car_ids):
+    """
+    Drops the given cars from the cache, now and again when the surrounding
+    transaction ends, so no thread can cache a version older than the commit.
+    Pass _ALL_CARS to drop every car.
+    """
+    if _ALL_CARS in car_ids:
+        _car_cache.clear()
+    else:
+        _car_cache.invalidate(car_ids)
+    _local.dirty_car_ids.update(car_ids)
+    _bump_versions(car_ids)
+
+
+def _bump_versions(car_ids):
+    """
+    Bumps the fleet version and the versions of the given cars, as part of the
+    surrounding transaction. For _ALL_CARS every car falls back to the fleet version.
+    """
+    if not car_ids:
+        return
+    conn = get_db_connection()
+    conn.execute(
+        "UPDATE car_versions SET version = version + 1, modified_at = ? WHERE car_id = 0",
+        (int(time.time()),),
+    )
+    if _ALL_CARS in car_ids:
+        conn.execute("DELETE FROM car_versions WHERE car_id != 0")
+        return
+    conn.executemany(
+        "INSERT INTO car_versions (car_id, version, modified_at)"
+        " SELECT ?, version, modified_at FROM car_versions WHERE car_id = 0"
+        " ON CONFLICT (car_id) DO UPDATE SET version = excluded.version, modified_at = excluded.modified_at",
+        [(car_id,) for car_id in car_ids],
+    )
+
+
+def _change_count(conn):
+    """
+    Returns the change counter: the fleet version, which triggers bump for
+    every row written to the car and log tables by any connection, even one
+    that does not use this module. None before the schema has it.
+    """
+    try:
+        row = conn.execute("SELECT version FROM car_versions WHERE car_id = 0").fetchone()
+    except sqlite3.OperationalError:
+        return None
+    return row[0] if row else None
+
+
+def _check_external_writes(conn):
+    """
+    Empties the car cache if another process may have committed since this
+    thread last looked. PRAGMA data_version cheaply tells whether any other
+    connection committed; if one did, the change counter must have moved only
+    through ranges written by this process's own commits, which have already
+    dropped exactly the cars they changed. Anything else empties the cache.
+    """
+    version = conn.execute("PRAGMA data_version").fetchone()[0]
+    if version == _local.data_version:
+        return
+    count = _change_count(conn)
+    position = _local.change_count
+    if position is not None and count is not None:
+        with _own_changes_lock:
+            ranges = sorted(_own_changes)
+        for start, end in ranges:
+            if start <= position < end:
+                position = end
+    if position is None or count is None or position < count:
+        # A thread looking for the first time cannot know what it missed
+        _car_cache.clear()
+    _local.data_version = version
+    _local.change_count = count
+
+
+def _flush_dirty_cars():
+    dirty, _local.dirty_car_ids = _local.dirty_car_ids, set()
+    if _ALL_CARS in dirty:
+        _car_cache.clear()
+    elif dirty:
+        _car_cache.invalidate(dirty)
+
+
+def _open_connection(db_file):
+    """Opens a new connection and applies the connection-level PRAGMAs."""
+    conn = sqlite3.connect(db_file, factory=CONNECTION_FACTORY)
     conn.row_factory = sqlite3.Row
     # Enable foreign key support, which is crucial for data integrity
     conn.execute("PRAGMA foreign_keys = ON")
+    conn.execute(f"PRAGMA journal_mode = {JOURNAL_MODE}")
+    conn.execute(f"PRAGMA synchronous = {SYNCHRONOUS}")
+    conn.execute(f"PRAGMA cache_size = -{int(CACHE_SIZE_KIB)}")
+    conn.execute(f"PRAGMA mmap_size = {int(MMAP_SIZE)}")
     return conn
 
 
-def init_db():
-    """Initializes the database and creates tables if they don't exist."""
+def get_db_connection():
+    """
+    Returns this thread's connection to the database, opening it on first use.
+    A new connection is opened if DB_FILE has changed since the last call.
+    """
+    conn = getattr(_local, "conn", None)
+    if conn is not None and _local.db_file != DB_FILE:
+        close_db_connection()
+        conn = None
+    if conn is None:
+        conn = _open_connection(DB_FILE)
+        _local.conn = conn
+        _local.db_file = DB_FILE
+        _local.depth = 0
+        _local.pending_changes = []
+        _local.dirty_car_ids = set()
+        _local.data_version = None
+        _local.change_count = None
+        _local.change_start = None
+        _local.schema_checked = False
+        _car_cache.bind(DB_FILE)
+    return conn
+
+
+def close_db_connection():
+    """Closes this thread's connection, if it has one."""
+    conn = getattr(_local, "conn", None)
+    if conn is not None:
+        conn.close()
+        _local.conn = None
+        _local.depth = 0
+        _local.pending_changes = []
+        _local.dirty_car_ids = set()
+
+
+@contextmanager
+def transaction():
+    """
+    Groups several database calls into one commit.
+    Calls made inside the block skip their own commit; the outermost block
+    commits on success and rolls everything back if an exception escapes.
+    Either way, the cars it changed are dropped from the car cache.
+    """
     conn = get_db_connection()
+    if _local.depth == 0:
+        # Take the write lock at once, so every change counted between here and
+        # the commit is this transaction's own, see _check_external_writes()
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        _local.change_start = _change_count(conn)
+    _local.depth += 1
+    try:
+        yield conn
+    except BaseException:
+        _local.depth -= 1
+        if _local.depth == 0:
+            conn.rollback()
+            _local.pending_changes = []
+            _flush_dirty_cars()
+        raise
+    else:
+        _local.depth -= 1
+        if _local.depth == 0:
+            start, end = _local.change_start, _change_count(conn)
+            conn.commit()
+            if start is not None and end is not None and end > start:
+                with _own_changes_lock:
+                    _own_changes.append((start, end))
+            _flush_dirty_cars()
+            changes, _local.pending_changes = _local.pending_changes, []
+            for kind, details in changes:
+                for listener in list(_change_listeners):
+                    listener(kind, details)
+
+
+@contextmanager
+def read_transaction():
+    """
+    Runs several reads against one snapshot of the database, so a commit made
+    by another connection in between cannot pair rows of two different states.
+    Inside a transaction() the reads already share one.
+    """
+    conn = get_db_connection()
+    if _local.depth or conn.in_transaction:
+        yield conn
+        return
+    conn.execute("BEGIN")
+    try:
+        yield conn
+    finally:
+        conn.rollback()  # Nothing was written; ending the read releases the snapshot
+
+
+def _migration_create_tables(conn):
+    """Migration 1: the original cars, maintenance_logs and diagnostic_logs tables."""
     cursor = conn.cursor()
 
     # Car Table
@@ -75,21 +376,241 @@ def init_db():
     )
     """
     )
-    conn.commit()
-    conn.close()
 
 
-def load_all_cars():
-    """Loads all cars and their associated logs from the database."""
+def _migration_add_indexes(conn):
+    """Migration 2: indexes for the per-car log queries and the sorted car list."""
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_maintenance_logs_car_service_date"
+        " ON maintenance_logs (car_id, service, date)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_diagnostic_logs_car_status"
+        " ON diagnostic_logs (car_id, status)"
+    )
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_cars_make_model ON cars (make, model)")
+
+
+def _migration_add_service_last_done(conn):
+    """
+    Migration 3: a table holding the most recent log per (car, service type).
+    Triggers keep it in sync with maintenance_logs, so inserts, deletes, cascades
+    and undo/redo all update it incrementally. Service names are stored lower-cased
+    and ties on the date go to the earliest log, as in Car.needs_maintenance.
+    """
+    conn.execute(
+        """
+    CREATE TABLE IF NOT EXISTS service_last_done (
+        car_id INTEGER NOT NULL,
+        service TEXT NOT NULL,
+        log_id INTEGER NOT NULL,
+        milage INTEGER NOT NULL,
+        date TEXT NOT NULL,
+        PRIMARY KEY (car_id, service)
+    ) WITHOUT ROWID
+    """
+    )
+
+    # Picks the latest remaining log for a (car, service) after a delete or update
+    refill = """
+        INSERT OR IGNORE INTO service_last_done (car_id, service, log_id, milage, date)
+        SELECT car_id, lower(service), id, milage, date FROM maintenance_logs
+        WHERE car_id = {row}.car_id AND lower(service) = lower({row}.service)
+        ORDER BY date DESC, id LIMIT 1;
+    """
+    conn.execute(
+        """
+    CREATE TRIGGER IF NOT EXISTS trg_service_last_done_insert
+    AFTER INSERT ON maintenance_logs
+    BEGIN
+        INSERT INTO service_last_done (car_id, service, log_id, milage, date)
+        VALUES (NEW.car_id, lower(NEW.service), NEW.id, NEW.milage, NEW.date)
+        ON CONFLICT (car_id, service) DO UPDATE SET
+            log_id = excluded.log_id, milage = excluded.milage, date = excluded.date
+        WHERE excluded.date > service_last_done.date
+            OR (excluded.date = service_last_done.date AND excluded.log_id < service_last_done.log_id);
+    END
+    """
+    )
+    conn.execute(
+        f"""
+    CREATE TRIGGER IF NOT EXISTS trg_service_last_done_delete
+    AFTER DELETE ON maintenance_logs
+    BEGIN
+        DELETE FROM service_last_done
+        WHERE car_id = OLD.car_id AND service = lower(OLD.service) AND log_id = OLD.id;
+        {refill.format(row="OLD")}
+    END
+    """
+    )
+    conn.execute(
+        f"""
+    CREATE TRIGGER IF NOT EXISTS trg_service_last_done_update
+    AFTER UPDATE ON maintenance_logs
+    BEGIN
+        DELETE FROM service_last_done
+        WHERE (car_id = OLD.car_id AND service = lower(OLD.service))
+            OR (car_id = NEW.car_id AND service = lower(NEW.service));
+        {refill.format(row="OLD")}
+        {refill.format(row="NEW")}
+    END
+    """
+    )
+
+    # Backfill from the logs that already exist
+    conn.execute("DELETE FROM service_last_done")
+    conn.execute(
+        """
+    INSERT OR IGNORE INTO service_last_done (car_id, service, log_id, milage, date)
+    SELECT car_id, lower(service), id, milage, date FROM maintenance_logs
+    ORDER BY date DESC, id
+    """
+    )
+
+
+def _migration_add_cost_indexes(conn):
+    """
+    Migration 4: covering indexes for the maintenance cost rollups in
+    src/analytics.py, so each GROUP BY walks an index instead of the table.
+    """
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_maintenance_logs_car_cost"
+        " ON maintenance_logs (car_id, cost)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_maintenance_logs_service_cost"
+        " ON maintenance_logs (service, cost)"
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_maintenance_logs_date_cost"
+        " ON maintenance_logs (date, cost)"
+    )
+
+
+# FTS5 table -> (indexed log table, its searchable text columns)
+SEARCH_TABLES = {
+    "diagnostic_search": ("diagnostic_logs", ("description", "code", "resolution")),
+    "maintenance_search": ("maintenance_logs", ("service",)),
+}
+
+
+def _migration_add_search_index(conn):
+    """
+    Migration 5: FTS5 indexes over diagnostic descriptions, codes and resolutions
+    and over maintenance service names, for src/search.py. They are external
+    content tables keyed by the log id, so the text is not stored twice, and
+    triggers keep them in sync with every insert, update and delete.
+    """
+    for fts_table, (table, columns) in SEARCH_TABLES.items():
+        column_list = ", ".join(columns)
+        new_values = ", ".join(f"NEW.{column}" for column in columns)
+        old_values = ", ".join(f"OLD.{column}" for column in columns)
+        add = f"INSERT INTO {fts_table} (rowid, {column_list}) VALUES (NEW.id, {new_values});"
+        remove = (
+            f"INSERT INTO {fts_table} ({fts_table}, rowid, {column_list})"
+            f" VALUES ('delete', OLD.id, {old_values});"
+        )
+        conn.execute(
+            f"CREATE VIRTUAL TABLE IF NOT EXISTS {fts_table} USING fts5("
+            f"{column_list}, content='{table}', content_rowid='id',"
+            " tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+        )
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_insert AFTER INSERT ON {table} BEGIN {add} END")
+        conn.execute(f"CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_delete AFTER DELETE ON {table} BEGIN {remove} END")
+        conn.execute(
+            f"CREATE TRIGGER IF NOT EXISTS trg_{fts_table}_update AFTER UPDATE OF {column_list}"
+            f" ON {table} BEGIN {remove} {add} END"
+        )
+        # Backfill from the logs that already exist
+        conn.execute(f"INSERT INTO {fts_table} ({fts_table}) VALUES ('rebuild')")
+
+
+def _migration_add_car_versions(conn):
+    """
+    Migration 6: a version counter per car, bumped with every change to the car
+    or its logs, for the web app's ETags. The row with car_id 0 is the fleet
+    counter, bumped by every write; a car takes the fleet counter's value when
+    it changes, so its versions never repeat, even across a delete and restore.
+    The fleet counter starts at a random value, so the versions of a recreated
+    database do not repeat those of the old one.
+    """
+    conn.execute(
+        """
+    CREATE TABLE IF NOT EXISTS car_versions (
+        car_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL,
+        modified_at INTEGER NOT NULL
+    )
+    """
+    )
+    conn.execute(
+        "INSERT OR IGNORE INTO car_versions (car_id, version, modified_at)"
+        " VALUES (0, abs(random() % 1000000000), CAST(strftime('%s', 'now') AS INTEGER))"
+    )
+
+
+def _migration_add_change_triggers(conn):
+    """
+    Migration 7: triggers that bump the fleet counter for every row written to
+    the car and log tables, so that writes made without this module, and which
+    do not call _bump_versions, still change it. It then also serves as the
+    change counter behind the car cache's check for external writes.
+    """
+    for table in ("cars", "maintenance_logs", "diagnostic_logs"):
+        for event in ("INSERT", "UPDATE", "DELETE"):
+            conn.execute(
+                f"CREATE TRIGGER IF NOT EXISTS trg_{table}_count_{event.lower()} AFTER {event} ON {table}"
+                " BEGIN UPDATE car_versions SET version = version + 1 WHERE car_id = 0; END"
+            )
+
+
+# Ordered schema migrations. PRAGMA user_version stores how many have been applied,
+# so new steps must only ever be appended to this list.
+MIGRATIONS = [
+    _migration_create_tables,
+    _migration_add_indexes,
+    _migration_add_service_last_done,
+    _migration_add_cost_indexes,
+    _migration_add_search_index,
+    _migration_add_car_versions,
+    _migration_add_change_triggers,
+]
+
+
+def get_schema_version(conn):
+    """Returns the number of migrations applied to the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def init_db():
+    """
+    Creates the database schema, or upgrades an existing database in place.
+    Migrations only ever move a database forward, so once this thread's
+    connection has seen an up-to-date schema, later calls return at once.
+    """
     conn = get_db_connection()
+    if _local.schema_checked:
+        return
+    if get_schema_version(conn) >= len(MIGRATIONS):
+        _local.schema_checked = True
+        return
 
-    # Fetch all data in fewer queries to avoid the N+1 query problem
-    cars_rows = conn.execute("SELECT * FROM cars ORDER BY make, model").fetchall()
-    maint_logs_rows = conn.execute("SELECT * FROM maintenance_logs").fetchall()
-    diag_logs_rows = conn.execute("SELECT * FROM diagnostic_logs").fetchall()
+    with transaction():
+        # DDL does not start a transaction implicitly, so open one explicitly to
+        # apply the pending steps atomically and to serialize concurrent upgrades.
+        if not conn.in_transaction:
+            conn.execute("BEGIN IMMEDIATE")
+        version = get_schema_version(conn)
+        for number, migration in enumerate(MIGRATIONS[version:], start=version + 1):
+            migration(conn)
+            conn.execute(f"PRAGMA user_version = {number}")
+        # A new or upgraded database may reuse the ids of cars cached before
+        _invalidate_cars(_ALL_CARS)
+    _local.schema_checked = True
 
-    conn.close()
 
+def _build_cars(cars_rows, maint_logs_rows, diag_logs_rows):
+    """Creates Car objects from car rows and attaches their log rows."""
     cars_map = {}
     car_objects = []
 
@@ -102,43 +623,497 @@ def load_all_cars():
     # Attach maintenance logs to the correct car object
     for row in maint_logs_rows:
         if row["car_id"] in cars_map:
-            cars_map[row["car_id"]].maintenance_logs.append(dict(row))
+            cars_map[row["car_id"]].maintenance_logs.append(MaintenanceLog.from_row(row))
 
     # Attach diagnostic logs to the correct car object
     for row in diag_logs_rows:
         if row["car_id"] in cars_map:
-            cars_map[row["car_id"]].diagnostic_logs.append(dict(row))
+            cars_map[row["car_id"]].diagnostic_logs.append(DiagnosticLog.from_row(row))
 
     return car_objects
 
 
-def load_car_by_id(car_id):
-    """Loads a single car and its logs from the database by its ID."""
+def _json_fields(alias, fields):
+    return ", ".join(f"'{name}', {alias}.{name}" for name in fields)
+
+
+def _json_logs(table, alias, record):
+    """SQL for a car's logs from table as a JSON array of objects, ordered by id."""
+    return (
+        f"json((SELECT json_group_array(json_object({_json_fields(alias, record.__slots__)}))"
+        f" FROM (SELECT * FROM {table} WHERE car_id = cars.id ORDER BY id) AS {alias}))"
+    )
+
+
+_CAR_COLUMNS = (
+    "id",
+    "make",
+    "model",
+    "year",
+    "milage",
+    "vin",
+    "license_plate",
+    "image_before",
+    "image_after",
+)
+
+# Selects each car as one JSON document with its logs nested, for HYDRATION_MODE "json"
+_CAR_JSON = (
+    f"json_object({_json_fields('cars', _CAR_COLUMNS)},"
+    f" 'maintenance_logs', {_json_logs('maintenance_logs', 'm', MaintenanceLog)},"
+    f" 'diagnostic_logs', {_json_logs('diagnostic_logs', 'd', DiagnosticLog)})"
+)
+
+
+def _use_json_hydration():
+    if HYDRATION_MODE not in HYDRATION_MODES:
+        raise ValueError(f"Unknown HYDRATION_MODE '{HYDRATION_MODE}', expected one of {HYDRATION_MODES}.")
+    return HYDRATION_MODE == "json"
+
+
+def _load_cars_json(where="1", params=()):
+    """Loads the cars matching a WHERE clause, with their logs, in a single query."""
+    cursor = get_db_connection().cursor()
+    cursor.row_factory = None
+    cursor.execute(f"SELECT {_CAR_JSON} FROM cars WHERE {where} ORDER BY make, model, id", params)
+    return [Car.from_dict(json.loads(document)) for document, in cursor]
+
+
+def load_all_cars(lazy=False):
+    """
+    Loads all cars and their associated logs from the database.
+    With lazy=True only the car rows are read; each car fetches its logs the
+    first time they are accessed (see prefetch_logs for batching that).
+    """
     conn = get_db_connection()
-    car_row = conn.execute("SELECT * FROM cars WHERE id = ?", (car_id,)).fetchone()
 
-    if not car_row:
-        conn.close()
-        return None
+    if lazy:
+        cars_rows = conn.execute(
+            f"SELECT cars.*, {_OPEN_ISSUE_COUNT} FROM cars ORDER BY make, model, id"
+        ).fetchall()
+        return _build_lazy_cars(cars_rows)
 
-    car = Car.from_dict(dict(car_row))
+    if _use_json_hydration():
+        return _load_cars_json()
 
+    # Fetch all data in fewer queries to avoid the N+1 query problem
+    cars_rows = conn.execute("SELECT * FROM cars ORDER BY make, model, id").fetchall()
     maint_logs_rows = conn.execute(
-        "SELECT * FROM maintenance_logs WHERE car_id = ?", (car_id,)
+        "SELECT * FROM maintenance_logs ORDER BY id"
     ).fetchall()
-    for row in maint_logs_rows:
-        car.maintenance_logs.append(dict(row))
+    diag_logs_rows = conn.execute("SELECT * FROM diagnostic_logs ORDER BY id").fetchall()
+
+    return _build_cars(cars_rows, maint_logs_rows, diag_logs_rows)
+
+
+# Selected next to lazily loaded car rows so listings can show open issues without the logs
+_OPEN_ISSUE_COUNT = (
+    "(SELECT COUNT(*) FROM diagnostic_logs"
+    " WHERE diagnostic_logs.car_id = cars.id AND diagnostic_logs.status = 'open')"
+    " AS open_issue_count"
+)
+
+
+def _build_lazy_cars(cars_rows):
+    """Creates Car objects whose logs are fetched on first access."""
+    car_objects = []
+    for row in cars_rows:
+        car_data = dict(row)
+        open_issue_count = car_data.pop("open_issue_count")
+        car = Car.from_dict(car_data)
+        car.defer_logs(load_logs_for_car, open_issue_count)
+        car_objects.append(car)
+    return car_objects
 
+
+def load_logs_for_car(car_id):
+    """Returns the (maintenance_logs, diagnostic_logs) of one car as lists of log records."""
+    conn = get_db_connection()
+    maint_logs_rows = conn.execute(
+        "SELECT * FROM maintenance_logs WHERE car_id = ? ORDER BY id", (car_id,)
+    ).fetchall()
     diag_logs_rows = conn.execute(
-        "SELECT * FROM diagnostic_logs WHERE car_id = ?", (car_id,)
+        "SELECT * FROM diagnostic_logs WHERE car_id = ? ORDER BY id", (car_id,)
     ).fetchall()
-    for row in diag_logs_rows:
-        car.diagnostic_logs.append(dict(row))
+    return (
+        [MaintenanceLog.from_row(row) for row in maint_logs_rows],
+        [DiagnosticLog.from_row(row) for row in diag_logs_rows],
+    )
+
+
+# Upper bound on the ids bound into one IN (...) list, below SQLite's variable limit
+PREFETCH_BATCH_SIZE = 500
+
+
+def prefetch_logs(cars):
+    """
+    Loads the logs of every lazily loaded car in the list with a few batched
+    queries, instead of one pair of queries per car on first access.
+    """
+    pending = {car.id: car for car in cars if not car.logs_loaded}
+    car_ids = list(pending)
+    conn = get_db_connection()
+
+    for start in range(0, len(car_ids), PREFETCH_BATCH_SIZE):
+        batch = car_ids[start : start + PREFETCH_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        logs = {car_id: ([], []) for car_id in batch}
+        for row in conn.execute(
+            f"SELECT * FROM maintenance_logs WHERE car_id IN ({placeholders}) ORDER BY car_id, id",
+            batch,
+        ):
+            logs[row["car_id"]][0].append(MaintenanceLog.from_row(row))
+        for row in conn.execute(
+            f"SELECT * FROM diagnostic_logs WHERE car_id IN ({placeholders}) ORDER BY car_id, id",
+            batch,
+        ):
+            logs[row["car_id"]][1].append(DiagnosticLog.from_row(row))
+
+        for car_id, (maintenance_logs, diagnostic_logs) in logs.items():
+            car = pending[car_id]
+            car.maintenance_logs = maintenance_logs
+            car.diagnostic_logs = diagnostic_logs
+
+
+def _build_filter_query(filters, today=None):
+    """
+    Translates a filter dictionary into a SQL WHERE clause and its parameters.
+    The semantics mirror search_filter._apply_filters, which stays the reference
+    implementation. Note that SQLite's lower() only folds ASCII characters.
+    """
+    clauses = []
+    params = []
+
+    if "make" in filters:
+        clauses.append("instr(lower(cars.make), ?) > 0")
+        params.append(filters["make"].lower())
+    if "model" in filters:
+        clauses.append("instr(lower(cars.model), ?) > 0")
+        params.append(filters["model"].lower())
+    if "min_year" in filters:
+        clauses.append("cars.year >= ?")
+        params.append(filters["min_year"])
+    if "max_year" in filters:
+        clauses.append("cars.year <= ?")
+        params.append(filters["max_year"])
+    if "max_mileage" in filters:
+        clauses.append("cars.milage <= ?")
+        params.append(filters["max_mileage"])
+    if filters.get("has_open_issues"):
+        clauses.append(
+            "EXISTS (SELECT 1 FROM diagnostic_logs"
+            " WHERE diagnostic_logs.car_id = cars.id AND diagnostic_logs.status = 'open')"
+        )
+    if "needs_service_type" in filters:
+        service_type = filters["needs_service_type"]
+        if service_type not in SERVICE_INTERVALS:
+            # needs_maintenance() reports unknown services as never due
+            clauses.append("0")
+        else:
+            mile_interval, day_interval = SERVICE_INTERVALS[service_type]
+            # A car needs the service unless its last one is still within every interval
+            recent = [
+                "service_last_done.car_id = cars.id",
+                "service_last_done.service = ?",
+            ]
+            params.append(service_type.lower())
+            if mile_interval is not None:
+                recent.append("cars.milage - service_last_done.milage < ?")
+                params.append(mile_interval)
+            if day_interval is not None:
+                recent.append("julianday(?) - julianday(service_last_done.date) < ?")
+                today = today or datetime.date.today()
+                params.extend([today.isoformat(), day_interval])
+            clauses.append(
+                "NOT EXISTS (SELECT 1 FROM service_last_done WHERE "
+                + " AND ".join(recent)
+                + ")"
+            )
+
+    where = " AND ".join(clauses) if clauses else "1"
+    return where, params
+
 
-    conn.close()
+def load_filtered_cars(filters):
+    """
+    Loads only the cars matching a filter dictionary, with their logs.
+    The filtering happens in a single parameterized query instead of in Python.
+    """
+    where, params = _build_filter_query(filters)
+    if _use_json_hydration():
+        return _load_cars_json(where, params)
+    conn = get_db_connection()
+
+    cars_rows = conn.execute(
+        f"SELECT * FROM cars WHERE {where} ORDER BY make, model, id", params
+    ).fetchall()
+    # Only fetch the logs belonging to the matching cars
+    matching_ids = f"SELECT cars.id FROM cars WHERE {where}"
+    maint_logs_rows = conn.execute(
+        f"SELECT * FROM maintenance_logs WHERE car_id IN ({matching_ids}) ORDER BY car_id, id",
+        params,
+    ).fetchall()
+    diag_logs_rows = conn.execute(
+        f"SELECT * FROM diagnostic_logs WHERE car_id IN ({matching_ids}) ORDER BY car_id, id",
+        params,
+    ).fetchall()
+
+    return _build_cars(cars_rows, maint_logs_rows, diag_logs_rows)
+
+
+def load_cars_page(filters, limit, after=None, before=None):
+    """
+    Loads one page of the cars matching a filter dictionary, ordered by
+    (make, model, id), using keyset pagination: after/before are the
+    (make, model, id) of the car the page starts after or ends before.
+    Returns (cars, next_key, prev_key); a key is None if there is no such page.
+    The cars' logs are loaded lazily.
+    """
+    where, params = _build_filter_query(filters)
+    params = list(params)
+    if after is not None:
+        where += " AND (make, model, id) > (?, ?, ?)"
+        params.extend(after)
+        order = "make, model, id"
+    elif before is not None:
+        where += " AND (make, model, id) < (?, ?, ?)"
+        params.extend(before)
+        order = "make DESC, model DESC, id DESC"
+    else:
+        order = "make, model, id"
+
+    conn = get_db_connection()
+    # Read one extra row to find out whether another page follows
+    cars_rows = conn.execute(
+        f"SELECT cars.*, {_OPEN_ISSUE_COUNT} FROM cars WHERE {where} ORDER BY {order} LIMIT ?",
+        params + [limit + 1],
+    ).fetchall()
+    has_more = len(cars_rows) > limit
+    cars_rows = cars_rows[:limit]
+    if before is not None:
+        cars_rows.reverse()
+    # Listing a page only needs the car rows; logs load lazily if a caller wants them
+    cars = _build_lazy_cars(cars_rows)
+
+    first_key = (cars[0].make, cars[0].model, cars[0].id) if cars else None
+    last_key = (cars[-1].make, cars[-1].model, cars[-1].id) if cars else None
+    if before is not None:
+        next_key = last_key
+        prev_key = first_key if has_more else None
+    else:
+        next_key = last_key if has_more else None
+        prev_key = first_key if after is not None else None
+    return cars, next_key, prev_key
+
+
+def count_cars():
+    """Returns the number of cars, without loading them."""
+    conn = get_db_connection()
+    return conn.execute("SELECT COUNT(*) FROM cars").fetchone()[0]
+
+
+def load_car_mileages():
+    """Returns (car_id, milage) tuples for the whole fleet, ordered by id."""
+    cursor = get_db_connection().cursor()
+    cursor.row_factory = None  # Plain tuples are cheaper for fleet-wide reads
+    return cursor.execute("SELECT id, milage FROM cars ORDER BY id").fetchall()
+
+
+def load_car_identifiers():
+    """Returns (car_id, vin, license_plate, milage) tuples for the whole fleet."""
+    cursor = get_db_connection().cursor()
+    cursor.row_factory = None
+    return cursor.execute("SELECT id, vin, license_plate, milage FROM cars").fetchall()
+
+
+# Columns of a car row, without its logs, as returned by find_cars and load_car_rows
+_CAR_ROW_COLUMNS = "id, make, model, year, milage, vin, license_plate"
+
+
+def find_cars(keys):
+    """
+    Looks up cars by VIN or license plate without loading their logs.
+    Returns {key: car row as a dict} for each key (upper-cased) that matches;
+    a key that is one car's VIN and another's plate finds the VIN's car.
+    """
+    keys = list(dict.fromkeys(key.upper() for key in keys))
+    conn = get_db_connection()
+    found = {}
+    # Each key is bound twice, once per IN list
+    batch_size = max(1, PREFETCH_BATCH_SIZE // 2)
+    for start in range(0, len(keys), batch_size):
+        batch = keys[start : start + batch_size]
+        placeholders = ", ".join("?" * len(batch))
+        wanted = set(batch)
+        for row in conn.execute(
+            f"SELECT {_CAR_ROW_COLUMNS} FROM cars WHERE vin IN ({placeholders}) OR license_plate IN ({placeholders})",
+            batch + batch,
+        ):
+            car = dict(row)
+            if car["license_plate"] in wanted:
+                found.setdefault(car["license_plate"], car)
+            if car["vin"] in wanted:
+                found[car["vin"]] = car
+    return found
+
+
+def load_car_rows(car_ids):
+    """Returns the rows of the given cars as dicts, without their logs, ordered by id."""
+    car_ids = list(car_ids)
+    conn = get_db_connection()
+    rows = []
+    for start in range(0, len(car_ids), PREFETCH_BATCH_SIZE):
+        batch = car_ids[start : start + PREFETCH_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        rows.extend(
+            dict(row)
+            for row in conn.execute(f"SELECT {_CAR_ROW_COLUMNS} FROM cars WHERE id IN ({placeholders})", batch)
+        )
+    rows.sort(key=lambda row: row["id"])
+    return rows
+
+
+def load_diagnostic_logs(log_ids):
+    """Returns {log id: DiagnosticLog} for the given diagnostic log ids that exist."""
+    log_ids = list(log_ids)
+    conn = get_db_connection()
+    logs = {}
+    for start in range(0, len(log_ids), PREFETCH_BATCH_SIZE):
+        batch = log_ids[start : start + PREFETCH_BATCH_SIZE]
+        placeholders = ", ".join("?" * len(batch))
+        for row in conn.execute(f"SELECT * FROM diagnostic_logs WHERE id IN ({placeholders})", batch):
+            logs[row["id"]] = DiagnosticLog.from_row(row)
+    return logs
+
+
+def load_last_services():
+    """
+    Returns (car_id, service, milage, day) tuples from the service index, one per
+    (car, service type) that has been performed. day is the date of that service
+    as a proleptic Gregorian ordinal, as returned by datetime.date.toordinal().
+    """
+    cursor = get_db_connection().cursor()
+    cursor.row_factory = None
+    return cursor.execute(
+        """SELECT car_id, service, milage, CAST(julianday(date) - 1721424.5 AS INTEGER)
+           FROM service_last_done"""
+    ).fetchall()
+
+
+# Tables that can be streamed out with iter_table_rows, in dependency order
+EXPORT_TABLES = ("cars", "maintenance_logs", "diagnostic_logs")
+
+# Rows fetched per fetchmany call when streaming a table
+FETCH_BATCH_SIZE = 1000
+
+
+def table_columns(table):
+    """Returns the column names of one of the EXPORT_TABLES, in table order."""
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table '{table}'.")
+    return [row["name"] for row in get_db_connection().execute(f"PRAGMA table_info({table})")]
+
+
+def iter_table_rows(table, batch_size=FETCH_BATCH_SIZE):
+    """
+    Yields the rows of one of the EXPORT_TABLES as lists of up to batch_size
+    tuples, ordered by id. Only one batch is held in memory at a time.
+    """
+    if table not in EXPORT_TABLES:
+        raise ValueError(f"Unknown table '{table}'.")
+    cursor = get_db_connection().cursor()
+    cursor.row_factory = None
+    try:
+        cursor.execute(f"SELECT * FROM {table} ORDER BY id")
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield batch
+    finally:
+        cursor.close()
+
+
+def load_car_by_id(car_id):
+    """
+    Loads a single car and its logs from the database by its ID.
+    Recently loaded cars are served from the car cache; each call still
+    returns a new Car that the caller is free to modify.
+    """
+    conn = get_db_connection()
+    # Inside a transaction the car may have uncommitted changes, so bypass the cache
+    use_cache = _local.depth == 0
+    if use_cache:
+        _check_external_writes(conn)
+        data = _car_cache.get(car_id)
+        if data is not None:
+            return _hydrate_car(data)
+        version = _car_cache.version
+
+    if _use_json_hydration():
+        row = conn.execute(f"SELECT {_CAR_JSON} FROM cars WHERE id = ?", (car_id,)).fetchone()
+        if not row:
+            return None
+        data = row[0]
+    else:
+        car_row = conn.execute("SELECT * FROM cars WHERE id = ?", (car_id,)).fetchone()
+
+        if not car_row:
+            return None
+
+        cursor = conn.cursor()
+        cursor.row_factory = None
+        data = (
+            dict(car_row),
+            cursor.execute(
+                "SELECT * FROM maintenance_logs WHERE car_id = ? ORDER BY id", (car_id,)
+            ).fetchall(),
+            cursor.execute(
+                "SELECT * FROM diagnostic_logs WHERE car_id = ? ORDER BY id", (car_id,)
+            ).fetchall(),
+        )
+    if use_cache:
+        _car_cache.put(car_id, data, version)
+    return _hydrate_car(data)
+
+
+def _hydrate_car(data):
+    """
+    Builds a Car from what the cache holds: a JSON document in "json" mode,
+    otherwise a (car dict, maintenance tuples, diagnostic tuples) triple.
+    """
+    if isinstance(data, str):
+        return Car.from_dict(json.loads(data))
+    car_data, maint_logs_rows, diag_logs_rows = data
+    car = Car.from_dict(car_data)
+    car.maintenance_logs = [MaintenanceLog(*row) for row in maint_logs_rows]
+    car.diagnostic_logs = [DiagnosticLog(*row) for row in diag_logs_rows]
     return car
 
 
+def get_fleet_version():
+    """
+    Returns (version, modified_at) of the fleet as a whole. The version changes
+    with every write; modified_at is the Unix time of the latest one.
+    """
+    conn = get_db_connection()
+    return tuple(conn.execute("SELECT version, modified_at FROM car_versions WHERE car_id = 0").fetchone())
+
+
+def get_car_version(car_id):
+    """
+    Returns (version, modified_at) of one car and its logs. A car with no
+    version of its own has not changed since the fleet version was last reset,
+    so it takes the fleet's.
+    """
+    conn = get_db_connection()
+    row = conn.execute(
+        "SELECT version, modified_at FROM car_versions WHERE car_id IN (?, 0) ORDER BY car_id DESC LIMIT 1",
+        (car_id,),
+    ).fetchone()
+    return tuple(row)
+
+
 def check_vin_exists(vin, exclude_id=None):
     """Checks if a VIN exists in the database, optionally excluding a car ID."""
     conn = get_db_connection()
@@ -148,7 +1123,6 @@ def check_vin_exists(vin, exclude_id=None):
         query += " AND id != ?"
         params.append(exclude_id)
     result = conn.execute(query, params).fetchone()
-    conn.close()
     return result is not None
 
 
@@ -161,103 +1135,103 @@ def check_license_plate_exists(plate, exclude_id=None):
         query += " AND id != ?"
         params.append(exclude_id)
     result = conn.execute(query, params).fetchone()
-    conn.close()
     return result is not None
 
 
-def add_car(car):
-    """Adds a car to the database and updates the car object with its new ID."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO cars (make, model, year, milage, vin, license_plate, image_before, image_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
-        (
-            car.make,
-            car.model,
-            car.year,
-            car.milage,
-            car.vin,
-            car.license_plate,
-            car.image_before,
-            car.image_after,
-        ),
-    )
-    car.id = cursor.lastrowid
-    conn.commit()
-    conn.close()
+def add_change_listener(listener):
+    """
+    Registers a callable that is notified after each write as listener(kind, details).
+    details holds the affected rows as plain dicts, before and/or after the change.
+    """
+    _change_listeners.append(listener)
 
 
-def update_car_details(car):
-    """Updates a car's editable details (mileage, license plate) in the database."""
-    conn = get_db_connection()
-    conn.execute(
-        "UPDATE cars SET milage = ?, license_plate = ?, image_before = ?, image_after = ? WHERE id = ?",
-        (car.milage, car.license_plate, car.image_before, car.image_after, car.id),
-    )
-    conn.commit()
-    conn.close()
+def remove_change_listener(listener):
+    """Unregisters a listener added with add_change_listener."""
+    if listener in _change_listeners:
+        _change_listeners.remove(listener)
 
 
-def delete_car_by_id(car_id):
-    """Deletes a car and its associated logs from the database by its ID."""
-    conn = get_db_connection()
-    conn.execute("DELETE FROM cars WHERE id = ?", (car_id,))
-    conn.commit()
-    conn.close()
+def _notify_change(kind, **details):
+    """Queues a change notification; listeners only hear about committed changes."""
+    _local.pending_changes.append((kind, details))
 
 
-def add_maintenance_log(car_id, log):
-    """Adds a maintenance log to the database."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO maintenance_logs (car_id, service, cost, milage, date) VALUES (?, ?, ?, ?, ?)",
-        (car_id, log["service"], log["cost"], log["milage"], log["date"]),
-    )
-    log["id"] = cursor.lastrowid  # Add the ID to the dictionary
-    conn.commit()
-    conn.close()
+def _fetch_row(conn, table, row_id):
+    """Returns a row as a dict, or None. Only used to describe changes to listeners."""
+    row = conn.execute(f"SELECT * FROM {table} WHERE id = ?", (row_id,)).fetchone()
+    return dict(row) if row else None
 
 
-def add_diagnostic_log(car_id, log):
-    """Adds a diagnostic log to the database."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
-    cursor.execute(
-        "INSERT INTO diagnostic_logs (car_id, description, code, date_logged, status) VALUES (?, ?, ?, ?, ?)",
-        (car_id, log["description"], log["code"], log["date_logged"], log["status"]),
-    )
-    log["id"] = cursor.lastrowid  # Add the ID to the dictionary
-    conn.commit()
-    conn.close()
+def _log_car_ids(conn, table, log_id):
+    """Returns the id of the car a log row belongs to, as a tuple (empty if there is no such log)."""
+    row = conn.execute(f"SELECT car_id FROM {table} WHERE id = ?", (log_id,)).fetchone()
+    return (row["car_id"],) if row else ()
 
 
-def resolve_diagnostic_log(log):
-    """Updates a diagnostic log to 'resolved' in the database."""
-    conn = get_db_connection()
-    conn.execute(
-        """UPDATE diagnostic_logs 
-           SET status = ?, resolution = ?, resolved_date = ?
-           WHERE id = ?""",
-        (log["status"], log["resolution"], log["resolved_date"], log["id"]),
-    )
-    conn.commit()
-    conn.close()
+def add_car(car):
+    """Adds a car to the database and updates the car object with its new ID."""
+    with transaction() as conn:
+        cursor = conn.execute(
+            "INSERT INTO cars (make, model, year, milage, vin, license_plate, image_before, image_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                car.make,
+                car.model,
+                car.year,
+                car.milage,
+                car.vin,
+                car.license_plate,
+                car.image_before,
+                car.image_after,
+            ),
+        )
+        car.id = cursor.lastrowid
+        _invalidate_cars(car.id)
+        if _change_listeners:
+            _notify_change("car_added", car=_fetch_row(conn, "cars", car.id))
 
 
-def reset_database(snapshot):
-    """Wipes the database and repopulates it from a snapshot. Used for Undo/Redo."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
+def update_car_details(car):
+    """Updates a car's editable details (mileage, license plate) in the database."""
+    with transaction() as conn:
+        before = _fetch_row(conn, "cars", car.id) if _change_listeners else None
+        conn.execute(
+            "UPDATE cars SET milage = ?, license_plate = ?, image_before = ?, image_after = ? WHERE id = ?",
+            (car.milage, car.license_plate, car.image_before, car.image_after, car.id),
+        )
+        _invalidate_cars(car.id)
+        if before:
+            _notify_change(
+                "car_updated", before=before, after=_fetch_row(conn, "cars", car.id)
+            )
+
+
+def delete_car_by_id(car_id):
+    """Deletes a car and its associated logs from the database by its ID."""
+    with transaction() as conn:
+        if _change_listeners:
+            car_row = _fetch_row(conn, "cars", car_id)
+            maint_logs_rows = conn.execute(
+                "SELECT * FROM maintenance_logs WHERE car_id = ? ORDER BY id", (car_id,)
+            ).fetchall()
+            diag_logs_rows = conn.execute(
+                "SELECT * FROM diagnostic_logs WHERE car_id = ? ORDER BY id", (car_id,)
+            ).fetchall()
+        conn.execute("DELETE FROM cars WHERE id = ?", (car_id,))
+        _invalidate_cars(car_id)
+        if _change_listeners and car_row:
+            _notify_change(
+                "car_deleted",
+                car=car_row,
+                maintenance_logs=[dict(row) for row in maint_logs_rows],
+                diagnostic_logs=[dict(row) for row in diag_logs_rows],
+            )
 
-    # Clear existing data in the correct order to respect foreign keys
-    cursor.execute("DELETE FROM maintenance_logs")
-    cursor.execute("DELETE FROM diagnostic_logs")
-    cursor.execute("DELETE FROM cars")
 
-    # Re-populate all tables from the snapshot
-    for car_data in snapshot:
-        cursor.execute(
+def restore_car(car_data, maintenance_logs=(), diagnostic_logs=()):
+    """Re-inserts a car and its logs with their original IDs. Used for Undo/Redo."""
+    with transaction() as conn:
+        conn.execute(
             "INSERT INTO cars (id, make, model, year, milage, vin, license_plate, image_before, image_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
             (
                 car_data["id"],
@@ -271,27 +1245,305 @@ def reset_database(snapshot):
                 car_data.get("image_after"),
             ),
         )
-        car_id = car_data["id"]
+        _invalidate_cars(car_data["id"])
+        if _change_listeners:
+            _notify_change("car_added", car=_fetch_row(conn, "cars", car_data["id"]))
+        for log in maintenance_logs:
+            restore_maintenance_log(log)
+        for log in diagnostic_logs:
+            restore_diagnostic_log(log)
 
-        for log in car_data.get("maintenance_logs", []):
-            cursor.execute(
-                "INSERT INTO maintenance_logs (car_id, service, cost, milage, date) VALUES (?, ?, ?, ?, ?)",
-                (car_id, log["service"], log["cost"], log["milage"], log["date"]),
+
+def add_maintenance_log(car_id, log):
+    """Adds a maintenance log to the database."""
+    with transaction() as conn:
+        cursor = conn.execute(
+            "INSERT INTO maintenance_logs (car_id, service, cost, milage, date) VALUES (?, ?, ?, ?, ?)",
+            (car_id, log["service"], log["cost"], log["milage"], log["date"]),
+        )
+        log["id"] = cursor.lastrowid  # Add the ID to the dictionary
+        _invalidate_cars(car_id)
+        if _change_listeners:
+            _notify_change(
+                "maintenance_log_added",
+                log=_fetch_row(conn, "maintenance_logs", log["id"]),
+            )
+
+
+# Columns a bulk insert supplies for each log table, in parameter order
+_BULK_COLUMNS = {
+    "maintenance_logs": ("car_id", "service", "cost", "milage", "date"),
+    "diagnostic_logs": (
+        "car_id",
+        "description",
+        "code",
+        "date_logged",
+        "status",
+        "resolution",
+        "resolved_date",
+    ),
+}
+
+
+def add_logs_bulk(table, rows, on_error=None):
+    """
+    Inserts many log rows into maintenance_logs or diagnostic_logs in one
+    transaction. rows are tuples in _BULK_COLUMNS[table] order.
+    By default one executemany is used and a failing row rolls back all of them.
+    With on_error, rows are inserted one by one and a failing row is skipped
+    after calling on_error(index, error). Returns the number of rows inserted.
+    Listeners get one "logs_imported" change with the affected car ids instead
+    of a change per row; bulk inserts are not undoable.
+    """
+    columns = _BULK_COLUMNS[table]
+    sql = f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})"
+    with transaction() as conn:
+        if on_error is None:
+            conn.executemany(sql, rows)
+            inserted = len(rows)
+        else:
+            inserted = 0
+            for index, row in enumerate(rows):
+                try:
+                    conn.execute(sql, row)
+                    inserted += 1
+                except sqlite3.IntegrityError as e:
+                    on_error(index, e)
+        _invalidate_cars(*{row[0] for row in rows})
+        if _change_listeners and inserted:
+            _notify_change(
+                "logs_imported", table=table, car_ids=sorted({row[0] for row in rows})
+            )
+    return inserted
+
+
+def raise_car_mileages(mileages):
+    """
+    Sets each car's milage to the given value where that is higher, in one pass.
+    mileages maps car_id to mileage.
+    """
+    with transaction() as conn:
+        conn.executemany(
+            "UPDATE cars SET milage = ? WHERE id = ? AND milage < ?",
+            [(milage, car_id, milage) for car_id, milage in mileages.items()],
+        )
+        _invalidate_cars(*mileages)
+        if _change_listeners and mileages:
+            _notify_change("logs_imported", table="cars", car_ids=sorted(mileages))
+
+
+def restore_maintenance_log(log):
+    """Re-inserts a maintenance log row with its original ID. Used for Undo/Redo."""
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO maintenance_logs (id, car_id, service, cost, milage, date) VALUES (?, ?, ?, ?, ?, ?)",
+            (log["id"], log["car_id"], log["service"], log["cost"], log["milage"], log["date"]),
+        )
+        _invalidate_cars(log["car_id"])
+        if _change_listeners:
+            _notify_change("maintenance_log_added", log=dict(log))
+
+
+def delete_maintenance_log(log_id):
+    """Deletes a single maintenance log by its ID."""
+    with transaction() as conn:
+        before = _fetch_row(conn, "maintenance_logs", log_id) if _change_listeners else None
+        _invalidate_cars(*_log_car_ids(conn, "maintenance_logs", log_id))
+        conn.execute("DELETE FROM maintenance_logs WHERE id = ?", (log_id,))
+        if before:
+            _notify_change("maintenance_log_deleted", log=before)
+
+
+def add_diagnostic_log(car_id, log):
+    """Adds a diagnostic log to the database."""
+    with transaction() as conn:
+        cursor = conn.execute(
+            "INSERT INTO diagnostic_logs (car_id, description, code, date_logged, status) VALUES (?, ?, ?, ?, ?)",
+            (car_id, log["description"], log["code"], log["date_logged"], log["status"]),
+        )
+        log["id"] = cursor.lastrowid  # Add the ID to the dictionary
+        _invalidate_cars(car_id)
+        if _change_listeners:
+            _notify_change(
+                "diagnostic_log_added",
+                log=_fetch_row(conn, "diagnostic_logs", log["id"]),
             )
 
-        for log in car_data.get("diagnostic_logs", []):
+
+def restore_diagnostic_log(log):
+    """Re-inserts a diagnostic log row with its original ID. Used for Undo/Redo."""
+    with transaction() as conn:
+        conn.execute(
+            "INSERT INTO diagnostic_logs (id, car_id, description, code, date_logged, status, resolution, resolved_date) VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+            (
+                log["id"],
+                log["car_id"],
+                log["description"],
+                log["code"],
+                log["date_logged"],
+                log["status"],
+                log.get("resolution"),
+                log.get("resolved_date"),
+            ),
+        )
+        _invalidate_cars(log["car_id"])
+        if _change_listeners:
+            _notify_change("diagnostic_log_added", log=dict(log))
+
+
+def delete_diagnostic_log(log_id):
+    """Deletes a single diagnostic log by its ID."""
+    with transaction() as conn:
+        before = _fetch_row(conn, "diagnostic_logs", log_id) if _change_listeners else None
+        _invalidate_cars(*_log_car_ids(conn, "diagnostic_logs", log_id))
+        conn.execute("DELETE FROM diagnostic_logs WHERE id = ?", (log_id,))
+        if before:
+            _notify_change("diagnostic_log_deleted", log=before)
+
+
+def resolve_diagnostic_log(log):
+    """Updates a diagnostic log to 'resolved' in the database."""
+    with transaction() as conn:
+        before = _fetch_row(conn, "diagnostic_logs", log["id"]) if _change_listeners else None
+        _invalidate_cars(*_log_car_ids(conn, "diagnostic_logs", log["id"]))
+        conn.execute(
+            """UPDATE diagnostic_logs 
+               SET status = ?, resolution = ?, resolved_date = ?
+               WHERE id = ?""",
+            (log["status"], log["resolution"], log["resolved_date"], log["id"]),
+        )
+        if before:
+            _notify_change(
+                "diagnostic_log_updated",
+                before=before,
+                after=_fetch_row(conn, "diagnostic_logs", log["id"]),
+            )
+
+
+class UnitOfWork:
+    """
+    Collects the writes of one user action and applies them in a single
+    transaction, so the action costs one commit and is saved entirely or not
+    at all. As a context manager it commits when the block ends without an
+    error and discards the queued writes otherwise:
+
+        with db.UnitOfWork() as work:
+            log = car.log_maintenance("oil change", 45, milage=51000)
+            work.add_maintenance_log(car.id, log)
+            work.update_car(car)  # log_maintenance may have raised the mileage
+
+    Writes run in the order they were queued, except that a car queued more
+    than once is saved once, with its details as they are at commit time.
+    """
+
+    def __init__(self):
+        self._operations = []
+        self._cars = {}  # car_id -> the car object to save
+
+    def __len__(self):
+        return len(self._operations)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.discard()
+        return False
+
+    def update_car(self, car):
+        """Queues saving a car's editable details (mileage, license plate, images)."""
+        if car.id not in self._cars:
+            self._operations.append((self._save_car, car.id))
+        self._cars[car.id] = car
+
+    def _save_car(self, car_id):
+        update_car_details(self._cars[car_id])
+
+    def add_maintenance_log(self, car_id, log):
+        """Queues a new maintenance log; log gets its "id" when committed."""
+        self._operations.append((add_maintenance_log, car_id, log))
+
+    def add_diagnostic_log(self, car_id, log):
+        """Queues a new diagnostic log; log gets its "id" when committed."""
+        self._operations.append((add_diagnostic_log, car_id, log))
+
+    def resolve_diagnostic_log(self, log):
+        """Queues marking a diagnostic log as resolved."""
+        self._operations.append((resolve_diagnostic_log, log))
+
+    def commit(self):
+        """
+        Applies the queued writes in one transaction and empties the queue.
+        Returns the number of writes applied. If one fails, none is saved.
+        Nothing is written, and no transaction is opened, for an empty queue.
+        """
+        if not self._operations:
+            return 0
+        try:
+            with transaction():
+                for func, *args in self._operations:
+                    func(*args)
+            return len(self._operations)
+        finally:
+            self.discard()
+
+    def discard(self):
+        """Drops the queued writes."""
+        self._operations = []
+        self._cars = {}
+
+
+def reset_database(snapshot):
+    """Wipes the database and repopulates it from a snapshot. Used for Undo/Redo."""
+    with transaction() as conn:
+        cursor = conn.cursor()
+        _invalidate_cars(_ALL_CARS)
+
+        # Clear existing data in the correct order to respect foreign keys
+        cursor.execute("DELETE FROM maintenance_logs")
+        cursor.execute("DELETE FROM diagnostic_logs")
+        cursor.execute("DELETE FROM cars")
+
+        # Re-populate all tables from the snapshot
+        for car_data in snapshot:
             cursor.execute(
-                "INSERT INTO diagnostic_logs (car_id, description, code, date_logged, status, resolution, resolved_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                "INSERT INTO cars (id, make, model, year, milage, vin, license_plate, image_before, image_after) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
                 (
-                    car_id,
-                    log["description"],
-                    log["code"],
-                    log["date_logged"],
-                    log["status"],
-                    log.get("resolution"),
-                    log.get("resolved_date"),
+                    car_data["id"],
+                    car_data["make"],
+                    car_data["model"],
+                    car_data["year"],
+                    car_data["milage"],
+                    car_data["vin"],
+                    car_data["license_plate"],
+                    car_data.get("image_before"),
+                    car_data.get("image_after"),
                 ),
             )
+            car_id = car_data["id"]
+
+            for log in car_data.get("maintenance_logs", []):
+                cursor.execute(
+                    "INSERT INTO maintenance_logs (car_id, service, cost, milage, date) VALUES (?, ?, ?, ?, ?)",
+                    (car_id, log["service"], log["cost"], log["milage"], log["date"]),
+                )
+
+            for log in car_data.get("diagnostic_logs", []):
+                cursor.execute(
+                    "INSERT INTO diagnostic_logs (car_id, description, code, date_logged, status, resolution, resolved_date) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        car_id,
+                        log["description"],
+                        log["code"],
+                        log["date_logged"],
+                        log["status"],
+                        log.get("resolution"),
+                        log.get("resolved_date"),
+                    ),
+                )
 
-    conn.commit()
-    conn.close()
+        if _change_listeners:
+            _notify_change("database_reset")
@@ -0,0 +1,100 @@
+"""
+Streaming export of the fleet and its logs to JSON Lines or CSV.
+
+Rows are read from the database in batches with fetchmany and written out as
+they arrive, so memory use does not grow with the size of the fleet.
+A JSON Lines export holds every table, each line tagged with its "table".
+CSV has one file per table.
+
+Usage:
+    python -m src.export jsonl fleet.jsonl
+    python -m src.export csv export_dir
+"""
+
+import argparse
+import csv
+import io
+import json
+import os
+import sys
+
+import src.database as db
+
+
+def iter_jsonl(tables=db.EXPORT_TABLES, batch_size=db.FETCH_BATCH_SIZE):
+    """Yields the given tables as JSON Lines text, one chunk per fetched batch."""
+    for table in tables:
+        columns = db.table_columns(table)
+        for batch in db.iter_table_rows(table, batch_size):
+            yield "".join(
+                json.dumps({"table": table, **dict(zip(columns, row))}) + "\n"
+                for row in batch
+            )
+
+
+def iter_csv(table, batch_size=db.FETCH_BATCH_SIZE):
+    """Yields one table as CSV text with a header row, one chunk per fetched batch."""
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(db.table_columns(table))
+    for batch in db.iter_table_rows(table, batch_size):
+        writer.writerows(batch)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    # Only the header is left when the table is empty
+    if buffer.tell():
+        yield buffer.getvalue()
+
+
+def write_jsonl(stream, tables=db.EXPORT_TABLES):
+    """Writes the given tables to a text stream as JSON Lines."""
+    for chunk in iter_jsonl(tables):
+        stream.write(chunk)
+
+
+def write_csv_dir(directory, tables=db.EXPORT_TABLES):
+    """Writes each table to <directory>/<table>.csv. Returns the paths written."""
+    os.makedirs(directory, exist_ok=True)
+    paths = []
+    for table in tables:
+        path = os.path.join(directory, f"{table}.csv")
+        with open(path, "w", newline="", encoding="utf-8") as stream:
+            for chunk in iter_csv(table):
+                stream.write(chunk)
+        paths.append(path)
+    return paths
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("format", choices=("jsonl", "csv"))
+    parser.add_argument(
+        "destination",
+        help="output file for jsonl ('-' for standard output), or a directory for csv",
+    )
+    parser.add_argument(
+        "--table", action="append", choices=db.EXPORT_TABLES, help="table to export (default: all)"
+    )
+    parser.add_argument("--db", help="database file (default: the app database)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.DB_FILE = args.db
+    db.init_db()
+    tables = args.table or db.EXPORT_TABLES
+
+    if args.format == "csv":
+        for path in write_csv_dir(args.destination, tables):
+            print(f"Wrote {path}")
+    elif args.destination == "-":
+        write_jsonl(sys.stdout, tables)
+    else:
+        with open(args.destination, "w", encoding="utf-8") as stream:
+            write_jsonl(stream, tables)
+        print(f"Wrote {args.destination}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,53 +1,157 @@
+import sys
+import sqlite3
+from collections import deque
+import src.database as db
 from src.car import Car
 
 
+def _estimate_size(value):
+    """Roughly estimates the memory held by a recorded change, in bytes."""
+    size = sys.getsizeof(value)
+    if isinstance(value, dict):
+        size += sum(_estimate_size(k) + _estimate_size(v) for k, v in value.items())
+    elif isinstance(value, (list, tuple)):
+        size += sum(_estimate_size(item) for item in value)
+    return size
+
+
+# For each change reported by the database, how to revert it and how to re-apply it.
+# Only the affected rows are touched, so the cost is independent of the fleet size.
+_UNDO_ACTIONS = {
+    "car_added": lambda d: db.delete_car_by_id(d["car"]["id"]),
+    "car_updated": lambda d: db.update_car_details(Car.from_dict(d["before"])),
+    "car_deleted": lambda d: db.restore_car(
+        d["car"], d["maintenance_logs"], d["diagnostic_logs"]
+    ),
+    "maintenance_log_added": lambda d: db.delete_maintenance_log(d["log"]["id"]),
+    "maintenance_log_deleted": lambda d: db.restore_maintenance_log(d["log"]),
+    "diagnostic_log_added": lambda d: db.delete_diagnostic_log(d["log"]["id"]),
+    "diagnostic_log_deleted": lambda d: db.restore_diagnostic_log(d["log"]),
+    "diagnostic_log_updated": lambda d: db.resolve_diagnostic_log(d["before"]),
+}
+
+_REDO_ACTIONS = {
+    "car_added": lambda d: db.restore_car(d["car"]),
+    "car_updated": lambda d: db.update_car_details(Car.from_dict(d["after"])),
+    "car_deleted": lambda d: db.delete_car_by_id(d["car"]["id"]),
+    "maintenance_log_added": lambda d: db.restore_maintenance_log(d["log"]),
+    "maintenance_log_deleted": lambda d: db.delete_maintenance_log(d["log"]["id"]),
+    "diagnostic_log_added": lambda d: db.restore_diagnostic_log(d["log"]),
+    "diagnostic_log_deleted": lambda d: db.delete_diagnostic_log(d["log"]["id"]),
+    "diagnostic_log_updated": lambda d: db.resolve_diagnostic_log(d["after"]),
+}
+
+
 class HistoryManager:
-    """Manages undo and redo functionality by tracking states."""
+    """
+    Manages undo and redo functionality by recording the changes each action makes.
+    Every entry on the stacks is the list of changes made by one user action.
+    """
+
+    def __init__(self, max_depth=50, max_bytes=None):
+        self.undo_stack = deque()
+        self.redo_stack = deque()
+        self.max_depth = max_depth
+        self.max_bytes = max_bytes
+        self.memory_usage = 0  # Estimated bytes held by both stacks
+        self._pending = None
 
-    def __init__(self):
-        self.undo_stack = []
-        self.redo_stack = []
+    def begin_action(self):
+        """Starts recording the database changes made by a user action."""
+        self._pending = []
+        db.add_change_listener(self._record_change)
 
-    def record_state(self, cars_list):
+    def end_action(self):
         """
-        Records the current state of the cars list before a change.
-        A new action clears the redo stack.
+        Stops recording. If the action changed anything, it becomes undoable
+        and the redo stack is cleared. Returns True if changes were recorded.
         """
-        snapshot = [car.to_dict() for car in cars_list]
-        self.undo_stack.append(snapshot)
-        self.redo_stack.clear()
+        db.remove_change_listener(self._record_change)
+        changes, self._pending = self._pending, None
+        if not changes:
+            return False
+
+        self._clear_stack(self.redo_stack)
+        self._push(self.undo_stack, changes)
+        # Drop the oldest actions once the depth or memory budget is exceeded
+        while len(self.undo_stack) > self.max_depth or (
+            self.max_bytes is not None
+            and self.memory_usage > self.max_bytes
+            and len(self.undo_stack) > 1
+        ):
+            _, size = self.undo_stack.popleft()
+            self.memory_usage -= size
+        return True
 
-    def discard_last_record(self):
-        """Removes the most recent snapshot from the undo stack if an action was cancelled."""
-        if self.undo_stack:
-            self.undo_stack.pop()
+    def _record_change(self, kind, details):
+        if kind == "database_reset":
+            # A full reset cannot be reverted change by change
+            self.clear()
+        elif kind == "logs_imported":
+            # Bulk imports are not recorded, so they cannot be undone
+            return
+        elif self._pending is not None:
+            self._pending.append((kind, details))
 
-    def undo(self, current_cars_list):
+    def _push(self, stack, changes):
+        size = _estimate_size(changes)
+        stack.append((changes, size))
+        self.memory_usage += size
+
+    def _pop(self, stack):
+        changes, size = stack.pop()
+        self.memory_usage -= size
+        return changes
+
+    def _clear_stack(self, stack):
+        while stack:
+            self._pop(stack)
+
+    def clear(self):
+        """Forgets all undo and redo history."""
+        self._clear_stack(self.undo_stack)
+        self._clear_stack(self.redo_stack)
+
+    def undo(self):
         """
-        Reverts to the previous state.
-        Returns the previous state as a list of Car objects, or None.
+        Reverts the most recent action in the database.
+        Returns True if something was undone.
         """
         if not self.undo_stack:
             print("\nNothing to undo.")
-            return None
-
-        current_snapshot = [car.to_dict() for car in current_cars_list]
-        self.redo_stack.append(current_snapshot)
+            return False
 
-        previous_snapshot = self.undo_stack.pop()
-        return [Car.from_dict(data) for data in previous_snapshot]
+        changes = self._pop(self.undo_stack)
+        try:
+            with db.transaction():
+                for kind, details in reversed(changes):
+                    _UNDO_ACTIONS[kind](details)
+        except sqlite3.Error as e:
+            # The database no longer matches the recorded change, e.g. it was
+            # edited from the web app. The transaction was rolled back.
+            print(f"\nUndo failed: {e}")
+            return False
+        self._push(self.redo_stack, changes)
+        return True
 
-    def redo(self, current_cars_list):
+    def redo(self):
         """
-        Re-applies a previously undone action.
-        Returns the redone state as a list of Car objects, or None.
+        Re-applies the most recently undone action in the database.
+        Returns True if something was redone.
         """
         if not self.redo_stack:
             print("\nNothing to redo.")
-            return None
-
-        current_snapshot = [car.to_dict() for car in current_cars_list]
-        self.undo_stack.append(current_snapshot)
+            return False
 
-        next_snapshot = self.redo_stack.pop()
-        return [Car.from_dict(data) for data in next_snapshot]
+        changes = self._pop(self.redo_stack)
+        try:
+            with db.transaction():
+                for kind, details in changes:
+                    _REDO_ACTIONS[kind](details)
+        except sqlite3.Error as e:
+            # The database no longer matches the recorded change, e.g. it was
+            # edited from the web app. The transaction was rolled back.
+            print(f"\nRedo failed: {e}")
+            return False
+        self._push(self.undo_stack, changes)
+        return True
@@ -1,6 +1,7 @@
 import datetime
 from src.car import SERVICE_INTERVALS
 import src.database as db
+from src.service_due import get_fleet_due_services
 from src.cli.ui_helpers import get_user_input_int, select_car
 
 
@@ -64,7 +65,10 @@ def add_service_record(cars_list):
     new_log = car.log_maintenance(
         service_type, cost, milage=milage, date=date.isoformat()
     )
-    db.add_maintenance_log(car.id, new_log)
+    # log_maintenance raises the car's mileage to the service mileage, so save both
+    with db.UnitOfWork() as work:
+        work.add_maintenance_log(car.id, new_log)
+        work.update_car(car)
     print("\nService record added successfully.")
     return True
 
@@ -96,13 +100,14 @@ def view_service_reminders(cars_list):
         print("No cars in the system to check.")
         return
 
+    # For a general overview, we check against each car's last known mileage.
+    # The user can get a more precise check via the "Check if a car is due for service" option.
+    # The due services for the whole fleet come from the precomputed service index.
+    due_by_car = get_fleet_due_services()
+
     reminders_found = False
     for car in cars_list:
-        # For a general overview, we check against the car's last known mileage.
-        # The user can get a more precise check via the "Check if a car is due for service" option.
-        due_services = (
-            car.get_upcoming_services()
-        )  # Uses car.milage by default inside needs_maintenance
+        due_services = due_by_car.get(car.id, [])
         if due_services:
             if not reminders_found:
                 # Print a header only if we find at least one reminder
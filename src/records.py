@@ -0,0 +1,110 @@
+class LogRecord:
+    """
+    Base class for compact, slotted log entries.
+    Records also support the dict-style access the logs used to be stored with,
+    e.g. log['status'], log.get('code') and dict(log), so templates and existing
+    callers keep working.
+    """
+
+    __slots__ = ()
+
+    @classmethod
+    def from_row(cls, row):
+        """Creates a record from a sqlite3.Row of its table."""
+        return cls(*(row[name] for name in cls.__slots__))
+
+    @classmethod
+    def from_dict(cls, data):
+        """Creates a record from a dict; missing fields default to None."""
+        return cls(*map(data.get, cls.__slots__))
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def __contains__(self, key):
+        return key in self.__slots__
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def get(self, key, default=None):
+        return getattr(self, key) if key in self.__slots__ else default
+
+    def keys(self):
+        return self.__slots__
+
+    def values(self):
+        return [getattr(self, name) for name in self.__slots__]
+
+    def items(self):
+        return [(name, getattr(self, name)) for name in self.__slots__]
+
+    def __eq__(self, other):
+        if isinstance(other, (LogRecord, dict)):
+            return dict(self) == dict(other)
+        return NotImplemented
+
+    __hash__ = None  # Records are mutable, like the dicts they replace
+
+    def __repr__(self):
+        fields = ", ".join(f"{name}={getattr(self, name)!r}" for name in self.__slots__)
+        return f"{type(self).__name__}({fields})"
+
+
+class MaintenanceLog(LogRecord):
+    """A row of maintenance_logs. Field order matches the table's columns."""
+
+    __slots__ = ("id", "car_id", "service", "cost", "milage", "date")
+
+    def __init__(self, id=None, car_id=None, service=None, cost=None, milage=None, date=None):
+        self.id = id
+        self.car_id = car_id
+        self.service = service
+        self.cost = cost
+        self.milage = milage
+        self.date = date
+
+
+class DiagnosticLog(LogRecord):
+    """A row of diagnostic_logs. Field order matches the table's columns."""
+
+    __slots__ = (
+        "id",
+        "car_id",
+        "description",
+        "code",
+        "date_logged",
+        "status",
+        "resolution",
+        "resolved_date",
+    )
+
+    def __init__(
+        self,
+        id=None,
+        car_id=None,
+        description=None,
+        code=None,
+        date_logged=None,
+        status=None,
+        resolution=None,
+        resolved_date=None,
+    ):
+        self.id = id
+        self.car_id = car_id
+        self.description = description
+        self.code = code
+        self.date_logged = date_logged
+        self.status = status
+        self.resolution = resolution
+        self.resolved_date = resolved_date
@@ -0,0 +1,122 @@
+"""
+Ranked full-text search over diagnostic and maintenance logs.
+
+Diagnostic descriptions, codes and resolutions and maintenance service names
+are indexed by the FTS5 tables added in migration 5. Each word of a query must
+match the start of a word in the log ("misfir" finds "misfire"), and hits are
+ranked by bm25 and grouped by car, best match first.
+
+Usage:
+    python -m src.search P0420
+    python -m src.search "brake noise" --limit 20
+"""
+
+import argparse
+import re
+import sys
+
+import src.database as db
+from src.records import DiagnosticLog, MaintenanceLog
+
+# Largest number of log hits returned by one search
+SEARCH_LIMIT = 50
+
+_WORD = re.compile(r"\w+")
+
+# FTS5 table -> (log kind, log table, record class)
+_SOURCES = {
+    "diagnostic_search": ("diagnostic", "diagnostic_logs", DiagnosticLog),
+    "maintenance_search": ("maintenance", "maintenance_logs", MaintenanceLog),
+}
+
+
+def match_expression(query):
+    """
+    Turns free text into an FTS5 MATCH expression: every word becomes a quoted
+    prefix term, so quotes, operators and column filters typed by the user are
+    never interpreted by FTS5. Returns None if the query has no words.
+    """
+    words = _WORD.findall(query or "")
+    if not words:
+        return None
+    return " ".join(f'"{word}"*' for word in words)
+
+
+def _search_table(conn, fts_table, expression, limit, highlight):
+    kind, table, record = _SOURCES[fts_table]
+    rows = conn.execute(
+        f"""
+        SELECT {table}.*, bm25({fts_table}) AS rank,
+            snippet({fts_table}, -1, ?, ?, '…', 12) AS snippet
+        FROM {fts_table} JOIN {table} ON {table}.id = {fts_table}.rowid
+        WHERE {fts_table} MATCH ?
+        ORDER BY rank LIMIT ?
+        """,
+        (*highlight, expression, limit),
+    )
+    return [
+        {"kind": kind, "rank": row["rank"], "snippet": row["snippet"], "log": record.from_row(row)}
+        for row in rows
+    ]
+
+
+def search(query, limit=SEARCH_LIMIT, highlight=("[", "]")):
+    """
+    Searches the log text and returns a list of dicts with the matching "car"
+    (id, make, model, year, vin and license_plate) and its "hits", ordered by
+    the best bm25 rank. Each hit has the log "kind", the log record, its rank
+    and a snippet with the matched words wrapped in the highlight pair.
+    At most limit hits are returned.
+    """
+    expression = match_expression(query)
+    if expression is None:
+        return []
+    # One snapshot for every read, so a car deleted meanwhile cannot lose its row
+    with db.read_transaction() as conn:
+        hits = []
+        for fts_table in _SOURCES:
+            hits.extend(_search_table(conn, fts_table, expression, limit, highlight))
+        # bm25 ranks are negative; lower is a better match
+        hits.sort(key=lambda hit: hit["rank"])
+        del hits[limit:]
+        if not hits:
+            return []
+
+        results = {}
+        for hit in hits:
+            results.setdefault(hit["log"].car_id, []).append(hit)
+        placeholders = ", ".join("?" * len(results))
+        cars = {
+            row["id"]: dict(row)
+            for row in conn.execute(
+                f"SELECT id, make, model, year, vin, license_plate FROM cars WHERE id IN ({placeholders})",
+                list(results),
+            )
+        }
+    return [{"car": cars[car_id], "hits": car_hits} for car_id, car_hits in results.items()]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("query")
+    parser.add_argument("--limit", type=int, default=SEARCH_LIMIT, help="most log hits to show")
+    parser.add_argument("--db", help="database file (default: the app database)")
+    args = parser.parse_args(argv)
+
+    if args.db:
+        db.DB_FILE = args.db
+    db.init_db()
+
+    results = search(args.query, args.limit)
+    if not results:
+        print("No matching logs found.")
+    for result in results:
+        car = result["car"]
+        print(f"{car['year']} {car['make']} {car['model']} ({car['license_plate']}, VIN {car['vin']})")
+        for hit in result["hits"]:
+            print(f"  {hit['kind']:<12} {hit['snippet']}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
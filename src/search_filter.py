@@ -1,5 +1,6 @@
 from src.cli.ui_helpers import get_user_input_int, list_cars
 from src.car import SERVICE_INTERVALS
+import src.database as db
 
 
 def _get_filters_from_user():
@@ -97,6 +98,9 @@ def search_and_filter_cars(cars_list):
         return
 
     filters = _get_filters_from_user()
+    if filters.get("has_open_issues") or "needs_service_type" in filters:
+        # These filters read the logs, so fetch them for all cars in a few batches
+        db.prefetch_logs(cars_list)
     results = _apply_filters(cars_list, filters)
 
     print(f"\n--- Found {len(results)} car(s) matching your criteria ---")
@@ -0,0 +1,65 @@
+import datetime
+from src.car import SERVICE_INTERVALS
+import src.database as db
+
+
+def compute_due_matrix(today=None):
+    """
+    Computes which services are due for the whole fleet in one vectorized pass.
+    Returns (car_ids, services, due), where due[i, j] is True if car car_ids[i]
+    needs services[j]. The rules are those of Car.needs_maintenance, checked
+    against each car's last known mileage: no record of a service means it is due.
+    """
+    # numpy takes longer to import than the rest of the app, so it is loaded on first use
+    import numpy as np
+
+    today = today or datetime.date.today()
+    services = list(SERVICE_INTERVALS)
+    service_columns = {service_type: j for j, service_type in enumerate(services)}
+
+    # One snapshot for both reads, so every service row has its car in car_rows
+    with db.read_transaction():
+        car_rows = db.load_car_mileages()
+        last_services = db.load_last_services()
+    car_ids = np.array([row[0] for row in car_rows], dtype=np.int64)
+    car_milage = np.array([row[1] for row in car_rows], dtype=np.int64)
+
+    shape = (len(car_ids), len(services))
+    has_record = np.zeros(shape, dtype=bool)
+    last_milage = np.zeros(shape, dtype=np.int64)
+    last_day = np.zeros(shape, dtype=np.int64)
+
+    rows = [row for row in last_services if row[1] in service_columns]
+    if rows:
+        log_car_ids, log_services, log_milage, log_days = zip(*rows)
+        row_index = np.searchsorted(car_ids, np.array(log_car_ids, dtype=np.int64))
+        column_index = np.array([service_columns[s] for s in log_services], dtype=np.int64)
+        has_record[row_index, column_index] = True
+        last_milage[row_index, column_index] = log_milage
+        # An unparseable date has no ordinal; treat it as long ago
+        last_day[row_index, column_index] = [0 if day is None else day for day in log_days]
+
+    # Intervals of None mean "no limit", which no gap can reach
+    mile_intervals = np.array(
+        [np.inf if SERVICE_INTERVALS[s][0] is None else SERVICE_INTERVALS[s][0] for s in services]
+    )
+    day_intervals = np.array(
+        [np.inf if SERVICE_INTERVALS[s][1] is None else SERVICE_INTERVALS[s][1] for s in services]
+    )
+    overdue_by_miles = (car_milage[:, np.newaxis] - last_milage) >= mile_intervals
+    overdue_by_days = (today.toordinal() - last_day) >= day_intervals
+    due = ~has_record | overdue_by_miles | overdue_by_days
+    return car_ids, services, due
+
+
+def get_fleet_due_services(today=None):
+    """
+    Returns {car_id: [due service types]} for every car in the database.
+    Reads the precomputed service_last_done table, so the cost is
+    O(cars x services) no matter how many logs each car has.
+    """
+    car_ids, services, due = compute_due_matrix(today)
+    return {
+        car_id: [services[j] for j in row.nonzero()[0]]
+        for car_id, row in zip(car_ids.tolist(), due)
+    }
@@ -1,11 +1,27 @@
+import asyncio
+import base64
+import contextvars
 import datetime
+import functools
+import hashlib
+import json
 import os
-import time
-from flask import Flask, render_template, request, redirect, url_for, flash
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from flask import (
+    Flask, Response, jsonify, make_response, render_template, request, redirect, session, url_for, flash,
+    send_from_directory,
+)
+from markupsafe import Markup, escape
+import src.analytics as analytics
 import src.database as db
+import src.search as search_index
+import src.web.images as images
+import src.web.metrics as metrics
 from src.car import Car, SERVICE_INTERVALS
-from src.search_filter import _apply_filters
-from werkzeug.utils import secure_filename
+from src.export import iter_csv, iter_jsonl
+from src.service_due import get_fleet_due_services
 
 # Get the absolute path of the directory containing this file
 _basedir = os.path.abspath(os.path.dirname(__file__))
@@ -23,13 +39,247 @@ UPLOAD_FOLDER = os.path.join(_basedir, "static", "uploads")
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
-# Initialize the database
-db.init_db()
+# Number of cars shown per page on the home page, and the largest page a client may ask for
+PAGE_SIZE = 50
+MAX_PAGE_SIZE = 500
+
+# Views are async: database calls and upload writes run on these bounded pools,
+# so slow I/O waits in a queue instead of tying up the threads serving requests.
+# Each pool thread keeps its own database connection. Thumbnails are made on a
+# third pool that requests never wait for.
+DB_WORKERS = 4
+IO_WORKERS = 2
+THUMBNAIL_WORKERS = 1
+_db_executor = None
+_io_executor = None
+_thumbnail_executor = None
+
+
+def start_executors(wait=False):
+    """
+    Creates fresh database and upload pools, e.g. in a newly forked worker.
+    The threads of replaced pools exit once their queued work is done, which
+    closes their database connections; wait=True blocks until they have.
+    """
+    global _db_executor, _io_executor, _thumbnail_executor
+    for executor in (_db_executor, _io_executor, _thumbnail_executor):
+        if executor is not None:
+            executor.shutdown(wait=wait)
+    _db_executor = ThreadPoolExecutor(max_workers=DB_WORKERS, thread_name_prefix="db")
+    _io_executor = ThreadPoolExecutor(max_workers=IO_WORKERS, thread_name_prefix="io")
+    _thumbnail_executor = ThreadPoolExecutor(max_workers=THUMBNAIL_WORKERS, thread_name_prefix="thumbnail")
+
+
+start_executors()
+
+# Uploads are copied to disk in chunks of this many bytes
+UPLOAD_CHUNK_SIZE = 64 * 1024
+
+# Content-addressed images never change, so browsers may keep them this many seconds
+IMAGE_MAX_AGE = 365 * 24 * 3600
+
+# Rendered car lists kept for reuse, keyed by query string and fleet version
+FRAGMENT_CACHE_SIZE = 128
+
+# Most uploads remembered as unreadable images; the least recently requested go first
+FAILED_THUMBNAILS_SIZE = 1024
+
+# Request timing and /metrics, off unless CAR_TRACKER_METRICS=1
+metrics.init_app(app)
+
+# Importing the app does not touch the database: the entry points (run_web.py,
+# src/web/wsgi.py and src/web/asgi.py) call db.init_db() before serving requests.
+
+
+async def run_db(func, *args, **kwargs):
+    """Runs a blocking database call on the database pool and awaits its result."""
+    loop = asyncio.get_running_loop()
+    # The call runs in a copy of this context, so it is timed as part of the request
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_db_executor, context.run, functools.partial(func, *args, **kwargs))
+
+
+async def save_upload(file):
+    """
+    Streams an uploaded file into the upload folder without blocking the event
+    loop, and queues its thumbnails. Returns the content-addressed file name.
+    """
+    upload_folder = app.config["UPLOAD_FOLDER"]
+    loop = asyncio.get_running_loop()
+    filename = await loop.run_in_executor(
+        _io_executor, images.store_upload, file.stream, file.filename, upload_folder, UPLOAD_CHUNK_SIZE
+    )
+    _queue_thumbnails(filename)
+    return filename
+
+
+# Uploads whose thumbnails are being made, so each is queued only once
+_pending_thumbnails = set()
+# Uploads that are not readable images, so they are not queued again; an LRU
+# bounded by FAILED_THUMBNAILS_SIZE
+_failed_thumbnails = OrderedDict()
+_pending_lock = threading.Lock()
+
+
+def _queue_thumbnails(filename):
+    """Makes an upload's missing thumbnails on the thumbnail pool."""
+    upload_folder = app.config["UPLOAD_FOLDER"]
+    key = (upload_folder, filename)
+    with _pending_lock:
+        if key in _pending_thumbnails or key in _failed_thumbnails:
+            return
+        _pending_thumbnails.add(key)
+
+    def done(future):
+        error = future.exception()
+        if error is not None:
+            # Likely passing, such as a full disk; the next request tries again
+            app.logger.warning("Thumbnails of %s failed: %s", filename, error)
+        with _pending_lock:
+            _pending_thumbnails.discard(key)
+            if error is None and future.result() is None:
+                _failed_thumbnails[key] = True
+                while len(_failed_thumbnails) > FAILED_THUMBNAILS_SIZE:
+                    _failed_thumbnails.popitem(last=False)
+
+    _thumbnail_executor.submit(images.make_thumbnails, upload_folder, filename).add_done_callback(done)
+
+
+def _send_image(path, filename, etag):
+    """Sends a file of the upload folder, cached for good if its name is content-addressed."""
+    if not images.is_content_addressed(filename):
+        return send_from_directory(app.config["UPLOAD_FOLDER"], path)
+    response = send_from_directory(app.config["UPLOAD_FOLDER"], path, etag=etag, max_age=IMAGE_MAX_AGE)
+    response.cache_control.public = True
+    response.cache_control.immutable = True
+    return response
+
+
+@app.template_global()
+def image_url(filename, size=None):
+    """URL of an uploaded image, or of its thumbnail with the given longest side."""
+    if size is None:
+        return url_for("image", filename=filename)
+    return url_for("thumbnail", size=size, filename=filename)
+
+
+@app.route("/images/<path:filename>")
+def image(filename):
+    """Serves an original upload."""
+    return _send_image(filename, filename, images.content_hash(filename))
+
+
+@app.route("/images/<int:size>/<path:filename>")
+def thumbnail(size, filename):
+    """
+    Serves a thumbnail of an upload. Until it exists (it is still being made,
+    or Pillow is not installed) the original is sent, without long caching.
+    An upload Pillow could not read has no thumbnails and gets a 404.
+    """
+    if size not in images.THUMBNAIL_SIZES:
+        return "Unknown thumbnail size", 404
+    path = images.thumbnail_name(filename, size)
+    if os.path.exists(os.path.join(app.config["UPLOAD_FOLDER"], path)):
+        return _send_image(path, filename, f"{images.content_hash(filename)}-{size}")
+    key = (app.config["UPLOAD_FOLDER"], filename)
+    with _pending_lock:
+        failed = key in _failed_thumbnails
+        if failed:
+            _failed_thumbnails.move_to_end(key)
+    if failed:
+        return "Not a readable image", 404
+    response = send_from_directory(app.config["UPLOAD_FOLDER"], filename)
+    if images.Image is not None:
+        _queue_thumbnails(filename)
+    response.cache_control.no_cache = True
+    return response
+
+
+def _build_id():
+    """Changes whenever this module or a template changes, so pages made by older code are not reused."""
+    paths = [__file__] + [
+        os.path.join(app.template_folder, name) for name in sorted(os.listdir(app.template_folder))
+    ]
+    stamp = "".join(f"{path}:{os.stat(path).st_mtime_ns};" for path in paths)
+    return hashlib.sha256(stamp.encode()).hexdigest()[:12]
+
+
+_BUILD_ID = _build_id()
+
+
+def _page_etag(kind, version):
+    """
+    Strong ETag of a page made from data at the given version. Due services
+    depend on the date, so the tag also changes at midnight.
+    """
+    return f"{kind}-{version}-{datetime.date.today().isoformat()}-{_BUILD_ID}"
+
+
+def _conditional_page(etag, modified_at):
+    """
+    Returns a 304 response if the client already has the page with this ETag,
+    otherwise None. Pages with flashed messages to show are always sent in full.
+    """
+    if "_flashes" in session or not request.if_none_match.contains(etag):
+        return None
+    return _set_validators(Response(status=304), etag, modified_at)
+
+
+def _set_validators(response, etag, modified_at):
+    """
+    Marks a page as cacheable but revalidated on every use. The page must not
+    show flashed messages, or a client could be shown them again from its cache.
+    """
+    response.cache_control.no_cache = True
+    response.vary.add("X-Requested-With")
+    response.set_etag(etag)
+    response.last_modified = modified_at
+    return response
+
+
+class _FragmentCache:
+    """Thread-safe LRU cache of rendered markup."""
+
+    def __init__(self, size):
+        self.size = size
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            value = self._items.get(key)
+            if value is not None:
+                self._items.move_to_end(key)
+            return value
+
+    def put(self, key, value):
+        with self._lock:
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+# A key holds the fleet version, so a write makes every older list unreachable
+_car_list_cache = _FragmentCache(FRAGMENT_CACHE_SIZE)
 
 
 @app.route("/")
-def index():
+async def index():
     """Home page: Lists all cars."""
+    # Nothing is queried or rendered for a client whose copy is still current
+    fleet_version, modified_at = await run_db(db.get_fleet_version)
+    partial = request.headers.get("X-Requested-With") == "XMLHttpRequest"
+    etag = _page_etag("fleet-list" if partial else "fleet", fleet_version)
+    not_modified = _conditional_page(etag, modified_at)
+    if not_modified:
+        return not_modified
+    flashed = "_flashes" in session
+
     # Get filter criteria from query parameters to pass back to the template
     form_values = {
         "make": request.args.get("make", "").strip(),
@@ -41,6 +291,33 @@ def index():
         "needs_service_type": request.args.get("needs_service_type", "").strip(),
     }
 
+    # The same query at the same fleet version lists the same cars
+    cache_key = (request.query_string, fleet_version, datetime.date.today())
+    car_list = _car_list_cache.get(cache_key)
+    if car_list is None:
+        car_list = Markup(await _render_car_list(form_values))
+        _car_list_cache.put(cache_key, car_list)
+
+    # If the request is an AJAX request, return only the list partial
+    if partial:
+        response = make_response(car_list)
+    else:
+        # Otherwise, for a full page load, return the whole page
+        response = make_response(
+            render_template(
+                "index.html",
+                car_list=car_list,
+                filters=form_values,
+                service_intervals=SERVICE_INTERVALS.keys(),
+            )
+        )
+    if flashed:
+        return response
+    return _set_validators(response, etag, modified_at)
+
+
+async def _render_car_list(form_values):
+    """Loads the page of cars the request asks for and renders the list partial."""
     # Build a dictionary of only the active filters to pass to the logic
     active_filters = {}
     if form_values["make"]:
@@ -58,30 +335,149 @@ def index():
     if form_values["needs_service_type"]:
         active_filters["needs_service_type"] = form_values["needs_service_type"]
 
-    all_cars = db.load_all_cars()
+    # Pagination: the cursor marks the car a page starts after (or ends before)
+    limit = request.args.get("limit", PAGE_SIZE, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    direction, key = _decode_cursor(request.args.get("cursor", ""))
+
+    # The filters are applied in SQL so only one page of matching cars is loaded
+    page_cars, next_key, prev_key = await run_db(
+        db.load_cars_page,
+        active_filters,
+        limit,
+        after=key if direction == "after" else None,
+        before=key if direction == "before" else None,
+    )
 
-    if active_filters:
-        filtered_cars = _apply_filters(all_cars, active_filters)
-    else:
-        filtered_cars = all_cars
+    # Next/previous links keep the current filters and page size
+    link_args = {name: value for name, value in request.args.items() if name != "cursor"}
+    pagination = {"next_url": None, "prev_url": None}
+    if next_key:
+        cursor = _encode_cursor("after", next_key)
+        pagination["next_url"] = url_for("index", **link_args, cursor=cursor)
+    if prev_key:
+        cursor = _encode_cursor("before", prev_key)
+        pagination["prev_url"] = url_for("index", **link_args, cursor=cursor)
+
+    return render_template("_car_list.html", cars=page_cars, pagination=pagination)
+
+
+def _encode_cursor(direction, key):
+    """Encodes a pagination direction and (make, model, id) key as a URL-safe token."""
+    payload = json.dumps([direction, *key]).encode()
+    return base64.urlsafe_b64encode(payload).decode().rstrip("=")
+
+
+def _decode_cursor(token):
+    """Decodes a cursor token. Returns (None, None) for a missing or malformed one."""
+    if not token:
+        return None, None
+    try:
+        padded = token + "=" * (-len(token) % 4)
+        direction, make, model, car_id = json.loads(base64.urlsafe_b64decode(padded))
+        if direction not in ("after", "before"):
+            raise ValueError(direction)
+        return direction, (str(make), str(model), int(car_id))
+    except (ValueError, TypeError):
+        return None, None
+
+
+def _load_due_cars():
+    """Returns (car row, due services) for every car that is due for a service."""
+    # Due services for the whole fleet are computed in one batch; only the rows
+    # of cars with something due are read
+    due_by_car = get_fleet_due_services()
+    return [
+        (car, due_by_car[car["id"]])
+        for car in db.load_car_rows(car_id for car_id, due in due_by_car.items() if due)
+    ]
 
-    # If the request is an AJAX request, return only the list partial
-    if request.headers.get("X-Requested-With") == "XMLHttpRequest":
-        return render_template("_car_list.html", cars=filtered_cars)
-
-    # Otherwise, for a full page load, return the whole page
-    return render_template(
-        "index.html",
-        cars=filtered_cars,
-        filters=form_values,
-        service_intervals=SERVICE_INTERVALS.keys(),
+
+@app.route("/reminders")
+async def reminders():
+    """Lists every car that is due for at least one service."""
+    due_cars = await run_db(_load_due_cars)
+    return render_template("reminders.html", due_cars=due_cars)
+
+
+# Control characters, which typed log text does not contain, mark the matched words
+# in search snippets, so the snippet can be escaped before they become <mark> tags
+_HIGHLIGHT = ("\x02", "\x03")
+
+
+def _search(query):
+    """Runs a search and turns each hit's snippet into safe highlighted markup."""
+    results = search_index.search(query, highlight=_HIGHLIGHT)
+    for result in results:
+        for hit in result["hits"]:
+            snippet = str(escape(hit["snippet"]))
+            hit["snippet"] = Markup(snippet.replace(_HIGHLIGHT[0], "<mark>").replace(_HIGHLIGHT[1], "</mark>"))
+    return results
+
+
+@app.route("/search")
+async def search():
+    """Ranked full-text search over diagnostic and maintenance logs."""
+    query = request.args.get("q", "").strip()
+    results = await run_db(_search, query) if query else []
+    return render_template("search.html", query=query, results=results)
+
+
+@app.route("/api/search")
+async def search_api():
+    """Returns the ranked search hits for ?q= as JSON, grouped by car."""
+    query = request.args.get("q", "")
+    limit = request.args.get("limit", search_index.SEARCH_LIMIT, type=int)
+    limit = max(1, min(limit, MAX_PAGE_SIZE))
+    results = await run_db(search_index.search, query, limit)
+    for result in results:
+        for hit in result["hits"]:
+            hit["log"] = dict(hit["log"])
+    return jsonify({"query": query, "results": results})
+
+
+@app.route("/api/analytics/<group>")
+async def analytics_rollup(group):
+    """Returns a maintenance cost rollup (car, make_model, service or month) as JSON."""
+    if group not in analytics.GROUPS:
+        return jsonify({"error": f"Unknown rollup '{group}'"}), 404
+    rollup = await run_db(analytics.cost_rollup, group)
+    return jsonify({"group": group, "rollup": rollup})
+
+
+@app.route("/export/fleet.jsonl")
+def export_jsonl():
+    """Streams every car and log as JSON Lines."""
+    return Response(
+        iter_jsonl(),
+        mimetype="application/x-ndjson",
+        headers={"Content-Disposition": "attachment; filename=fleet.jsonl"},
+    )
+
+
+@app.route("/export/<table>.csv")
+def export_csv(table):
+    """Streams one table (cars, maintenance_logs or diagnostic_logs) as CSV."""
+    if table not in db.EXPORT_TABLES:
+        return "Table not found", 404
+    return Response(
+        iter_csv(table),
+        mimetype="text/csv",
+        headers={"Content-Disposition": f"attachment; filename={table}.csv"},
     )
 
 
 @app.route("/car/<int:car_id>")
-def car_detail(car_id):
+async def car_detail(car_id):
     """Shows a detailed view of a single car."""
-    car = db.load_car_by_id(car_id)
+    version, modified_at = await run_db(db.get_car_version, car_id)
+    etag = _page_etag(f"car-{car_id}", version)
+    not_modified = _conditional_page(etag, modified_at)
+    if not_modified:
+        return not_modified
+    flashed = "_flashes" in session
+
+    car = await run_db(db.load_car_by_id, car_id)
     if not car:
         return "Car not found", 404
 
@@ -92,24 +488,29 @@ def car_detail(car_id):
     ]
     today_date = datetime.date.today().isoformat()
 
-    return render_template(
-        "car_detail.html",
-        car=car,
-        upcoming_services=upcoming_services,
-        open_issues=open_issues,
-        today_date=today_date,
+    response = make_response(
+        render_template(
+            "car_detail.html",
+            car=car,
+            upcoming_services=upcoming_services,
+            open_issues=open_issues,
+            today_date=today_date,
+        )
     )
+    if flashed:
+        return response
+    return _set_validators(response, etag, modified_at)
 
 
 @app.route("/car/add", methods=["GET", "POST"])
-def add_car():
+async def add_car():
     """Handles adding a new car."""
     if request.method == "POST":
         # Basic validation
-        if db.check_vin_exists(request.form["vin"].upper()):
+        if await run_db(db.check_vin_exists, request.form["vin"].upper()):
             flash(f"Error: VIN {request.form['vin']} already exists.", "error")
             return render_template("car_form.html", car=request.form)
-        if db.check_license_plate_exists(request.form["license_plate"].upper()):
+        if await run_db(db.check_license_plate_exists, request.form["license_plate"].upper()):
             flash(
                 f"Error: License plate {request.form['license_plate']} already exists.",
                 "error",
@@ -124,7 +525,7 @@ def add_car():
             vin=request.form["vin"].upper(),
             license_plate=request.form["license_plate"].upper(),
         )
-        db.add_car(new_car)
+        await run_db(db.add_car, new_car)
         flash(f"Car '{new_car.make} {new_car.model}' added successfully!", "success")
         return redirect(url_for("index"))
 
@@ -133,9 +534,9 @@ def add_car():
 
 
 @app.route("/car/<int:car_id>/edit", methods=["GET", "POST"])
-def edit_car(car_id):
+async def edit_car(car_id):
     """Handles editing an existing car."""
-    car = db.load_car_by_id(car_id)
+    car = await run_db(db.load_car_by_id, car_id)
     if not car:
         return "Car not found", 404
 
@@ -148,20 +549,16 @@ def edit_car(car_id):
         if "image_before" in request.files:
             file = request.files["image_before"]
             if file.filename != "":
-                # Generate a unique, secure filename
-                filename = f"{car.vin}-before-{int(time.time())}-{secure_filename(file.filename)}"
-                file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
-                car.image_before = filename
+                # Stored under its content hash, so re-uploading a photo reuses the file
+                car.image_before = await save_upload(file)
 
         # Handle 'after' image upload
         if "image_after" in request.files:
             file = request.files["image_after"]
             if file.filename != "":
-                filename = f"{car.vin}-after-{int(time.time())}-{secure_filename(file.filename)}"
-                file.save(os.path.join(app.config["UPLOAD_FOLDER"], filename))
-                car.image_after = filename
+                car.image_after = await save_upload(file)
 
-        db.update_car_details(car)
+        await run_db(db.update_car_details, car)
         flash(f"Car '{car.make} {car.model}' updated successfully!", "success")
         return redirect(url_for("car_detail", car_id=car.id))
 
@@ -170,19 +567,19 @@ def edit_car(car_id):
 
 
 @app.route("/car/<int:car_id>/delete", methods=["POST"])
-def delete_car(car_id):
+async def delete_car(car_id):
     """Handles deleting a car."""
-    car = db.load_car_by_id(car_id)
+    car = await run_db(db.load_car_by_id, car_id)
     if car:
-        db.delete_car_by_id(car_id)
+        await run_db(db.delete_car_by_id, car_id)
         flash(f"Car '{car.make} {car.model}' has been deleted.", "success")
     return redirect(url_for("index"))
 
 
 @app.route("/car/<int:car_id>/add_maintenance", methods=["POST"])
-def add_maintenance_log(car_id):
+async def add_maintenance_log(car_id):
     """Adds a maintenance log to a car."""
-    car = db.load_car_by_id(car_id)
+    car = await run_db(db.load_car_by_id, car_id)
     if car:
         new_log = car.log_maintenance(
             service_type=request.form["service"],
@@ -190,31 +587,34 @@ def add_maintenance_log(car_id):
             milage=int(request.form["milage"]),
             date=request.form["date"],
         )
-        db.add_maintenance_log(car.id, new_log)
-        db.update_car_details(car)  # Update mileage if it changed
+        # The log and the mileage it may have raised are saved in one commit
+        work = db.UnitOfWork()
+        work.add_maintenance_log(car.id, new_log)
+        work.update_car(car)
+        await run_db(work.commit)
         flash("Maintenance record added successfully!", "success")
     return redirect(url_for("car_detail", car_id=car_id))
 
 
 @app.route("/car/<int:car_id>/add_diagnostic", methods=["POST"])
-def add_diagnostic_log(car_id):
+async def add_diagnostic_log(car_id):
     """Adds a diagnostic log to a car."""
-    car = db.load_car_by_id(car_id)
+    car = await run_db(db.load_car_by_id, car_id)
     if car:
         new_log = car.log_diagnostic(
             description=request.form["description"],
             code=request.form.get("code") or None,
             date=datetime.date.today().isoformat(),
         )
-        db.add_diagnostic_log(car.id, new_log)
+        await run_db(db.add_diagnostic_log, car.id, new_log)
         flash("Diagnostic issue logged successfully!", "success")
     return redirect(url_for("car_detail", car_id=car_id))
 
 
 @app.route("/car/<int:car_id>/resolve_diagnostic/<int:log_id>", methods=["POST"])
-def resolve_diagnostic(car_id, log_id):
+async def resolve_diagnostic(car_id, log_id):
     """Resolves a diagnostic issue."""
-    car = db.load_car_by_id(car_id)
+    car = await run_db(db.load_car_by_id, car_id)
     log_to_resolve = next(
         (log for log in car.diagnostic_logs if log["id"] == log_id), None
     )
@@ -225,7 +625,7 @@ def resolve_diagnostic(car_id, log_id):
         log_to_resolve["resolution"] = resolution
         log_to_resolve["resolved_date"] = datetime.date.today().isoformat()
 
-        db.resolve_diagnostic_log(log_to_resolve)
+        await run_db(db.resolve_diagnostic_log, log_to_resolve)
         flash("Diagnostic issue has been resolved.", "success")
 
     return redirect(url_for("car_detail", car_id=car_id))
@@ -233,4 +633,5 @@ def resolve_diagnostic(car_id, log_id):
 
 if __name__ == "__main__":
     # Run the app in debug mode for development
+    db.init_db()
     app.run(debug=True, port=8000)
@@ -0,0 +1,16 @@
+"""
+ASGI entry point for the web app.
+
+Run it under any ASGI server, for example:
+    uvicorn src.web.asgi:application --port 8000
+"""
+
+from asgiref.wsgi import WsgiToAsgi
+
+import src.database as db
+from src.web.app import app
+
+# Apply any pending migrations before the server starts serving requests
+db.init_db()
+
+application = WsgiToAsgi(app)
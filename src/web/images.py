@@ -0,0 +1,136 @@
+"""
+Content-addressed storage and thumbnails for car photo uploads.
+
+Uploads are stored under the sha256 of their bytes, so the same photo uploaded
+twice is kept once and a file name never changes content, which lets browsers
+cache it forever. Thumbnails are JPEGs in the "thumbs" subfolder, made by
+make_thumbnails() on a background pool. Pillow is optional: without it no
+thumbnails are made and pages fall back to the original images.
+"""
+
+import hashlib
+import os
+import re
+import tempfile
+
+from werkzeug.utils import secure_filename
+
+try:
+    from PIL import Image, ImageOps, UnidentifiedImageError
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+
+# Longest side, in pixels, of each thumbnail made for an upload
+THUMBNAIL_SIZES = (160, 640)
+THUMBNAIL_QUALITY = 80
+THUMBNAIL_DIR = "thumbs"
+
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp", ".bmp"}
+
+# Default number of bytes hashed and copied at a time by store_upload()
+CHUNK_SIZE = 64 * 1024
+
+_HASHED_NAME = re.compile(r"^[0-9a-f]{64}(\.[a-z]+)?$")
+
+
+def is_content_addressed(filename):
+    """True for names produced by store_upload(), whose content never changes."""
+    return bool(_HASHED_NAME.match(filename or ""))
+
+
+def content_hash(filename):
+    """The sha256 part of a content-addressed name."""
+    return os.path.splitext(filename)[0]
+
+
+def store_upload(stream, original_name, upload_dir, chunk_size=CHUNK_SIZE):
+    """
+    Copies an upload into upload_dir under the sha256 of its content and
+    returns the stored file name. The data goes to a temporary file first, so
+    a file with the final name is always complete; if that file already
+    exists, the copy is discarded.
+    """
+    extension = os.path.splitext(secure_filename(original_name or ""))[1].lower()
+    if extension not in IMAGE_EXTENSIONS:
+        extension = ""
+    digest = hashlib.sha256()
+    fd, partial_path = tempfile.mkstemp(suffix=".part", dir=upload_dir)
+    try:
+        with os.fdopen(fd, "wb") as f:
+            while True:
+                chunk = stream.read(chunk_size)
+                if not chunk:
+                    break
+                digest.update(chunk)
+                f.write(chunk)
+        filename = digest.hexdigest() + extension
+        path = os.path.join(upload_dir, filename)
+        if os.path.exists(path):
+            os.remove(partial_path)
+        else:
+            os.replace(partial_path, path)
+    except BaseException:
+        if os.path.exists(partial_path):
+            os.remove(partial_path)
+        raise
+    return filename
+
+
+def thumbnail_name(filename, size):
+    """Path, relative to the upload folder, of a thumbnail of filename."""
+    return f"{THUMBNAIL_DIR}/{os.path.splitext(filename)[0]}-{size}.jpg"
+
+
+def _is_unreadable(error):
+    """
+    True for errors about the image itself, which retrying cannot fix. Pillow
+    reports a file it cannot decode, such as a truncated one, as an OSError
+    without an errno; a system error such as a full disk has one.
+    """
+    if isinstance(error, (UnidentifiedImageError, Image.DecompressionBombError)):
+        return True
+    return isinstance(error, OSError) and error.errno is None
+
+
+def make_thumbnails(upload_dir, filename):
+    """
+    Writes every missing thumbnail of an upload. Returns the number written,
+    0 if Pillow is not installed, or None if the file is not a readable
+    image. Other errors, such as a full disk, are raised, so a later call can
+    try again. Each thumbnail is written to a temporary file of its own and
+    then renamed, so processes making the same one never mix their writes.
+    """
+    if Image is None:
+        return 0
+    missing = [
+        size for size in THUMBNAIL_SIZES
+        if not os.path.exists(os.path.join(upload_dir, thumbnail_name(filename, size)))
+    ]
+    if not missing:
+        return 0
+    try:
+        with Image.open(os.path.join(upload_dir, filename)) as original:
+            original = ImageOps.exif_transpose(original)
+            os.makedirs(os.path.join(upload_dir, THUMBNAIL_DIR), exist_ok=True)
+            if original.mode not in ("RGB", "L"):
+                original = original.convert("RGB")
+            # Largest first, so each smaller size is resized from the previous one
+            image = original
+            for size in sorted(missing, reverse=True):
+                image = image.copy()
+                image.thumbnail((size, size))
+                path = os.path.join(upload_dir, thumbnail_name(filename, size))
+                fd, partial_path = tempfile.mkstemp(suffix=".part", dir=os.path.dirname(path))
+                try:
+                    with os.fdopen(fd, "wb") as f:
+                        image.save(f, "JPEG", quality=THUMBNAIL_QUALITY, optimize=True, progressive=True)
+                    os.replace(partial_path, path)
+                except BaseException:
+                    if os.path.exists(partial_path):
+                        os.remove(partial_path)
+                    raise
+    except Exception as e:
+        if _is_unreadable(e):
+            return None
+        raise
+    return len(missing)
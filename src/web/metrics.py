@@ -0,0 +1,285 @@
+"""
+Request profiling and SQL timing for the web app, served in Prometheus text format.
+
+When enabled, every request is timed and split into phases: "sql" (executing
+statements and fetching rows), "render" (Jinja) and "python" (the rest, e.g.
+filtering). Statements are counted and timed by a sqlite3.Connection subclass,
+and those slower than SLOW_QUERY_MS are logged. The totals are served at
+/metrics and each response carries a Server-Timing header.
+
+Instrumentation is off unless CAR_TRACKER_METRICS=1 or enable() is called.
+While off, the request hooks return at once and connections are plain
+sqlite3 connections, so the overhead is a flag check per request.
+"""
+
+import contextvars
+import logging
+import os
+import sqlite3
+import threading
+import time
+
+from flask import Response, g, request, template_rendered, before_render_template
+
+import src.database as db
+
+logger = logging.getLogger(__name__)
+
+# Statements taking longer than this many milliseconds are logged
+SLOW_QUERY_MS = 100.0
+
+# Upper bounds, in seconds, of the request duration histogram buckets
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+enabled = False
+
+# Timings of the request being served. Database calls made on the pool threads
+# see it too, because run_db runs them in a copy of the request's context.
+_current = contextvars.ContextVar("request_timings", default=None)
+
+
+class RequestTimings:
+    __slots__ = ("start", "sql_seconds", "sql_count", "render_seconds", "render_start")
+
+    def __init__(self):
+        self.start = time.perf_counter()
+        self.sql_seconds = 0.0
+        self.sql_count = 0
+        self.render_seconds = 0.0
+        self.render_start = None
+
+
+class _Registry:
+    """Aggregated counters, keyed by Flask endpoint."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.requests = {}  # (endpoint, method, status) -> count
+            self.phase_seconds = {}  # (endpoint, phase) -> seconds
+            self.durations = {}  # endpoint -> [bucket counts..., count, sum]
+            self.sql_statements = {}  # endpoint -> count
+            self.sql_seconds = 0.0
+            self.slow_queries = 0
+
+    def add_sql(self, elapsed, slow, outside_request):
+        with self._lock:
+            self.sql_seconds += elapsed
+            self.slow_queries += slow
+            if outside_request:
+                self.sql_statements[""] = self.sql_statements.get("", 0) + 1
+
+    def add_request(self, endpoint, method, status, timings, total):
+        sql = timings.sql_seconds
+        render = timings.render_seconds
+        phases = {"sql": sql, "render": render, "python": max(total - sql - render, 0.0)}
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            for phase, seconds in phases.items():
+                self.phase_seconds[endpoint, phase] = self.phase_seconds.get((endpoint, phase), 0.0) + seconds
+            histogram = self.durations.setdefault(endpoint, [0] * len(DURATION_BUCKETS) + [0, 0.0])
+            for i, bound in enumerate(DURATION_BUCKETS):
+                if total <= bound:
+                    histogram[i] += 1
+            histogram[-2] += 1
+            histogram[-1] += total
+            self.sql_statements[endpoint] = self.sql_statements.get(endpoint, 0) + timings.sql_count
+
+    def render(self):
+        """Returns the metrics in Prometheus text exposition format."""
+        lines = []
+
+        def metric(name, kind, help_text, samples):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(_sample(name, labels, value) for labels, value in samples)
+
+        with self._lock:
+            metric(
+                "car_tracker_requests_total", "counter", "Requests served.",
+                [({"endpoint": e, "method": m, "status": s}, n) for (e, m, s), n in sorted(self.requests.items())],
+            )
+            metric(
+                "car_tracker_request_phase_seconds_total", "counter",
+                "Time spent serving requests, by phase (sql, render, python).",
+                [({"endpoint": e, "phase": p}, v) for (e, p), v in sorted(self.phase_seconds.items())],
+            )
+            name = "car_tracker_request_duration_seconds"
+            metric(name, "histogram", "Request duration.", [])
+            for endpoint, histogram in sorted(self.durations.items()):
+                for bound, count in zip((*DURATION_BUCKETS, "+Inf"), (*histogram[:-2], histogram[-2])):
+                    lines.append(_sample(f"{name}_bucket", {"endpoint": endpoint, "le": bound}, count))
+                lines.append(_sample(f"{name}_sum", {"endpoint": endpoint}, histogram[-1]))
+                lines.append(_sample(f"{name}_count", {"endpoint": endpoint}, histogram[-2]))
+            metric(
+                "car_tracker_sql_statements_total", "counter",
+                "SQL statements executed, by the endpoint that ran them (empty outside requests).",
+                [({"endpoint": e}, n) for e, n in sorted(self.sql_statements.items())],
+            )
+            metric("car_tracker_sql_seconds_total", "counter", "Time spent executing SQL.", [({}, self.sql_seconds)])
+            metric(
+                "car_tracker_slow_queries_total", "counter",
+                "SQL statements slower than the slow query threshold.", [({}, self.slow_queries)],
+            )
+        return "\n".join(lines) + "\n"
+
+
+def _sample(name, labels, value):
+    if not labels:
+        return f"{name} {value}"
+    label_text = ",".join(
+        '{}="{}"'.format(key, str(val).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for key, val in labels.items()
+    )
+    return f"{name}{{{label_text}}} {value}"
+
+
+registry = _Registry()
+
+
+def _record(sql, elapsed, statement=True):
+    """Adds a statement's execute or fetch time to the current request and the totals."""
+    timings = _current.get()
+    if timings is not None:
+        timings.sql_seconds += elapsed
+        timings.sql_count += statement
+    slow = statement and elapsed * 1000 >= SLOW_QUERY_MS
+    if slow:
+        logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, " ".join(sql.split()))
+    registry.add_sql(elapsed, slow, outside_request=statement and timings is None)
+
+
+class TimedCursor(sqlite3.Cursor):
+    """Cursor that reports the time spent executing statements and fetching rows."""
+
+    def _timed(self, method, sql, *args):
+        start = time.perf_counter()
+        try:
+            return method(sql, *args)
+        finally:
+            _record(sql, time.perf_counter() - start)
+
+    def execute(self, sql, parameters=()):
+        return self._timed(super().execute, sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self._timed(super().executemany, sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self._timed(super().executescript, sql_script)
+
+    def _fetch(self, method, *args):
+        start = time.perf_counter()
+        try:
+            return method(*args)
+        finally:
+            _record(None, time.perf_counter() - start, statement=False)
+
+    def fetchone(self):
+        return self._fetch(super().fetchone)
+
+    def fetchmany(self, size=None):
+        return self._fetch(super().fetchmany, self.arraysize if size is None else size)
+
+    def fetchall(self):
+        return self._fetch(super().fetchall)
+
+    def __next__(self):
+        return self._fetch(super().__next__)
+
+
+class TimedConnection(sqlite3.Connection):
+    """Connection whose cursors, including those of conn.execute(), are TimedCursors."""
+
+    def cursor(self, factory=TimedCursor):
+        return super().cursor(factory)
+
+    # The built-in shortcuts create plain cursors, so route them through cursor()
+    def execute(self, sql, parameters=()):
+        return self.cursor().execute(sql, parameters)
+
+    def executemany(self, sql, seq_of_parameters):
+        return self.cursor().executemany(sql, seq_of_parameters)
+
+    def executescript(self, sql_script):
+        return self.cursor().executescript(sql_script)
+
+
+def enable():
+    """
+    Turns instrumentation on. Only connections opened afterwards are timed, so
+    this closes the calling thread's connection; restart the app's pools with
+    start_executors() if they have already served requests.
+    """
+    global enabled
+    enabled = True
+    db.CONNECTION_FACTORY = TimedConnection
+    db.close_db_connection()
+
+
+def disable():
+    global enabled
+    enabled = False
+    db.CONNECTION_FACTORY = sqlite3.Connection
+    db.close_db_connection()
+
+
+def _before_request():
+    if enabled:
+        g.request_timings = RequestTimings()
+        g.request_timings_token = _current.set(g.request_timings)
+
+
+def _after_request(response):
+    timings = g.pop("request_timings", None)
+    if timings is None:
+        return response
+    _current.reset(g.pop("request_timings_token"))
+    total = time.perf_counter() - timings.start
+    endpoint = request.endpoint or ""
+    registry.add_request(endpoint, request.method, response.status_code, timings, total)
+    python = max(total - timings.sql_seconds - timings.render_seconds, 0.0)
+    response.headers["Server-Timing"] = ", ".join(
+        (
+            f"sql;dur={timings.sql_seconds * 1000:.2f};desc=\"statements: {timings.sql_count}\"",
+            f"render;dur={timings.render_seconds * 1000:.2f}",
+            f"python;dur={python * 1000:.2f}",
+            f"total;dur={total * 1000:.2f}",
+        )
+    )
+    return response
+
+
+def _template_starting(sender, template, context, **extra):
+    timings = _current.get()
+    if timings is not None:
+        timings.render_start = time.perf_counter()
+
+
+def _template_finished(sender, template, context, **extra):
+    timings = _current.get()
+    if timings is not None and timings.render_start is not None:
+        timings.render_seconds += time.perf_counter() - timings.render_start
+        timings.render_start = None
+
+
+def metrics():
+    """Serves the aggregated metrics, or 404 while instrumentation is off."""
+    if not enabled:
+        return Response("Metrics are disabled.\n", status=404, mimetype="text/plain")
+    return Response(registry.render(), mimetype="text/plain; version=0.0.4")
+
+
+def init_app(app):
+    """Registers the request hooks and the /metrics route on the app."""
+    app.before_request(_before_request)
+    app.after_request(_after_request)
+    before_render_template.connect(_template_starting, app)
+    template_rendered.connect(_template_finished, app)
+    app.add_url_rule("/metrics", "metrics", metrics)
+    if os.environ.get("CAR_TRACKER_METRICS") == "1":
+        enable()
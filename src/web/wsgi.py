@@ -0,0 +1,17 @@
+"""
+WSGI entry point for production servers.
+
+    gunicorn src.web.wsgi:application
+
+gunicorn.conf.py in the project root is picked up automatically: it preloads
+this module in the master process and starts the worker processes from it.
+"""
+
+import src.database as db
+from src.web.app import app
+
+# Runs once, in the master process when the app is preloaded, so pending
+# migrations are applied before any worker starts serving requests
+db.init_db()
+
+application = app
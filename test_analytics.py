@@ -0,0 +1,88 @@
+import unittest
+import os
+from src.car import Car
+import src.database as db
+import src.analytics as analytics
+
+
+class TestAnalytics(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db_file = "test_analytics_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        self.camry = Car("Toyota", "Camry", 2020, 30000, "VIN1", "PLATE1")
+        self.camry2 = Car("Toyota", "Camry", 2021, 10000, "VIN2", "PLATE2")
+        self.civic = Car("Honda", "Civic", 2019, 50000, "VIN3", "PLATE3")
+        for car in (self.camry, self.camry2, self.civic):
+            db.add_car(car)
+        self._log(self.camry, "oil change", 40, "2024-01-05")
+        self._log(self.camry, "Oil Change", 60, "2024-02-10")
+        self._log(self.camry2, "tire rotation", 100, "2024-01-20")
+        self._log(self.civic, "oil change", 50.5, "2024-02-01")
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _log(self, car, service, cost, date):
+        log = car.log_maintenance(service, cost, date=date)
+        db.add_maintenance_log(car.id, log)
+        return log
+
+    def _all_rollups(self, use_summaries):
+        return {group: analytics.cost_rollup(group, use_summaries) for group in analytics.GROUPS}
+
+    def test_rollups(self):
+        self.assertEqual(
+            analytics.cost_by_service(),
+            [
+                {"service": "oil change", "service_count": 3, "total_cost": 150.5, "average_cost": 50.17},
+                {"service": "tire rotation", "service_count": 1, "total_cost": 100.0, "average_cost": 100.0},
+            ],
+        )
+        self.assertEqual(
+            [(row["make"], row["model"], row["total_cost"]) for row in analytics.cost_by_make_model()],
+            [("Honda", "Civic", 50.5), ("Toyota", "Camry", 200.0)],
+        )
+        self.assertEqual(
+            [(row["month"], row["service_count"]) for row in analytics.cost_by_month()],
+            [("2024-01", 2), ("2024-02", 2)],
+        )
+        self.assertEqual(analytics.cost_by_car()[0], {"car_id": self.camry.id, "service_count": 2, "total_cost": 100.0, "average_cost": 50.0})
+        with self.assertRaises(ValueError):
+            analytics.cost_rollup("year")
+
+    def test_summaries_track_every_write(self):
+        """Test that the summary tables stay equal to the live GROUP BY results."""
+        analytics.enable_summaries()
+        self.assertTrue(analytics.summaries_enabled())
+        self.assertEqual(self._all_rollups(True), self._all_rollups(False))
+
+        log = self._log(self.civic, "brake inspection", 200, "2024-03-01")
+        self.assertEqual(self._all_rollups(True), self._all_rollups(False))
+        db.delete_maintenance_log(log["id"])
+        self.assertEqual(self._all_rollups(True), self._all_rollups(False))
+        db.add_logs_bulk("maintenance_logs", [(self.camry2.id, "oil change", 30, 10500, "2024-04-02")])
+        self.assertEqual(self._all_rollups(True), self._all_rollups(False))
+        # Deleting a car removes its logs through the foreign key cascade
+        db.delete_car_by_id(self.camry.id)
+        self.assertEqual(self._all_rollups(True), self._all_rollups(False))
+        self.assertEqual(len(analytics.cost_by_car()), 2)
+
+        analytics.disable_summaries()
+        self.assertFalse(analytics.summaries_enabled())
+        self.assertEqual(len(analytics.cost_by_car()), 2)
+
+    def test_rollups_use_the_cost_indexes(self):
+        conn = db.get_db_connection()
+        for group in ("car", "service", "month"):
+            plan = [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + analytics._ROLLUPS[group][1])]
+            self.assertTrue(any("COVERING INDEX" in step for step in plan), plan)
+
+
+if __name__ == "__main__":
+    unittest.main()
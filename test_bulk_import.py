@@ -0,0 +1,112 @@
+import unittest
+import io
+import os
+from src.car import Car
+import src.database as db
+from src.bulk_import import import_records, import_file, read_rows
+from src.history_manager import HistoryManager
+
+
+class TestBulkImport(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db_file = "test_bulk_import_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        self.car1 = Car("Toyota", "Camry", 2020, 30000, "VIN1", "PLATE1")
+        self.car2 = Car("Honda", "Civic", 2019, 50000, "VIN2", "PLATE2")
+        db.add_car(self.car1)
+        db.add_car(self.car2)
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_csv_import_skips_invalid_rows(self):
+        """Test that valid rows are imported in chunks and invalid ones are reported."""
+        stream = io.StringIO(
+            "vin,license_plate,service,cost,milage,date\n"
+            "vin1,,oil change,40,31000,2024-01-01\n"
+            ",plate2,tire rotation,60,49000,2024-02-01\n"
+            "VIN3,,oil change,40,1000,2024-01-01\n"
+            "VIN1,,oil change,abc,32000,2024-03-01\n"
+            "VIN1,,,40,32000,2024-03-01\n"
+            "VIN2,,oil change,40,52000,03/01/2024\n"
+            "VIN1,,brake inspection,120,35000,2024-04-01\n"
+            "VINX,PLATE2,oil change,40,50000,2024-05-01\n"
+            "VINX,PLATEX,oil change,40,50000,2024-05-01\n"
+        )
+        report = import_records("maintenance", read_rows(stream, "csv"), chunk_size=2)
+
+        self.assertEqual(report.imported, 4)
+        self.assertEqual(report.skipped, 5)
+        self.assertEqual([line for line, _ in report.errors], [4, 5, 6, 7, 10])
+        self.assertIn("VIN3", report.errors[0][1])
+        self.assertIn("VIN 'VINX' or license plate 'PLATEX'", report.errors[4][1])
+
+        car1 = db.load_car_by_id(self.car1.id)
+        car2 = db.load_car_by_id(self.car2.id)
+        self.assertEqual(len(car1.maintenance_logs), 2)
+        # The row with an unknown VIN found the car by its plate
+        self.assertEqual(len(car2.maintenance_logs), 2)
+        # Mileage is raised to the highest imported service, never lowered
+        self.assertEqual(car1.milage, 35000)
+        self.assertEqual(car2.milage, 50000)
+        self.assertEqual(report.cars_updated, 1)
+
+    def test_skipped_rows_do_not_raise_mileage(self):
+        """Test that a row rejected by the database does not count toward the car's mileage."""
+        def rows():
+            yield 2, {"vin": "VIN1", "service": "oil change", "cost": "40", "milage": "31000", "date": "2024-01-01"}
+            yield 3, {"vin": "VIN2", "service": "oil change", "cost": "40", "milage": "60000", "date": "2024-01-01"}
+            # Deleted after the cars were looked up, so its row breaks the foreign key
+            db.delete_car_by_id(self.car2.id)
+
+        report = import_records("maintenance", rows())
+
+        self.assertEqual(report.imported, 1)
+        self.assertEqual([line for line, _ in report.errors], [3])
+        self.assertEqual(report.cars_updated, 1)
+        self.assertEqual(db.load_car_by_id(self.car1.id).milage, 31000)
+
+    def test_jsonl_diagnostic_import(self):
+        stream = io.StringIO(
+            '{"vin": "VIN1", "description": "Noise", "code": "P0420", "date_logged": "2024-01-01"}\n'
+            "not json\n"
+            "\n"
+            '{"license_plate": "PLATE2", "description": "Leak", "date_logged": "2024-02-01",'
+            ' "status": "resolved", "resolution": "Seal", "resolved_date": "2024-02-03"}\n'
+            '{"vin": "VIN1", "description": "Rattle", "date_logged": "2024-01-01", "status": "pending"}\n'
+        )
+        report = import_records("diagnostic", read_rows(stream, "jsonl"))
+
+        self.assertEqual(report.imported, 2)
+        self.assertEqual([line for line, _ in report.errors], [2, 5])
+        car1 = db.load_car_by_id(self.car1.id)
+        car2 = db.load_car_by_id(self.car2.id)
+        self.assertEqual(car1.diagnostic_logs[0]["code"], "P0420")
+        self.assertEqual(car1.diagnostic_logs[0]["status"], "open")
+        self.assertEqual(car2.diagnostic_logs[0]["resolution"], "Seal")
+
+    def test_import_file_updates_service_index(self):
+        """Test that imported services reach the service index and are not undoable."""
+        path = "test_bulk_import.csv"
+        with open(path, "w") as f:
+            f.write("vin,service,cost,milage,date\nVIN2,Oil Change,40,50000,2024-05-01\n")
+        self.addCleanup(os.remove, path)
+
+        history = HistoryManager()
+        history.begin_action()
+        report = import_file("maintenance", path)
+        self.assertFalse(history.end_action())
+
+        self.assertEqual(report.imported, 1)
+        last_services = [row for row in db.load_last_services() if row[0] == self.car2.id]
+        self.assertEqual([row[1] for row in last_services], ["oil change"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 import unittest
 import datetime
-from src.car import Car
+from src.car import Car, SERVICE_INTERVALS
+from src.records import MaintenanceLog, DiagnosticLog
 
 
 class TestCar(unittest.TestCase):
@@ -86,6 +87,80 @@ class TestCar(unittest.TestCase):
 
         self.assertEqual(self.car.to_dict(), rehydrated_car.to_dict())
 
+    def test_deferred_logs_load_on_first_access(self):
+        """Test that lazily loaded logs are fetched once, on first access."""
+        calls = []
+
+        def loader(car_id):
+            calls.append(car_id)
+            return [{"service": "oil change", "cost": 50, "milage": 49000, "date": "2024-01-01"}], []
+
+        self.car.id = 7
+        self.car.defer_logs(loader, open_issue_count=2)
+        self.assertFalse(self.car.logs_loaded)
+        # The open issue count is available without loading the logs
+        self.assertIn("2 open issues", str(self.car))
+        self.assertEqual(calls, [])
+
+        self.assertEqual(len(self.car.maintenance_logs), 1)
+        self.assertEqual(self.car.diagnostic_logs, [])
+        self.assertEqual(self.car.open_issue_count, 0)
+        self.assertTrue(self.car.logs_loaded)
+        self.assertEqual(calls, [7])
+
+    def test_assigning_logs_skips_the_loader(self):
+        self.car.defer_logs(lambda car_id: self.fail("loader should not be called"))
+        self.car.maintenance_logs = []
+        self.car.diagnostic_logs = []
+        self.assertTrue(self.car.logs_loaded)
+        self.assertEqual(self.car.get_upcoming_services(), list(SERVICE_INTERVALS))
+
+    def test_car_has_no_instance_dict(self):
+        """Test that cars are slotted and reject unknown attributes."""
+        self.assertFalse(hasattr(self.car, "__dict__"))
+        with self.assertRaises(AttributeError):
+            self.car.colour = "red"
+
+
+class TestLogRecords(unittest.TestCase):
+
+    def test_log_methods_return_records(self):
+        car = Car("TestMake", "TestModel", 2020, 50000, "TESTVIN", "TESTPLATE", id=3)
+        log = car.log_maintenance("oil change", 50, date="2024-01-01")
+        issue = car.log_diagnostic("Noise", code="P0420")
+        self.assertIsInstance(log, MaintenanceLog)
+        self.assertIsInstance(issue, DiagnosticLog)
+        self.assertEqual(log.car_id, 3)
+        self.assertEqual(issue["status"], "open")
+        self.assertIsNone(issue["resolution"])
+
+    def test_dict_style_access(self):
+        """Test that records can be used wherever a log dict was expected."""
+        log = MaintenanceLog(service="oil change", cost=50, milage=1000, date="2024-01-01")
+        log["id"] = 9
+        self.assertEqual(log.id, 9)
+        self.assertEqual(log.get("service"), "oil change")
+        self.assertIsNone(log.get("unknown"))
+        self.assertIn("cost", log)
+        self.assertNotIn("unknown", log)
+        self.assertEqual(
+            dict(log),
+            {"id": 9, "car_id": None, "service": "oil change", "cost": 50, "milage": 1000, "date": "2024-01-01"},
+        )
+        self.assertEqual(log, dict(log))
+        with self.assertRaises(KeyError):
+            log["unknown"]
+        with self.assertRaises(KeyError):
+            log["unknown"] = 1
+        self.assertFalse(hasattr(log, "__dict__"))
+
+    def test_from_dict_fills_missing_fields(self):
+        issue = DiagnosticLog.from_dict({"description": "Noise", "status": "open"})
+        self.assertEqual(issue.description, "Noise")
+        self.assertIsNone(issue.resolved_date)
+        with self.assertRaises(TypeError):
+            DiagnosticLog(colour="red")
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,88 @@
+import unittest
+from src.car import Car
+from src.car_index import CarIndex, normalize
+
+
+def _car(car_id, vin, plate):
+    car = Car("Toyota", "Camry", 2020, 30000, vin, plate)
+    car.id = car_id
+    return car
+
+
+class TestCarIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.cars = [
+            _car(1, "1HGCM82633A004352", "ABC-123"),
+            _car(2, "1HGCM82633A004999", "ABC-456"),
+            _car(3, "JH4KA8260MC000000", "XYZ 789"),
+        ]
+        self.index = CarIndex(self.cars)
+
+    def test_exact_lookup(self):
+        self.assertIs(self.index.find("1HGCM82633A004352"), self.cars[0])
+        self.assertIs(self.index.find("xyz 789"), self.cars[2])
+        self.assertIsNone(self.index.find("ABC123"))
+        self.assertTrue(self.index.vin_exists("jh4ka8260mc000000"))
+        self.assertFalse(self.index.vin_exists("JH4KA8260MC000000", exclude_id=3))
+        self.assertTrue(self.index.license_plate_exists("ABC-456", exclude_id=1))
+
+    def test_prefix_search_is_normalized(self):
+        self.assertEqual(normalize(" abc-12 "), "ABC12")
+        self.assertEqual(self.index.search_prefix("1hgcm"), self.cars[:2])
+        self.assertEqual(self.index.search_prefix("abc 4"), [self.cars[1]])
+        self.assertEqual(self.index.search_prefix("xyz7"), [self.cars[2]])
+        self.assertEqual(self.index.search_prefix("1HG", limit=1), [self.cars[0]])
+        self.assertEqual(self.index.search_prefix("-"), [])
+        self.assertEqual(self.index.search_prefix("Q"), [])
+
+    def test_add_update_and_remove(self):
+        new_car = _car(4, "5YJSA1E26HF000001", "NEW-1")
+        self.index.add(new_car)
+        self.assertIs(self.index.find("NEW-1"), new_car)
+        self.assertEqual(self.index.search_prefix("5yj"), [new_car])
+
+        new_car.license_plate = "ABC-999"
+        self.index.update(new_car)
+        self.assertIsNone(self.index.find("NEW-1"))
+        self.assertEqual(self.index.search_prefix("new"), [])
+        self.assertEqual(self.index.search_prefix("ABC"), [self.cars[0], self.cars[1], new_car])
+
+        self.index.remove(self.cars[0])
+        self.index.remove(self.cars[0])  # Removing twice is harmless
+        self.assertIsNone(self.index.find("ABC-123"))
+        self.assertEqual(self.index.search_prefix("1HGCM"), [self.cars[1]])
+        self.assertEqual(len(self.index), 3)
+
+        # Rebuilding after a reload indexes exactly the new list
+        self.index.rebuild(self.cars[:1])
+        self.assertEqual(len(self.index), 1)
+        self.assertIsNone(self.index.find("5YJSA1E26HF000001"))
+        self.assertIs(self.index.find("ABC-123"), self.cars[0])
+
+    def test_rebuild_after_reload(self):
+        """Test that a reloaded list replaces the car objects and picks up undone edits."""
+        reloaded = [_car(1, "1HGCM82633A004352", "ABC-123"), _car(2, "1HGCM82633A004999", "UNDONE-1")]
+        self.index.rebuild(reloaded)
+        self.assertIs(self.index.find("ABC-123"), reloaded[0])
+        self.assertIs(self.index.find("UNDONE-1"), reloaded[1])
+        self.assertIsNone(self.index.find("ABC-456"))
+        self.assertIsNone(self.index.find("XYZ 789"))
+        self.assertEqual(self.index.search_prefix("abc"), [reloaded[0]])
+        self.assertEqual(self.index.search_prefix("1HG"), reloaded)
+
+        fleet = [_car(i, f"VIN{i:06d}", f"PLATE-{i}") for i in range(1, 101)]
+        self.index.rebuild(fleet)
+        edited = [_car(i, f"VIN{i:06d}", f"PLATE-{i}") for i in range(1, 100)]
+        edited[0].license_plate = "EDITED"
+        self.index.rebuild(edited)
+        self.assertEqual(len(self.index), 99)
+        self.assertIsNone(self.index.find("VIN000100"))
+        self.assertIs(self.index.find("edited"), edited[0])
+        # PLATE-1 became EDITED, leaving PLATE-10 to PLATE-19
+        self.assertEqual(self.index.search_prefix("plate1", limit=50), edited[9:19])
+        self.assertEqual(self.index._prefixes, sorted(self.index._prefixes))
+
+
+if __name__ == "__main__":
+    unittest.main()
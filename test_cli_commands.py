@@ -0,0 +1,98 @@
+import unittest
+import contextlib
+import io
+import json
+import os
+from unittest import mock
+from src.car import Car
+import src.database as db
+from src.cli import commands
+
+
+class TestCliCommands(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db_file = "test_cli_commands_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        self.camry = Car("Toyota", "Camry", 2020, 30000, "VIN1", "PLATE1")
+        self.civic = Car("Honda", "Civic", 2019, 50000, "VIN2", "PLATE2")
+        db.add_car(self.camry)
+        db.add_car(self.civic)
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _run(self, *argv, stdin=""):
+        """Runs a command and returns (exit status, parsed JSON output)."""
+        out = io.StringIO()
+        with contextlib.redirect_stdout(out), mock.patch("sys.stdin", io.StringIO(stdin)):
+            status = commands.main(list(argv))
+        return status, json.loads(out.getvalue())
+
+    def test_add_service_to_many_cars_in_one_transaction(self):
+        statements = []
+        db.get_db_connection().set_trace_callback(statements.append)
+        try:
+            status, output = self._run(
+                "add-service", "vin1", "-", "--service", "oil change", "--cost", "45", "--milage", "40000",
+                "--date", "2024-05-01", stdin="PLATE2\nPLATE1\n",
+            )
+        finally:
+            db.get_db_connection().set_trace_callback(None)
+
+        self.assertEqual(status, 0)
+        self.assertEqual(statements.count("COMMIT"), 1)
+        # PLATE1 names the same car as vin1, so it gets one record
+        self.assertEqual([result["car"]["vin"] for result in output["results"]], ["VIN1", "VIN2"])
+        self.assertEqual(output["results"][0]["log"]["date"], "2024-05-01")
+        self.assertEqual(db.load_car_by_id(self.camry.id).milage, 40000)
+        self.assertEqual(db.load_car_by_id(self.civic.id).milage, 50000)
+        self.assertEqual(len(db.load_car_by_id(self.civic.id).maintenance_logs), 1)
+
+    def test_unknown_target_writes_nothing(self):
+        status, output = self._run("log-diagnostic", "VIN1", "NOPE", "--description", "Noise")
+        self.assertEqual(status, 1)
+        self.assertEqual(output["results"], [])
+        self.assertEqual(output["errors"][0]["target"], "NOPE")
+        self.assertEqual(db.load_car_by_id(self.camry.id).diagnostic_logs, [])
+
+    def test_log_and_resolve_diagnostics(self):
+        _, output = self._run("log-diagnostic", "VIN1", "VIN2", "--description", "Noise", "--code", "P0300")
+        log_ids = [str(result["log"]["id"]) for result in output["results"]]
+
+        status, output = self._run("resolve", *log_ids, "--resolution", "Fixed")
+        self.assertEqual(status, 0)
+        self.assertEqual({result["log"]["status"] for result in output["results"]}, {"resolved"})
+        self.assertEqual(db.load_car_by_id(self.civic.id).diagnostic_logs[0]["resolution"], "Fixed")
+
+        status, output = self._run("resolve", log_ids[0], "999", "--resolution", "Again")
+        self.assertEqual(status, 1)
+        self.assertEqual(len(output["errors"]), 2)
+
+    def test_reminders_and_filter(self):
+        self._run("add-service", "VIN1", "--service", "oil change", "--cost", "45")
+        _, output = self._run("reminders", "--service", "oil change")
+        self.assertEqual([result["car"]["vin"] for result in output["results"]], ["VIN2"])
+        _, output = self._run("reminders", "PLATE1")
+        self.assertNotIn("oil change", output["results"][0]["due"])
+
+        with mock.patch.object(commands, "FILTER_PAGE_SIZE", 1):
+            _, output = self._run("filter")
+            self.assertEqual([car["make"] for car in output["results"]], ["Honda", "Toyota"])
+            _, output = self._run("filter", "--max-mileage", "40000")
+            self.assertEqual([car["vin"] for car in output["results"]], ["VIN1"])
+            _, output = self._run("filter", "--limit", "1")
+            self.assertEqual(len(output["results"]), 1)
+
+        for limit in ("0", "-1"):
+            with contextlib.redirect_stderr(io.StringIO()), self.assertRaises(SystemExit):
+                commands.main(["filter", "--limit", limit])
+
+
+if __name__ == "__main__":
+    unittest.main()
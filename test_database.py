@@ -1,8 +1,14 @@
 import unittest
 import os
 import sqlite3
+import datetime
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
 from src.car import Car
+from src.records import MaintenanceLog, DiagnosticLog
+from src.history_manager import HistoryManager
 import src.database as db
+from src.search_filter import _apply_filters
 
 
 class TestDatabase(unittest.TestCase):
@@ -25,8 +31,10 @@ class TestDatabase(unittest.TestCase):
         Clean up by removing the temporary database file after each test.
         This method is called after each test function is executed.
         """
-        if os.path.exists(self.test_db_file):
-            os.remove(self.test_db_file)
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
 
     def test_add_and_load_car(self):
         """Test adding a car and loading it back from the database."""
@@ -128,6 +136,510 @@ class TestDatabase(unittest.TestCase):
         self.assertEqual(len(loaded_cars), 1)
         self.assertEqual(loaded_cars[0].vin, "VIN6")
 
+    def test_lazy_loading(self):
+        """Test that lazily loaded cars read their logs only when accessed."""
+        car = Car("Ford", "Focus", 2018, 70000, "VIN3", "PLATE3")
+        db.add_car(car)
+        db.add_maintenance_log(car.id, car.log_maintenance("oil change", 50))
+        db.add_diagnostic_log(car.id, car.log_diagnostic("Rattling noise"))
+
+        statements = []
+        db.get_db_connection().set_trace_callback(statements.append)
+        try:
+            lazy_car = db.load_all_cars(lazy=True)[0]
+            self.assertEqual(len(statements), 1)
+            self.assertFalse(lazy_car.logs_loaded)
+            self.assertEqual(lazy_car.open_issue_count, 1)
+            self.assertEqual(len(statements), 1)
+
+            self.assertEqual(lazy_car.maintenance_logs[0]["service"], "oil change")
+            self.assertEqual(len(statements), 3)
+        finally:
+            db.get_db_connection().set_trace_callback(None)
+
+        self.assertEqual(lazy_car.to_dict(), db.load_all_cars()[0].to_dict())
+
+    def test_prefetch_logs(self):
+        """Test that prefetching fills in the logs of many lazy cars at once."""
+        for i in range(5):
+            car = Car("Make", f"Model{i}", 2020, 1000, f"VIN{i}", f"PLATE{i}")
+            db.add_car(car)
+            for _ in range(i):
+                db.add_maintenance_log(car.id, car.log_maintenance("oil change", 50))
+        db.PREFETCH_BATCH_SIZE, batch_size = 2, db.PREFETCH_BATCH_SIZE
+        try:
+            lazy_cars = db.load_all_cars(lazy=True)
+            db.prefetch_logs(lazy_cars)
+        finally:
+            db.PREFETCH_BATCH_SIZE = batch_size
+
+        self.assertTrue(all(car.logs_loaded for car in lazy_cars))
+        self.assertEqual(
+            [car.to_dict() for car in lazy_cars],
+            [car.to_dict() for car in db.load_all_cars()],
+        )
+
+    def test_json_hydration_matches_stitching(self):
+        """Test that both hydration modes build identical cars."""
+        car1 = Car("Toyota", "Camry", 2020, 30000, "VIN1", "PLATE1")
+        car2 = Car("Honda", "Civic", 2019, 50000, "VIN2", "PLATE2")
+        db.add_car(car1)
+        db.add_car(car2)
+        db.add_maintenance_log(car1.id, car1.log_maintenance("oil change", 40, date="2024-01-01"))
+        db.add_maintenance_log(car1.id, car1.log_maintenance("tire rotation", 60.5, date="2024-02-01"))
+        db.add_diagnostic_log(car1.id, car1.log_diagnostic("Noise \"rattle\"", code="P0420"))
+
+        def load_everything():
+            db.clear_car_cache()
+            return (
+                [car.to_dict() for car in db.load_all_cars()],
+                [car.to_dict() for car in db.load_filtered_cars({"make": "toy"})],
+                db.load_car_by_id(car1.id).to_dict(),
+                db.load_car_by_id(car2.id).to_dict(),
+                db.load_car_by_id(999),
+            )
+
+        stitched = load_everything()
+        with mock.patch.object(db, "HYDRATION_MODE", "json"):
+            nested = load_everything()
+            self.assertIsInstance(db.load_car_by_id(car1.id).maintenance_logs[0], MaintenanceLog)
+        self.assertEqual(stitched, nested)
+        self.assertEqual(nested[3]["maintenance_logs"], [])
+
+        with mock.patch.object(db, "HYDRATION_MODE", "xml"):
+            with self.assertRaises(ValueError):
+                db.load_all_cars()
+
+    def test_connection_is_reused_within_a_thread(self):
+        """Test that repeated calls share one connection with the PRAGMAs applied."""
+        conn = db.get_db_connection()
+        self.assertIs(db.get_db_connection(), conn)
+        self.assertEqual(conn.execute("PRAGMA journal_mode").fetchone()[0], "wal")
+        self.assertEqual(conn.execute("PRAGMA foreign_keys").fetchone()[0], 1)
+
+    def test_transaction_commits_once(self):
+        """Test that calls inside a transaction are committed together."""
+        car = Car("Kia", "Rio", 2017, 60000, "VIN7", "PLATE7")
+        with db.transaction():
+            db.add_car(car)
+            db.add_maintenance_log(car.id, car.log_maintenance("oil change", 45))
+            # Nothing is visible to other connections before the block ends
+            other = sqlite3.connect(self.test_db_file)
+            self.assertEqual(other.execute("SELECT COUNT(*) FROM cars").fetchone()[0], 0)
+            other.close()
+
+        loaded_car = db.load_car_by_id(car.id)
+        self.assertEqual(len(loaded_car.maintenance_logs), 1)
+
+    def test_transaction_rolls_back_on_error(self):
+        """Test that an exception inside a transaction discards all of its writes."""
+        car = Car("Kia", "Soul", 2019, 30000, "VIN8", "PLATE8")
+        with self.assertRaises(sqlite3.IntegrityError):
+            with db.transaction():
+                db.add_car(car)
+                # A duplicate VIN violates the UNIQUE constraint
+                db.add_car(Car("Kia", "Soul", 2019, 30000, "VIN8", "PLATE9"))
+
+        self.assertEqual(db.load_all_cars(), [])
+
+    def test_unit_of_work_commits_once(self):
+        """Test that a unit of work saves a log and the mileage it raised in one commit."""
+        car = Car("Kia", "Ceed", 2018, 40000, "VIN11", "PLATE11")
+        db.add_car(car)
+        statements = []
+        db.get_db_connection().set_trace_callback(statements.append)
+        try:
+            with mock.patch.object(db, "update_car_details", wraps=db.update_car_details) as update_car_details:
+                with db.UnitOfWork() as work:
+                    work.add_maintenance_log(car.id, car.log_maintenance("oil change", 45, milage=42000))
+                    work.update_car(car)
+                    car.license_plate = "PLATE12"
+                    work.update_car(car)  # Saved once, with the latest details
+                    self.assertEqual(len(work), 2)
+        finally:
+            db.get_db_connection().set_trace_callback(None)
+
+        self.assertEqual(statements.count("COMMIT"), 1)
+        # The trace repeats a statement for each trigger it fires, so count the calls
+        self.assertEqual(update_car_details.call_count, 1)
+        loaded_car = db.load_car_by_id(car.id)
+        self.assertEqual((loaded_car.milage, loaded_car.license_plate), (42000, "PLATE12"))
+        self.assertEqual(len(loaded_car.maintenance_logs), 1)
+        self.assertEqual(db.UnitOfWork().commit(), 0)
+
+    def test_unit_of_work_saves_nothing_on_error(self):
+        """Test that a failing write, or an error in the block, discards the whole unit."""
+        car = Car("Kia", "Ceed", 2018, 40000, "VIN11", "PLATE11")
+        other = Car("Kia", "Niro", 2021, 10000, "VIN12", "PLATE12")
+        db.add_car(car)
+        db.add_car(other)
+
+        work = db.UnitOfWork()
+        work.add_diagnostic_log(car.id, car.log_diagnostic("Noise"))
+        car.license_plate = other.license_plate  # Violates the UNIQUE constraint
+        work.update_car(car)
+        with self.assertRaises(sqlite3.IntegrityError):
+            work.commit()
+        self.assertEqual(len(work), 0)
+
+        with self.assertRaises(RuntimeError):
+            with db.UnitOfWork() as work:
+                work.add_diagnostic_log(car.id, car.log_diagnostic("Rattle"))
+                raise RuntimeError("abort")
+
+        loaded_car = db.load_car_by_id(car.id)
+        self.assertEqual(loaded_car.license_plate, "PLATE11")
+        self.assertEqual(loaded_car.diagnostic_logs, [])
+
+    def test_find_cars_with_more_keys_than_one_batch(self):
+        """Test that find_cars stays under SQLite's historical limit of 999 bound variables."""
+        with db.transaction():
+            for i in range(600):
+                db.add_car(Car("Make", "Model", 2020, 1000, f"VIN{i}", f"PLATE{i}"))
+        keys = [f"vin{i}" for i in range(300)] + [f"PLATE{i}" for i in range(300, 600)] + ["NOPE"]
+        conn = db.get_db_connection()
+        limit = conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, 999)
+        try:
+            found = db.find_cars(keys)
+        finally:
+            conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, limit)
+
+        self.assertEqual(len(found), 600)
+        self.assertEqual(found["VIN0"]["license_plate"], "PLATE0")
+        self.assertEqual(found["PLATE599"]["vin"], "VIN599")
+
+    def test_versions_change_with_every_write(self):
+        """Test that writes bump the fleet version and the written car's, and nothing else."""
+        car = Car("Mazda", "3", 2020, 20000, "VIN9", "PLATE9")
+        other = Car("Mazda", "6", 2020, 20000, "VIN10", "PLATE10")
+        db.add_car(car)
+        db.add_car(other)
+        fleet, car_version, other_version = db.get_fleet_version(), db.get_car_version(car.id), db.get_car_version(other.id)
+
+        db.add_maintenance_log(car.id, car.log_maintenance("oil change", 45))
+        self.assertGreater(db.get_fleet_version()[0], fleet[0])
+        self.assertEqual(db.get_car_version(car.id)[0], db.get_fleet_version()[0])
+        self.assertEqual(db.get_car_version(other.id), other_version)
+
+        # A rolled back write leaves every version as it was
+        fleet, car_version = db.get_fleet_version(), db.get_car_version(car.id)
+        with self.assertRaises(RuntimeError):
+            with db.transaction():
+                db.raise_car_mileages({car.id: 90000})
+                raise RuntimeError("abort")
+        self.assertEqual((db.get_fleet_version(), db.get_car_version(car.id)), (fleet, car_version))
+
+        # Restoring a snapshot changes every car's version
+        db.reset_database([c.to_dict() for c in db.load_all_cars()])
+        self.assertNotEqual(db.get_car_version(other.id), other_version)
+        self.assertNotEqual(db.get_car_version(car.id), car_version)
+
+
+class TestFilterQuery(unittest.TestCase):
+    """Checks the SQL filter path against the Python reference _apply_filters."""
+
+    def setUp(self):
+        self.test_db_file = "test_filter_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        today = datetime.date.today()
+        old_date = (today - datetime.timedelta(days=400)).isoformat()
+        recent_date = (today - datetime.timedelta(days=10)).isoformat()
+
+        toyota = Car("Toyota", "Camry", 2018, 78500, "VIN001", "ABC-123")
+        mustang = Car("Ford", "Mustang", 2022, 15200, "VIN002", "XYZ-789")
+        honda = Car("Honda", "CR-V", 2020, 45000, "VIN003", "DEF-456")
+        focus = Car("Ford", "Focus", 2015, 120000, "VIN004", "GHI-012")
+        for car in (toyota, mustang, honda, focus):
+            db.add_car(car)
+
+        # Recent oil change, old tire rotation
+        db.add_maintenance_log(
+            toyota.id, toyota.log_maintenance("Oil Change", 75, 78000, recent_date)
+        )
+        db.add_maintenance_log(
+            toyota.id, toyota.log_maintenance("tire rotation", 40, 77000, old_date)
+        )
+        # Oil change that is overdue by mileage only
+        db.add_maintenance_log(
+            honda.id, honda.log_maintenance("oil change", 60, 39000, recent_date)
+        )
+        # An older record followed by a recent one
+        db.add_maintenance_log(
+            focus.id, focus.log_maintenance("oil change", 60, 100000, old_date)
+        )
+        db.add_maintenance_log(
+            focus.id, focus.log_maintenance("oil change", 60, 119000, recent_date)
+        )
+
+        issue = mustang.log_diagnostic("Check engine light", code="P0420")
+        db.add_diagnostic_log(mustang.id, issue)
+        resolved = focus.log_diagnostic("Rattling noise")
+        db.add_diagnostic_log(focus.id, resolved)
+        db.resolve_diagnostic_log(focus.resolve_diagnostic(0, "Tightened heat shield"))
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def assertMatchesReference(self, filters):
+        expected = _apply_filters(db.load_all_cars(), filters)
+        actual = db.load_filtered_cars(filters)
+        self.assertEqual(
+            [car.to_dict() for car in actual], [car.to_dict() for car in expected]
+        )
+
+    def test_no_filters_returns_everything(self):
+        self.assertEqual(len(db.load_filtered_cars({})), 4)
+        self.assertMatchesReference({})
+
+    def test_text_filters_are_case_insensitive_substrings(self):
+        self.assertMatchesReference({"make": "ford"})
+        self.assertMatchesReference({"model": "R-"})
+        self.assertMatchesReference({"make": "FORD", "model": "us"})
+
+    def test_numeric_filters(self):
+        self.assertMatchesReference({"min_year": 2018})
+        self.assertMatchesReference({"max_year": 2020})
+        self.assertMatchesReference({"min_year": 2016, "max_year": 2021})
+        self.assertMatchesReference({"max_mileage": 78500})
+
+    def test_open_issues_filter(self):
+        self.assertMatchesReference({"has_open_issues": True})
+        self.assertMatchesReference({"has_open_issues": False})
+
+    def test_needs_service_filter(self):
+        for service_type in ("oil change", "tire rotation", "timing belt"):
+            self.assertMatchesReference({"needs_service_type": service_type})
+        self.assertMatchesReference({"needs_service_type": "unknown service"})
+
+    def test_combined_filters(self):
+        self.assertMatchesReference(
+            {"make": "o", "max_mileage": 100000, "needs_service_type": "oil change"}
+        )
+        self.assertMatchesReference({"min_year": 2015, "has_open_issues": True})
+
+    def _walk_pages(self, filters, limit):
+        """Follows next keys from the first page to the last one."""
+        pages = []
+        cars, next_key, prev_key = db.load_cars_page(filters, limit)
+        self.assertIsNone(prev_key)
+        pages.append(cars)
+        while next_key:
+            cars, next_key, prev_key = db.load_cars_page(filters, limit, after=next_key)
+            self.assertIsNotNone(prev_key)
+            pages.append(cars)
+        return pages
+
+    def test_pages_cover_all_matching_cars_in_order(self):
+        for filters in ({}, {"make": "o"}, {"needs_service_type": "oil change"}):
+            expected = [car.to_dict() for car in db.load_filtered_cars(filters)]
+            for limit in (1, 2, 3, 10):
+                pages = self._walk_pages(filters, limit)
+                self.assertTrue(all(len(page) <= limit for page in pages))
+                self.assertEqual(
+                    [car.to_dict() for page in pages for car in page], expected
+                )
+
+    def test_previous_page_returns_the_same_rows(self):
+        first, next_key, _ = db.load_cars_page({}, 2)
+        second, _, prev_key = db.load_cars_page({}, 2, after=next_key)
+        back, next_again, prev_again = db.load_cars_page({}, 2, before=prev_key)
+        self.assertEqual([car.id for car in back], [car.id for car in first])
+        self.assertIsNone(prev_again)
+        self.assertEqual(next_again, next_key)
+        self.assertNotEqual([car.id for car in second], [car.id for car in first])
+
+    def test_only_matching_logs_are_loaded(self):
+        results = db.load_filtered_cars({"make": "Honda"})
+        self.assertEqual(len(results), 1)
+        self.assertEqual(len(results[0].maintenance_logs), 1)
+        self.assertEqual(results[0].maintenance_logs[0]["car_id"], results[0].id)
+
+
+class TestCarCache(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db_file = "test_car_cache_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        self.car = Car("Toyota", "Camry", 2020, 30000, "VIN1", "PLATE1")
+        db.add_car(self.car)
+        db.add_maintenance_log(self.car.id, self.car.log_maintenance("oil change", 40, date="2024-01-01"))
+        db.add_diagnostic_log(self.car.id, self.car.log_diagnostic("Noise"))
+        self.other = Car("Honda", "Civic", 2019, 50000, "VIN2", "PLATE2")
+        db.add_car(self.other)
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _uncached(self, car_id):
+        db.clear_car_cache()
+        car = db.load_car_by_id(car_id)
+        return car.to_dict() if car else None
+
+    def _snapshot(self, car_id):
+        car = db.load_car_by_id(car_id)
+        return car.to_dict() if car else None
+
+    def test_hits_and_misses(self):
+        db.clear_car_cache()
+        before = db.car_cache_info()
+        db.load_car_by_id(self.car.id)
+        db.load_car_by_id(self.car.id)
+        db.load_car_by_id(self.car.id)
+        info = db.car_cache_info()
+        self.assertEqual(info["misses"] - before["misses"], 1)
+        self.assertEqual(info["hits"] - before["hits"], 2)
+        self.assertEqual(info["size"], 1)
+
+    def test_hits_return_independent_cars(self):
+        """Test that modifying a loaded car does not change the cached copy."""
+        car = db.load_car_by_id(self.car.id)
+        car.milage = 1
+        car.diagnostic_logs[0]["status"] = "resolved"
+        again = db.load_car_by_id(self.car.id)
+        self.assertEqual(again.milage, 30000)
+        self.assertEqual(again.diagnostic_logs[0]["status"], "open")
+
+    def test_size_and_ttl_bounds(self):
+        with mock.patch.object(db, "CAR_CACHE_SIZE", 1):
+            db.load_car_by_id(self.car.id)
+            db.load_car_by_id(self.other.id)
+            self.assertEqual(db.car_cache_info()["size"], 1)
+        with mock.patch.object(db, "CAR_CACHE_TTL", 0):
+            misses = db.car_cache_info()["misses"]
+            db.load_car_by_id(self.other.id)
+            self.assertEqual(db.car_cache_info()["misses"], misses + 1)
+
+    def test_no_stale_reads_after_any_write(self):
+        """Test that every write function invalidates the cached car it touches."""
+        car_id = self.car.id
+        maint_log = db.load_car_by_id(car_id).maintenance_logs[0]
+        diag_log = db.load_car_by_id(car_id).diagnostic_logs[0]
+
+        def update():
+            car = db.load_car_by_id(car_id)
+            car.milage = 99999
+            db.update_car_details(car)
+
+        def resolve():
+            log = DiagnosticLog.from_dict(dict(diag_log))
+            log["status"] = "resolved"
+            log["resolution"] = "Fixed"
+            log["resolved_date"] = "2024-02-01"
+            db.resolve_diagnostic_log(log)
+
+        def add_maintenance():
+            db.add_maintenance_log(car_id, MaintenanceLog(service="tire rotation", cost=60, milage=1, date="2024-03-01"))
+
+        def add_diagnostic():
+            db.add_diagnostic_log(car_id, DiagnosticLog(description="Leak", date_logged="2024-03-01", status="open"))
+
+        def delete_and_restore_car():
+            snapshot = db.load_car_by_id(car_id)
+            db.delete_car_by_id(car_id)
+            self.assertIsNone(self._snapshot(car_id))
+            data = snapshot.to_dict()
+            db.restore_car(data, data["maintenance_logs"], data["diagnostic_logs"])
+
+        def reset():
+            snapshot = db.load_car_by_id(car_id).to_dict()
+            snapshot["milage"] = 12345
+            db.reset_database([snapshot])
+
+        writes = [
+            update,
+            resolve,
+            add_maintenance,
+            add_diagnostic,
+            lambda: db.delete_maintenance_log(maint_log["id"]),
+            lambda: db.restore_maintenance_log(maint_log),
+            lambda: db.delete_diagnostic_log(diag_log["id"]),
+            lambda: db.restore_diagnostic_log(diag_log),
+            lambda: db.add_logs_bulk("maintenance_logs", [(car_id, "oil change", 40, 1, "2024-04-01")]),
+            lambda: db.raise_car_mileages({car_id: 200000}),
+            delete_and_restore_car,
+            reset,
+        ]
+        for write in writes:
+            self._snapshot(car_id)  # Make sure the car is cached
+            write()
+            self.assertEqual(self._snapshot(car_id), self._uncached(car_id))
+
+    def test_rolled_back_writes_are_not_served(self):
+        before = self._snapshot(self.car.id)
+        with self.assertRaises(RuntimeError):
+            with db.transaction():
+                car = db.load_car_by_id(self.car.id)
+                car.milage = 1
+                db.update_car_details(car)
+                # Reads inside the transaction see the uncommitted change
+                self.assertEqual(db.load_car_by_id(self.car.id).milage, 1)
+                raise RuntimeError("abort")
+        self.assertEqual(self._snapshot(self.car.id), before)
+
+    def test_writes_from_other_processes_are_not_served_stale(self):
+        """Test that a commit made through another connection empties the cache."""
+        self.assertEqual(db.load_car_by_id(self.car.id).milage, 30000)
+        other = sqlite3.connect(self.test_db_file)
+        other.execute("UPDATE cars SET milage = 45000 WHERE id = ?", (self.car.id,))
+        other.commit()
+        other.close()
+        self.assertEqual(db.load_car_by_id(self.car.id).milage, 45000)
+
+    def test_writes_from_other_threads_keep_unrelated_cars_cached(self):
+        """Test that a commit on another thread of this process drops only the cars it changed."""
+        def write():
+            car = db.load_car_by_id(self.car.id)
+            car.milage = 40000
+            db.update_car_details(car)
+
+        # Like a web pool thread, the writer has looked at the database before
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(db.load_car_by_id, self.car.id).result()
+            db.load_car_by_id(self.car.id)
+            db.load_car_by_id(self.other.id)
+            pool.submit(write).result()
+            pool.submit(db.close_db_connection).result()
+
+        before = db.car_cache_info()
+        self.assertEqual(db.load_car_by_id(self.other.id).milage, 50000)
+        self.assertEqual(db.car_cache_info()["hits"] - before["hits"], 1)
+        self.assertEqual(db.load_car_by_id(self.car.id).milage, 40000)
+
+    def test_external_writes_alongside_other_threads_are_not_served_stale(self):
+        """Test that an outside commit is noticed even when a thread of this process also committed."""
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pool.submit(db.load_car_by_id, self.car.id).result()
+            self.assertEqual(db.load_car_by_id(self.car.id).milage, 30000)
+            other = sqlite3.connect(self.test_db_file)
+            other.execute("UPDATE cars SET milage = 999 WHERE id = ?", (self.car.id,))
+            other.commit()
+            other.close()
+            pool.submit(db.add_car, Car("Kia", "Rio", 2021, 100, "VIN3", "PLATE3")).result()
+            pool.submit(db.close_db_connection).result()
+
+        self.assertEqual(db.load_car_by_id(self.car.id).milage, 999)
+
+    def test_undo_is_not_served_stale(self):
+        history = HistoryManager()
+        history.begin_action()
+        car = db.load_car_by_id(self.car.id)
+        car.milage = 40000
+        db.update_car_details(car)
+        history.end_action()
+        self.assertEqual(db.load_car_by_id(self.car.id).milage, 40000)
+        history.undo()
+        self.assertEqual(db.load_car_by_id(self.car.id).milage, 30000)
+
 
 if __name__ == "__main__":
     unittest.main()
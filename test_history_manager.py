@@ -1,71 +1,143 @@
 import unittest
+import os
 from src.car import Car
+import src.database as db
 from src.history_manager import HistoryManager
 
 
 class TestHistoryManager(unittest.TestCase):
 
     def setUp(self):
+        self.test_db_file = "test_history_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
         self.history = HistoryManager()
         self.car1 = Car("Make1", "Model1", 2020, 10000, "VIN1", "PLATE1")
         self.car2 = Car("Make2", "Model2", 2021, 20000, "VIN2", "PLATE2")
-        self.initial_state = [self.car1, self.car2]
+        db.add_car(self.car1)
+        db.add_car(self.car2)
+
+    def tearDown(self):
+        self.history.end_action()
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _fleet(self):
+        """Returns the whole database as plain data for comparisons."""
+        return [car.to_dict() for car in db.load_all_cars()]
+
+    def _record(self, action):
+        self.history.begin_action()
+        action()
+        return self.history.end_action()
 
-    def test_record_state(self):
-        """Test that recording a state adds to undo stack and clears redo stack."""
-        self.history.record_state(self.initial_state)
+    def assertUndoRedoRoundTrip(self, action):
+        """Runs an action, then checks undo restores the old state and redo the new one."""
+        before = self._fleet()
+        self.assertTrue(self._record(action))
+        after = self._fleet()
+        self.assertNotEqual(before, after)
+
+        self.assertTrue(self.history.undo())
+        self.assertEqual(self._fleet(), before)
+        self.assertTrue(self.history.redo())
+        self.assertEqual(self._fleet(), after)
+
+    def test_record_action(self):
+        """Test that recording an action adds to the undo stack and clears the redo stack."""
+        self._record(lambda: db.add_car(Car("Make3", "Model3", 2022, 300, "VIN3", "PLATE3")))
         self.assertEqual(len(self.history.undo_stack), 1)
         self.assertEqual(len(self.history.redo_stack), 0)
 
-    def test_undo_and_redo(self):
-        """Test the full undo and redo cycle."""
-        # 1. Record initial state
-        self.history.record_state(self.initial_state)
-
-        # 2. Make a change (create a new list representing the modified state)
-        modified_state = self.initial_state + [
-            Car("Make3", "Model3", 2022, 300, "VIN3", "PLATE3")
-        ]
-
-        # 3. Undo the change
-        undone_state = self.history.undo(modified_state)
-        self.assertEqual(len(undone_state), 2)
-        self.assertEqual(undone_state[0].vin, "VIN1")
-        self.assertEqual(
-            len(self.history.redo_stack), 1
-        )  # The modified state should be in redo stack
-
-        # 4. Redo the change
-        redone_state = self.history.redo(undone_state)
-        self.assertEqual(len(redone_state), 3)
-        self.assertEqual(redone_state[2].vin, "VIN3")
-        self.assertEqual(
-            len(self.history.undo_stack), 1
-        )  # The initial state is back on the undo stack
+    def test_action_without_changes_is_not_recorded(self):
+        self.assertFalse(self._record(lambda: db.check_vin_exists("VIN1")))
+        self.assertEqual(len(self.history.undo_stack), 0)
+
+    def test_undo_redo_add_car(self):
+        self.assertUndoRedoRoundTrip(
+            lambda: db.add_car(Car("Make3", "Model3", 2022, 300, "VIN3", "PLATE3"))
+        )
+
+    def test_undo_redo_update_mileage(self):
+        def update():
+            self.car1.milage = 12345
+            db.update_car_details(self.car1)
+
+        self.assertUndoRedoRoundTrip(update)
+
+    def test_undo_redo_add_logs(self):
+        def add_logs():
+            db.add_maintenance_log(self.car1.id, self.car1.log_maintenance("oil change", 50))
+            db.add_diagnostic_log(self.car1.id, self.car1.log_diagnostic("Noise"))
+
+        self.assertUndoRedoRoundTrip(add_logs)
+
+    def test_undo_redo_resolve_diagnostic(self):
+        db.add_diagnostic_log(self.car2.id, self.car2.log_diagnostic("Check engine light"))
+        self.assertUndoRedoRoundTrip(
+            lambda: db.resolve_diagnostic_log(self.car2.resolve_diagnostic(0, "Fixed"))
+        )
+
+    def test_undo_redo_delete_car_with_logs(self):
+        db.add_maintenance_log(self.car1.id, self.car1.log_maintenance("oil change", 50))
+        db.add_diagnostic_log(self.car1.id, self.car1.log_diagnostic("Noise"))
+        self.assertUndoRedoRoundTrip(lambda: db.delete_car_by_id(self.car1.id))
+
+    def test_undo_reverts_multi_step_action_in_one_go(self):
+        def add_car_with_log():
+            car = Car("Make3", "Model3", 2022, 300, "VIN3", "PLATE3")
+            db.add_car(car)
+            db.add_maintenance_log(car.id, car.log_maintenance("tire rotation", 40))
+
+        self.assertUndoRedoRoundTrip(add_car_with_log)
+        self.assertEqual(len(self.history.undo_stack), 1)
 
     def test_new_action_clears_redo_stack(self):
         """Test that a new action after an undo clears the redo history."""
-        self.history.record_state(self.initial_state)
-        modified_state = self.initial_state + [
-            Car("Make3", "Model3", 2022, 300, "VIN3", "PLATE3")
-        ]
-
-        # Undo, which populates the redo stack
-        undone_state = self.history.undo(modified_state)
+        self._record(lambda: db.delete_car_by_id(self.car2.id))
+        self.history.undo()
         self.assertEqual(len(self.history.redo_stack), 1)
 
-        # Record a new, different action
-        self.history.record_state(undone_state)
-        self.assertEqual(
-            len(self.history.redo_stack), 0
-        )  # Redo stack should now be empty
+        self._record(lambda: db.delete_car_by_id(self.car1.id))
+        self.assertEqual(len(self.history.redo_stack), 0)
+
+    def test_nothing_to_undo_or_redo(self):
+        self.assertFalse(self.history.undo())
+        self.assertFalse(self.history.redo())
 
-    def test_discard_last_record(self):
-        """Test discarding a recorded state (e.g., for a cancelled action)."""
-        self.history.record_state(self.initial_state)
+    def test_history_depth_is_bounded(self):
+        self.history.max_depth = 3
+        for mileage in range(10001, 10006):
+            self.car1.milage = mileage
+            self._record(lambda: db.update_car_details(self.car1))
+        self.assertEqual(len(self.history.undo_stack), 3)
+
+        while self.history.undo_stack:
+            self.history.undo()
+        self.assertEqual(db.load_car_by_id(self.car1.id).milage, 10002)
+
+    def test_memory_accounting(self):
+        self.assertEqual(self.history.memory_usage, 0)
+        self._record(lambda: db.delete_car_by_id(self.car1.id))
+        one_action = self.history.memory_usage
+        self.assertGreater(one_action, 0)
+
+        # Moving an action between the stacks keeps the total unchanged
+        self.history.undo()
+        self.assertEqual(self.history.memory_usage, one_action)
+
+        self.history.clear()
+        self.assertEqual(self.history.memory_usage, 0)
+
+    def test_memory_budget_drops_oldest_actions(self):
+        self._record(lambda: db.delete_car_by_id(self.car1.id))
+        self.history.max_bytes = self.history.memory_usage
+        self._record(lambda: db.delete_car_by_id(self.car2.id))
         self.assertEqual(len(self.history.undo_stack), 1)
-        self.history.discard_last_record()
-        self.assertEqual(len(self.history.undo_stack), 0)
+        self.assertLessEqual(self.history.memory_usage, self.history.max_bytes * 2)
 
 
 if __name__ == "__main__":
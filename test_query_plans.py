@@ -0,0 +1,152 @@
+import unittest
+import os
+import re
+import sqlite3
+from unittest import mock
+from src.car import Car
+import src.database as db
+
+
+class TestMigrations(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db_file = "test_migrations_db.sqlite"
+        db.DB_FILE = self.test_db_file
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def test_fresh_database_is_fully_migrated(self):
+        db.init_db()
+        conn = db.get_db_connection()
+        self.assertEqual(db.get_schema_version(conn), len(db.MIGRATIONS))
+
+    def test_existing_database_upgrades_in_place(self):
+        """A database created before migrations existed keeps its data and gains the indexes."""
+        conn = sqlite3.connect(self.test_db_file)
+        db._migration_create_tables(conn)
+        conn.execute(
+            "INSERT INTO cars (make, model, year, milage, vin, license_plate) VALUES ('Old', 'Car', 2001, 1, 'V', 'P')"
+        )
+        conn.commit()
+        conn.close()
+
+        db.init_db()
+        conn = db.get_db_connection()
+        self.assertEqual(db.get_schema_version(conn), len(db.MIGRATIONS))
+        indexes = {
+            row["name"]
+            for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+        }
+        self.assertIn("idx_maintenance_logs_car_service_date", indexes)
+        self.assertIn("idx_diagnostic_logs_car_status", indexes)
+        self.assertEqual(db.load_all_cars()[0].make, "Old")
+
+    def test_init_db_is_idempotent(self):
+        db.init_db()
+        statements = []
+        db.get_db_connection().set_trace_callback(statements.append)
+        db.init_db()  # The schema was already checked on this connection
+        db.get_db_connection().set_trace_callback(None)
+        self.assertEqual(statements, [])
+        conn = db.get_db_connection()
+        self.assertEqual(db.get_schema_version(conn), len(db.MIGRATIONS))
+
+
+class TestQueryPlans(unittest.TestCase):
+    """Runs the hot queries in database.py and fails if any of them scans a whole table."""
+
+    # Per-car queries must not scan any table; fleet-wide filters may walk the
+    # cars table but must reach the log tables through an index.
+    PER_CAR_SCAN = re.compile(r"^SCAN (cars|maintenance_logs|diagnostic_logs)\b")
+    LOG_TABLE_SCAN = re.compile(r"^SCAN (maintenance_logs|diagnostic_logs)\b")
+
+    def setUp(self):
+        self.test_db_file = "test_query_plans_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        for i in range(20):
+            car = Car("Make%d" % (i % 3), "Model%d" % i, 2000 + i, 1000 * i, "VIN%d" % i, "PLATE%d" % i)
+            db.add_car(car)
+            db.add_maintenance_log(car.id, car.log_maintenance("oil change", 40, date="2024-01-01"))
+            db.add_diagnostic_log(car.id, car.log_diagnostic("Noise"))
+        db.get_db_connection().execute("ANALYZE")
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _captured_statements(self, func, *args):
+        """Returns the SQL statements, with parameters expanded, that func executes."""
+        statements = []
+        conn = db.get_db_connection()
+        conn.set_trace_callback(statements.append)
+        try:
+            func(*args)
+        finally:
+            conn.set_trace_callback(None)
+        return [
+            sql
+            for sql in statements
+            if sql.lstrip().upper().startswith(("SELECT", "UPDATE", "DELETE"))
+        ]
+
+    def _plan(self, sql):
+        conn = db.get_db_connection()
+        return [row[3] for row in conn.execute("EXPLAIN QUERY PLAN " + sql)]
+
+    def assertNoScans(self, pattern, func, *args):
+        statements = self._captured_statements(func, *args)
+        self.assertTrue(statements, "no statements were captured")
+        for sql in statements:
+            for step in self._plan(sql):
+                self.assertIsNone(
+                    pattern.match(step), f"full table scan in {sql!r}: {step}"
+                )
+
+    def test_load_car_by_id(self):
+        self.assertNoScans(self.PER_CAR_SCAN, db.load_car_by_id, 5)
+
+    def test_json_hydration(self):
+        with mock.patch.object(db, "HYDRATION_MODE", "json"):
+            db.clear_car_cache()
+            self.assertNoScans(self.PER_CAR_SCAN, db.load_car_by_id, 5)
+            self.assertNoScans(
+                self.LOG_TABLE_SCAN, db.load_filtered_cars, {"has_open_issues": True}
+            )
+
+    def test_uniqueness_checks(self):
+        self.assertNoScans(self.PER_CAR_SCAN, db.check_vin_exists, "VIN5")
+        self.assertNoScans(self.PER_CAR_SCAN, db.check_license_plate_exists, "PLATE5", 3)
+
+    def test_car_writes(self):
+        car = db.load_car_by_id(5)
+        car.milage += 1
+        self.assertNoScans(self.PER_CAR_SCAN, db.update_car_details, car)
+        self.assertNoScans(self.PER_CAR_SCAN, db.resolve_diagnostic_log, car.diagnostic_logs[0])
+        self.assertNoScans(self.PER_CAR_SCAN, db.delete_car_by_id, 5)
+
+    def test_filtered_fleet_queries(self):
+        filters = {
+            "make": "make1",
+            "max_mileage": 15000,
+            "has_open_issues": True,
+            "needs_service_type": "oil change",
+        }
+        self.assertNoScans(self.LOG_TABLE_SCAN, db.load_filtered_cars, filters)
+        self.assertNoScans(self.LOG_TABLE_SCAN, db.load_cars_page, filters, 5)
+
+    def test_keyset_page_seeks_into_the_car_index(self):
+        _, next_key, _ = db.load_cars_page({}, 5)
+        self.assertNoScans(self.PER_CAR_SCAN, db.load_cars_page, {}, 5, next_key)
+        self.assertNoScans(self.PER_CAR_SCAN, db.load_cars_page, {}, 5, None, next_key)
+
+
+if __name__ == "__main__":
+    unittest.main()
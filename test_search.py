@@ -0,0 +1,97 @@
+import unittest
+import os
+from concurrent.futures import ThreadPoolExecutor
+from unittest import mock
+from src.car import Car
+import src.database as db
+import src.search as search
+
+
+class TestSearch(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db_file = "test_search_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        self.camry = Car("Toyota", "Camry", 2020, 30000, "VIN1", "PLATE1")
+        self.civic = Car("Honda", "Civic", 2019, 50000, "VIN2", "PLATE2")
+        db.add_car(self.camry)
+        db.add_car(self.civic)
+        self.converter = self._diagnose(self.camry, "Catalytic converter efficiency below threshold", "P0420")
+        self.misfire = self._diagnose(self.civic, "Engine misfire on cylinder 2", "P0302")
+        db.add_maintenance_log(self.civic.id, self.civic.log_maintenance("Spark plug replacement", 120))
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _diagnose(self, car, description, code=None):
+        log = car.log_diagnostic(description, code)
+        db.add_diagnostic_log(car.id, log)
+        return log
+
+    def _hit_ids(self, query):
+        return [(hit["kind"], hit["log"]["id"]) for result in search.search(query) for hit in result["hits"]]
+
+    def test_search_groups_hits_by_car(self):
+        results = search.search("p0420")
+        self.assertEqual(len(results), 1)
+        self.assertEqual(results[0]["car"]["license_plate"], "PLATE1")
+        hit = results[0]["hits"][0]
+        self.assertEqual(hit["kind"], "diagnostic")
+        self.assertEqual(hit["log"]["id"], self.converter["id"])
+        self.assertIn("[P0420]", hit["snippet"])
+
+        # Words match as prefixes, across diagnostic and maintenance logs
+        self.assertEqual(self._hit_ids("misfir"), [("diagnostic", self.misfire["id"])])
+        self.assertEqual([hit[0] for hit in self._hit_ids("spark")], ["maintenance"])
+        self.assertEqual(search.search("timing belt"), [])
+
+    def test_car_deleted_during_a_search(self):
+        search_table = search._search_table
+
+        def search_then_delete(*args):
+            hits = search_table(*args)
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pool.submit(db.delete_car_by_id, self.camry.id).result()
+                pool.submit(db.close_db_connection).result()
+            return hits
+
+        with mock.patch.object(search, "_search_table", search_then_delete):
+            results = search.search("p0420")
+        # The search saw the car as it was when it started
+        self.assertEqual(results[0]["car"]["license_plate"], "PLATE1")
+        self.assertEqual(search.search("p0420"), [])
+
+    def test_results_are_ranked(self):
+        self._diagnose(self.civic, "Misfire again, misfire under load, misfire at idle")
+        hits = self._hit_ids("misfire")
+        self.assertEqual(len(hits), 2)
+        self.assertEqual(hits[1], ("diagnostic", self.misfire["id"]))
+        self.assertEqual(len(search.search("misfire", limit=1)[0]["hits"]), 1)
+
+    def test_index_follows_every_write(self):
+        self.converter["resolution"] = "Replaced the oxygen sensor"
+        self.converter["status"] = "resolved"
+        db.resolve_diagnostic_log(self.converter)
+        self.assertEqual(self._hit_ids("oxygen"), [("diagnostic", self.converter["id"])])
+
+        db.delete_diagnostic_log(self.converter["id"])
+        self.assertEqual(search.search("oxygen"), [])
+        db.delete_car_by_id(self.civic.id)
+        self.assertEqual(search.search("misfire spark"), [])
+        self.assertEqual(search.search("spark"), [])
+
+    def test_query_syntax_is_not_interpreted(self):
+        self.assertEqual(search.match_expression('code:"P0420" OR NEAR('), '"code"* "P0420"* "OR"* "NEAR"*')
+        self.assertIsNone(search.match_expression('" * ( ) -'))
+        self.assertEqual(search.search('" * ( ) -'), [])
+        self.assertEqual(len(search.search('"misfire" AND')), 0)
+        self.assertEqual(len(search.search("engine-misfire")), 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,154 @@
+import unittest
+import os
+import datetime
+from unittest import mock
+from concurrent.futures import ThreadPoolExecutor
+from src.car import Car, SERVICE_INTERVALS
+import src.database as db
+from src.history_manager import HistoryManager
+from src.service_due import compute_due_matrix, get_fleet_due_services
+
+
+class TestServiceDueIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db_file = "test_service_due_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        today = datetime.date.today()
+        self.old_date = (today - datetime.timedelta(days=400)).isoformat()
+        self.recent_date = (today - datetime.timedelta(days=10)).isoformat()
+
+        self.car1 = Car("Toyota", "Camry", 2018, 78500, "VIN001", "ABC-123")
+        self.car2 = Car("Honda", "CR-V", 2020, 45000, "VIN002", "DEF-456")
+        self.car3 = Car("Ford", "Focus", 2015, 120000, "VIN003", "GHI-789")
+        for car in (self.car1, self.car2, self.car3):
+            db.add_car(car)
+
+        self._log(self.car1, "Oil Change", 78000, self.recent_date)
+        self._log(self.car1, "tire rotation", 77000, self.old_date)
+        self._log(self.car2, "oil change", 39000, self.recent_date)
+        self._log(self.car3, "oil change", 100000, self.old_date)
+        self._log(self.car3, "oil change", 119000, self.recent_date)
+        self._log(self.car3, "timing belt", 60000, self.recent_date)
+
+    def tearDown(self):
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _log(self, car, service, milage, date):
+        log = car.log_maintenance(service, 50, milage=milage, date=date)
+        db.add_maintenance_log(car.id, log)
+        return log
+
+    def assertMatchesPerCarLogic(self):
+        """The index must agree with Car.get_upcoming_services for every car."""
+        expected = {car.id: car.get_upcoming_services() for car in db.load_all_cars()}
+        self.assertEqual(get_fleet_due_services(), expected)
+
+    def test_matches_per_car_logic(self):
+        self.assertMatchesPerCarLogic()
+        due = get_fleet_due_services()
+        self.assertNotIn("oil change", due[self.car1.id])
+        self.assertIn("oil change", due[self.car2.id])  # overdue by mileage
+        self.assertNotIn("oil change", due[self.car3.id])
+
+    def test_add_log_updates_index(self):
+        self._log(self.car2, "oil change", 45000, datetime.date.today().isoformat())
+        self.assertNotIn("oil change", get_fleet_due_services()[self.car2.id])
+        self.assertMatchesPerCarLogic()
+
+    def test_older_log_does_not_replace_latest(self):
+        self._log(self.car3, "oil change", 90000, self.old_date)
+        self.assertNotIn("oil change", get_fleet_due_services()[self.car3.id])
+        self.assertMatchesPerCarLogic()
+
+    def test_delete_log_falls_back_to_previous_service(self):
+        latest = db.load_car_by_id(self.car3.id).maintenance_logs[1]
+        db.delete_maintenance_log(latest["id"])
+        self.assertIn("oil change", get_fleet_due_services()[self.car3.id])
+        self.assertMatchesPerCarLogic()
+
+    def test_delete_car_removes_its_entries(self):
+        db.delete_car_by_id(self.car3.id)
+        conn = db.get_db_connection()
+        count = conn.execute(
+            "SELECT COUNT(*) FROM service_last_done WHERE car_id = ?", (self.car3.id,)
+        ).fetchone()[0]
+        self.assertEqual(count, 0)
+        self.assertMatchesPerCarLogic()
+
+    def test_undo_and_redo_keep_index_in_sync(self):
+        history = HistoryManager()
+        history.begin_action()
+        self._log(self.car2, "oil change", 45000, datetime.date.today().isoformat())
+        db.delete_car_by_id(self.car1.id)
+        history.end_action()
+
+        history.undo()
+        self.assertMatchesPerCarLogic()
+        history.redo()
+        self.assertMatchesPerCarLogic()
+
+    def test_reset_database_rebuilds_index(self):
+        snapshot = [car.to_dict() for car in db.load_all_cars()][:2]
+        db.reset_database(snapshot)
+        self.assertMatchesPerCarLogic()
+
+    def test_due_matrix_shape(self):
+        car_ids, services, due = compute_due_matrix()
+        self.assertEqual(sorted(car_ids.tolist()), [self.car1.id, self.car2.id, self.car3.id])
+        self.assertEqual(services, list(SERVICE_INTERVALS))
+        self.assertEqual(due.shape, (3, len(SERVICE_INTERVALS)))
+
+    def test_intervals_without_limits(self):
+        """A None interval never makes a service due, exactly as in needs_maintenance."""
+        with mock.patch.dict(
+            SERVICE_INTERVALS, {"oil change": (None, 30), "tire rotation": (1000, None)}
+        ):
+            self.assertMatchesPerCarLogic()
+
+    def test_boundaries_match_per_car_logic(self):
+        """Gaps exactly equal to an interval count as due."""
+        today = datetime.date.today()
+        self._log(self.car2, "tire rotation", 45000 - 7500, today.isoformat())
+        self._log(self.car1, "brake inspection", 78500, (today - datetime.timedelta(days=365)).isoformat())
+        self._log(self.car1, "timing belt", 78500, (today - datetime.timedelta(days=2554)).isoformat())
+        self.assertMatchesPerCarLogic()
+
+    def test_empty_fleet(self):
+        db.reset_database([])
+        car_ids, services, due = compute_due_matrix()
+        self.assertEqual(due.shape, (0, len(SERVICE_INTERVALS)))
+        self.assertEqual(get_fleet_due_services(), {})
+
+    def test_writes_between_the_reads_are_not_mixed_in(self):
+        def add_car_with_log():
+            car = Car("Kia", "Rio", 2021, 100, "VIN004", "JKL-012")
+            db.add_car(car)
+            self._log(car, "oil change", 100, self.recent_date)
+            db.close_db_connection()
+
+        load_car_mileages = db.load_car_mileages
+
+        def load_then_write():
+            rows = load_car_mileages()
+            with ThreadPoolExecutor(max_workers=1) as pool:
+                pool.submit(add_car_with_log).result()
+            return rows
+
+        expected = get_fleet_due_services()
+        with mock.patch.object(db, "load_car_mileages", load_then_write):
+            self.assertEqual(get_fleet_due_services(), expected)
+        self.assertEqual(len(get_fleet_due_services()), 4)
+
+    def test_needs_service_filter_uses_index(self):
+        results = db.load_filtered_cars({"needs_service_type": "oil change"})
+        self.assertEqual([car.vin for car in results], ["VIN002"])
+
+
+if __name__ == "__main__":
+    unittest.main()
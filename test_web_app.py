@@ -0,0 +1,303 @@
+import unittest
+import datetime
+import errno
+import hashlib
+import io
+import os
+import shutil
+import tempfile
+from unittest import mock
+import src.database as db
+import src.web.images as images
+
+
+class TestWebApp(unittest.TestCase):
+
+    def setUp(self):
+        self.test_db_file = "test_web_app_db.sqlite"
+        db.DB_FILE = self.test_db_file
+        db.init_db()
+
+        from src.web import app as web_app
+
+        self.web_app = web_app
+        self.upload_dir = tempfile.mkdtemp()
+        web_app.app.config["UPLOAD_FOLDER"] = self.upload_dir
+        self.client = web_app.app.test_client()
+        web_app._car_list_cache.clear()
+
+    def tearDown(self):
+        # Pool threads hold their own connections to the test database
+        self.web_app.start_executors(wait=True)
+        self.web_app.app.config["UPLOAD_FOLDER"] = self.web_app.UPLOAD_FOLDER
+        shutil.rmtree(self.upload_dir, True)
+        db.close_db_connection()
+        for path in (self.test_db_file, self.test_db_file + "-wal", self.test_db_file + "-shm"):
+            if os.path.exists(path):
+                os.remove(path)
+
+    def _add_car(self, vin="VIN1", plate="PLATE1"):
+        return self.client.post(
+            "/car/add",
+            data={"make": "Toyota", "model": "Camry", "year": "2020", "milage": "30000",
+                  "vin": vin, "license_plate": plate},
+        )
+
+    def test_add_and_view_car(self):
+        self.assertEqual(self._add_car().status_code, 302)
+        car = db.load_all_cars()[0]
+
+        response = self.client.get("/")
+        self.assertIn(b"PLATE1", response.data)
+        response = self.client.get(f"/car/{car.id}")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"Camry", response.data)
+        self.assertEqual(self.client.get("/car/999").status_code, 404)
+
+    def test_duplicate_vin_is_rejected(self):
+        self._add_car()
+        response = self._add_car(plate="PLATE2")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"already exists", response.data)
+        self.assertEqual(len(db.load_all_cars()), 1)
+
+    def test_logs_are_written_through_the_pool(self):
+        self._add_car()
+        car_id = db.load_all_cars()[0].id
+        self.client.post(
+            f"/car/{car_id}/add_maintenance",
+            data={"service": "oil change", "cost": "40", "milage": "31000", "date": "2024-01-01"},
+        )
+        self.client.post(f"/car/{car_id}/add_diagnostic", data={"description": "Noise", "code": ""})
+        log_id = db.load_car_by_id(car_id).diagnostic_logs[0]["id"]
+        self.client.post(f"/car/{car_id}/resolve_diagnostic/{log_id}", data={"resolution": "Fixed"})
+
+        car = db.load_car_by_id(car_id)
+        self.assertEqual(car.milage, 31000)
+        self.assertEqual(car.maintenance_logs[0]["service"], "oil change")
+        self.assertEqual(car.diagnostic_logs[0]["status"], "resolved")
+
+    def test_analytics_endpoint(self):
+        self._add_car()
+        car_id = db.load_all_cars()[0].id
+        self.client.post(
+            f"/car/{car_id}/add_maintenance",
+            data={"service": "oil change", "cost": "40", "milage": "31000", "date": "2024-01-01"},
+        )
+        response = self.client.get("/api/analytics/service")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.get_json()["rollup"][0]["total_cost"], 40.0)
+        self.assertEqual(self.client.get("/api/analytics/year").status_code, 404)
+
+    def test_search(self):
+        self._add_car()
+        car_id = db.load_all_cars()[0].id
+        self.client.post(f"/car/{car_id}/add_diagnostic", data={"description": "<b>Misfire</b>", "code": "P0300"})
+
+        response = self.client.get("/search?q=misfire")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"&lt;b&gt;<mark>Misfire</mark>&lt;/b&gt;", response.data)
+        self.assertIn(b"No logs match", self.client.get("/search?q=P0420").data)
+        results = self.client.get("/api/search?q=p03").get_json()["results"]
+        self.assertEqual(results[0]["car"]["id"], car_id)
+        self.assertEqual(results[0]["hits"][0]["log"]["code"], "P0300")
+
+    def test_reminders_read_only_due_cars(self):
+        self._add_car()
+        self._add_car(vin="VIN2", plate="PLATE2")
+        car_id = db.load_all_cars()[0].id
+        for service in ("oil change", "tire rotation", "brake inspection", "timing belt"):
+            self.client.post(
+                f"/car/{car_id}/add_maintenance",
+                data={"service": service, "cost": "40", "milage": "30000", "date": datetime.date.today().isoformat()},
+            )
+
+        with mock.patch.object(db, "load_all_cars") as load_all_cars:
+            response = self.client.get("/reminders")
+        load_all_cars.assert_not_called()
+        self.assertIn(b"PLATE2", response.data)
+        self.assertNotIn(b"PLATE1", response.data)
+
+    def test_unchanged_pages_are_not_sent_again(self):
+        self._add_car()
+        self._add_car(vin="VIN2", plate="PLATE2")
+        car_id = db.load_all_cars()[0].id
+        self.client.get("/")  # Shows and clears the "added" messages
+
+        response = self.client.get("/")
+        etag = response.headers["ETag"]
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+        self.assertIn("Last-Modified", response.headers)
+        self.assertEqual(self.client.get("/", headers={"If-None-Match": etag}).status_code, 304)
+        partial = self.client.get("/", headers={"X-Requested-With": "XMLHttpRequest"})
+        self.assertNotEqual(partial.headers["ETag"], etag)
+        self.assertIn(b"PLATE1", partial.data)
+
+        detail = self.client.get(f"/car/{car_id}")
+        other_etag = self.client.get(f"/car/{car_id + 1}").headers["ETag"]
+        response = self.client.get(f"/car/{car_id}", headers={"If-None-Match": detail.headers["ETag"]})
+        self.assertEqual(response.status_code, 304)
+
+        # A write changes the car's tag and the fleet's, but not another car's
+        db.raise_car_mileages({car_id: 35000})
+        response = self.client.get(f"/car/{car_id}", headers={"If-None-Match": detail.headers["ETag"]})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"35,000", response.data)
+        self.assertEqual(self.client.get(f"/car/{car_id + 1}").headers["ETag"], other_etag)
+        response = self.client.get("/", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"35,000", response.data)
+
+    def test_car_lists_are_rendered_once_per_fleet_version(self):
+        self._add_car()
+        with mock.patch.object(db, "load_cars_page", wraps=db.load_cars_page) as load_cars_page:
+            self.client.get("/?make=Toyota")
+            self.assertIn(b"PLATE1", self.client.get("/?make=Toyota").data)
+            self.client.get("/?make=Toyota", headers={"X-Requested-With": "XMLHttpRequest"})
+            self.assertEqual(load_cars_page.call_count, 1)
+            self.client.get("/?make=Honda")
+            self.assertEqual(load_cars_page.call_count, 2)
+            self._add_car(vin="VIN2", plate="PLATE2")
+            self.assertIn(b"PLATE2", self.client.get("/?make=Toyota").data)
+            self.assertEqual(load_cars_page.call_count, 3)
+
+    def test_metrics(self):
+        metrics = self.web_app.metrics
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+        self.assertNotIn("Server-Timing", self.client.get("/").headers)
+
+        metrics.enable()
+        metrics.registry.reset()
+        self.web_app.start_executors(wait=True)  # Pool connections are reopened as timed ones
+        try:
+            self._add_car()
+            car_id = db.load_all_cars()[0].id
+            with mock.patch.object(metrics, "SLOW_QUERY_MS", 0), self.assertLogs(metrics.logger, "WARNING") as logs:
+                response = self.client.get(f"/car/{car_id}")
+            self.assertIn("Slow query", logs.output[0])
+            timing = response.headers["Server-Timing"]
+            self.assertRegex(timing, r'sql;dur=[\d.]+;desc="statements: [1-9]\d*"')
+            self.assertIn("render;dur=", timing)
+
+            text = self.client.get("/metrics").get_data(as_text=True)
+            self.assertIn('car_tracker_requests_total{endpoint="car_detail",method="GET",status="200"} 1', text)
+            self.assertIn('car_tracker_request_phase_seconds_total{endpoint="car_detail",phase="render"}', text)
+            self.assertIn('car_tracker_request_duration_seconds_count{endpoint="car_detail"} 1', text)
+            self.assertRegex(text, r'car_tracker_sql_statements_total\{endpoint="car_detail"\} [1-9]')
+            self.assertRegex(text, r"car_tracker_slow_queries_total [1-9]")
+        finally:
+            metrics.disable()
+            self.web_app.start_executors(wait=True)
+
+    def test_upload_is_streamed_to_disk(self):
+        self._add_car()
+        car_id = db.load_all_cars()[0].id
+        payload = os.urandom(3 * self.web_app.UPLOAD_CHUNK_SIZE + 17)
+        response = self.client.post(
+            f"/car/{car_id}/edit",
+            data={"milage": "30500", "license_plate": "PLATE1",
+                  "image_before": (io.BytesIO(payload), "front.jpg")},
+            content_type="multipart/form-data",
+        )
+        self.assertEqual(response.status_code, 302)
+
+        car = db.load_car_by_id(car_id)
+        self.assertEqual(car.milage, 30500)
+        self.assertEqual(car.image_before, hashlib.sha256(payload).hexdigest() + ".jpg")
+        self.web_app.start_executors(wait=True)  # Let the thumbnail pool finish
+        # The payload is not an image, so no thumbnails are made
+        self.assertEqual(os.listdir(self.upload_dir), [car.image_before])
+        with open(os.path.join(self.upload_dir, car.image_before), "rb") as f:
+            self.assertEqual(f.read(), payload)
+
+    def _upload_photo(self, car_id, field, payload):
+        return self.client.post(
+            f"/car/{car_id}/edit",
+            data={"milage": "30000", "license_plate": "PLATE1", field: (io.BytesIO(payload), "photo.PNG")},
+            content_type="multipart/form-data",
+        )
+
+    def test_images_are_deduplicated_and_cached(self):
+        self._add_car()
+        car_id = db.load_all_cars()[0].id
+        payload = b"not really a photo"
+        # As without Pillow, so no thumbnail is ever made
+        with mock.patch.object(images, "Image", None):
+            self._upload_photo(car_id, "image_before", payload)
+            self._upload_photo(car_id, "image_after", payload)
+            self.web_app.start_executors(wait=True)
+        car = db.load_car_by_id(car_id)
+        self.assertEqual(car.image_before, car.image_after)
+        self.assertEqual(os.listdir(self.upload_dir), [car.image_before])
+
+        response = self.client.get(f"/images/{car.image_before}")
+        self.assertEqual(response.data, payload)
+        etag = response.headers["ETag"]
+        self.assertEqual(etag, f'"{hashlib.sha256(payload).hexdigest()}"')
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        self.assertIn("max-age=31536000", response.headers["Cache-Control"])
+        response = self.client.get(f"/images/{car.image_before}", headers={"If-None-Match": etag})
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(self.client.get("/images/../app.py").status_code, 404)
+
+        # Without a thumbnail the original is sent, but not cached for good
+        response = self.client.get(f"/images/160/{car.image_before}")
+        self.assertEqual(response.data, payload)
+        self.assertIn("no-cache", response.headers["Cache-Control"])
+        self.assertEqual(self.client.get(f"/images/123/{car.image_before}").status_code, 404)
+
+    @unittest.skipIf(images.Image is None, "Pillow is not installed")
+    def test_unreadable_images_are_not_queued_again(self):
+        self._add_car()
+        car_id = db.load_all_cars()[0].id
+        self._upload_photo(car_id, "image_before", b"not really a photo")
+        self.web_app.start_executors(wait=True)
+
+        car = db.load_car_by_id(car_id)
+        with mock.patch.object(images, "make_thumbnails") as make_thumbnails:
+            self.assertEqual(self.client.get(f"/images/160/{car.image_before}").status_code, 404)
+            self.assertEqual(self.client.get(f"/images/640/{car.image_before}").status_code, 404)
+            self.web_app.start_executors(wait=True)
+        make_thumbnails.assert_not_called()
+        self.assertEqual(self.client.get(f"/images/{car.image_before}").status_code, 200)
+
+    @unittest.skipIf(images.Image is None, "Pillow is not installed")
+    def test_passing_thumbnail_errors_are_retried(self):
+        self._add_car()
+        car_id = db.load_all_cars()[0].id
+        photo = io.BytesIO()
+        images.Image.new("RGB", (800, 400), "blue").save(photo, "PNG")
+        disk_full = OSError(errno.ENOSPC, "No space left on device")
+        with mock.patch.object(images.ImageOps, "exif_transpose", side_effect=disk_full), \
+                self.assertLogs(self.web_app.app.logger, "WARNING"):
+            self._upload_photo(car_id, "image_after", photo.getvalue())
+            self.web_app.start_executors(wait=True)
+
+        car = db.load_car_by_id(car_id)
+        self.assertFalse(os.path.exists(os.path.join(self.upload_dir, images.thumbnail_name(car.image_after, 640))))
+        # Not remembered as unreadable: the original is sent and the thumbnails queued again
+        self.assertEqual(self.client.get(f"/images/640/{car.image_after}").status_code, 200)
+        self.web_app.start_executors(wait=True)
+        self.assertEqual(self.client.get(f"/images/640/{car.image_after}").mimetype, "image/jpeg")
+
+    @unittest.skipIf(images.Image is None, "Pillow is not installed")
+    def test_thumbnails_are_made_in_the_background(self):
+        self._add_car()
+        car_id = db.load_all_cars()[0].id
+        photo = io.BytesIO()
+        images.Image.new("RGB", (2000, 1000), "red").save(photo, "PNG")
+        self._upload_photo(car_id, "image_after", photo.getvalue())
+        self.web_app.start_executors(wait=True)
+
+        car = db.load_car_by_id(car_id)
+        response = self.client.get(f"/images/640/{car.image_after}")
+        self.assertEqual(response.mimetype, "image/jpeg")
+        self.assertIn("immutable", response.headers["Cache-Control"])
+        with images.Image.open(io.BytesIO(response.data)) as thumbnail:
+            self.assertEqual(thumbnail.size, (640, 320))
+        self.assertIn(f"/images/160/{car.image_after}".encode(), self.client.get("/").data)
+        self.assertIn(f"/images/640/{car.image_after}".encode(), self.client.get(f"/car/{car_id}").data)
+
+
+if __name__ == "__main__":
+    unittest.main()